@@ -24,6 +24,7 @@ except ImportError:
     AAA_VERSION = "1.6.7"
 
 from utils.api_requests import saddlebag_request_headers
+from utils.log_writer import StreamToFile
 
 import breeze_resources
 import ctypes
@@ -33,6 +34,7 @@ import json
 from sys import exit
 import requests
 import os
+import multiprocessing
 from PyQt5.QtGui import QIcon
 from PyQt5.QtCore import QThread, pyqtSignal, QFile, QTextStream
 from PyQt5 import QtGui
@@ -65,32 +67,6 @@ if sys.platform == "win32":
     ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID(myappid)
 
 
-# Add at the beginning of the file after imports
-class StreamToFile:
-    def __init__(self, filepath):
-        self.filepath = filepath
-        self.terminal_out = sys.stdout
-        self.terminal_err = sys.stderr
-        # Ensure log directory exists
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        # Clear previous log file
-        with open(self.filepath, "w", encoding="utf-8") as f:
-            f.write(f"=== Log started at {datetime.now()} ===\n")
-
-        # Redirect both stdout and stderr
-        sys.stdout = self
-        sys.stderr = self
-
-    def write(self, text):
-        self.terminal_out.write(text)
-        with open(self.filepath, "a", encoding="utf-8") as f:
-            f.write(text)
-
-    def flush(self):
-        self.terminal_out.flush()
-        self.terminal_err.flush()
-
-
 class Item_And_Pet_Statistics(QThread):
     completed = pyqtSignal(pd.DataFrame, pd.DataFrame)
 
@@ -1919,14 +1895,22 @@ class App(QMainWindow):
 
         # Check if an entry with the same criteria (except buyout) exists
         existing_entries = []
+        webhook = None
         for i, entry in enumerate(self.ilvl_list):
             entry_copy = entry.copy()
             entry_copy.pop("buyout")  # Remove buyout for comparison
+            # per rule webhooks are only set in the json, the form does not show them
+            entry_copy.pop("webhook", None)
             new_entry_copy = ilvl_dict_data.copy()
             new_entry_copy.pop("buyout")  # Remove buyout for comparison
 
             if entry_copy == new_entry_copy:
                 existing_entries.append(i)
+                webhook = webhook or entry.get("webhook")
+
+        # keep the webhook of the rule being replaced so its alerts stay routed
+        if webhook:
+            ilvl_dict_data["webhook"] = webhook
 
         # Log contents before changes
         self.log_list_widget_contents(self.ilvl_list_display, "BEFORE add/update")
@@ -2053,7 +2037,7 @@ class App(QMainWindow):
 
     def entries_match(self, entry, compare_dict):
         """
-        Compare two entry dictionaries while ignoring the 'buyout' field.
+        Compare two entry dictionaries while ignoring the 'buyout' and 'webhook' fields.
 
         This helper function creates a shallow copy of the provided entry dictionary,
         removes the 'buyout' key, and then compares the resulting dictionary with the
@@ -2071,6 +2055,8 @@ class App(QMainWindow):
         """
         entry_copy = entry.copy()
         entry_copy.pop("buyout")
+        # per rule webhooks are not part of the form
+        entry_copy.pop("webhook", None)
         return entry_copy == compare_dict
 
     def erase_ilvl_data(self):
@@ -2952,6 +2938,14 @@ class App(QMainWindow):
         if not self.validate_item_lists(reset=reset):
             return False
 
+        # keep hand edited options the settings page does not manage (ex: SCAN_ENGINE)
+        if not reset and os.path.exists(self.path_to_data):
+            try:
+                with open(self.path_to_data, encoding="utf-8") as json_file:
+                    config_json = {**json.load(json_file), **config_json}
+            except (json.JSONDecodeError, OSError):
+                pass
+
         # Save JSON files
         self.save_json_file(self.path_to_data, config_json)
         self.save_json_file(self.path_to_desired_pets, self.pet_list)
@@ -3258,6 +3252,18 @@ class App(QMainWindow):
                 "excludeBreeds": excluded_breeds,
             }
 
+            # keep the webhook of the rule being replaced, it is only set in the json
+            webhook = next(
+                (
+                    rule["webhook"]
+                    for rule in self.pet_ilvl_rules
+                    if rule["petID"] == pet_id and rule.get("webhook")
+                ),
+                None,
+            )
+            if webhook:
+                pet_rule["webhook"] = webhook
+
             # Update the rules list
             # Remove existing rule for this pet if it exists
             self.pet_ilvl_rules = [
@@ -3953,6 +3959,8 @@ class App(QMainWindow):
 
 
 if __name__ == "__main__":
+    # MATCH_PROCESSES workers are spawned, frozen builds need this to start them
+    multiprocessing.freeze_support()
     try:
         app = QApplication(sys.argv)
         file = QFile(":/dark/stylesheet.qss")
@@ -0,0 +1,330 @@
+#!/usr/bin/python3
+"""
+Matching benchmark.
+
+Runs recorded (or synthetic) auction house payloads through the same
+AuctionMatcher the scanner uses, with the desired lists and flags from a
+AzerothAuctionAssassinData style folder, and reports auctions/sec, time per
+stage and peak memory. Nothing is sent to discord: alerts stop at the dedup
+store, which is the last step before an embed is built.
+
+Building the embeds is left out of the timings. It happens in
+process_realm_data inside Alerts.run, which needs a loaded MegaData (Blizzard
+credentials, realm names, links), so it cannot run from a config folder alone.
+
+Payloads are json files shaped like the Blizzard auctions response
+({"auctions": [...]}), the realm id is read from "connected_realm" when the
+file has it. Commodity payloads (no "connected_realm") are matched as -1 / -2.
+
+    python3 benchmark-matching.py recorded/ --repeat 5 --output results.json
+
+Stages nest: "match" includes "prefilter", "commodity_prefilter",
+"ilvl_checks" and "pet_checks", and "ilvl_checks" includes "ilvl_resolver".
+"""
+
+import argparse, json, os, platform, re, time, tracemalloc
+from collections import defaultdict
+import utils.auction_matching
+from utils.alert_store import AlertDedupStore
+from utils.api_requests import (
+    get_raidbots_equippable_items,
+    get_raidbots_item_curves,
+    get_raidbots_item_squish_era,
+)
+from utils.auction_matching import AuctionMatcher
+from utils.bonus_ids import get_bonus_catalog
+from utils.desired_lists import (
+    normalize_desired_items,
+    build_desired_ilvl_list,
+    normalize_desired_pet_ilvl_list,
+    build_ilvl_index,
+    build_pet_ilvl_index,
+)
+from utils.ilvl_resolver import (
+    compile_item_curves,
+    clear_ilvl_resolution_cache,
+    resolve_post_midnight_ilvl_cached,
+)
+from utils.mega_data_setup import MegaData
+from utils.version import AAA_VERSION
+
+try:
+    import resource
+except ImportError:
+    # windows
+    resource = None
+
+
+# MegaData.__set_mega_vars, a staticmethod that needs no credentials
+read_mega_var = MegaData._MegaData__set_mega_vars
+
+
+class StageTimer:
+    """Accumulates wall time per stage for wrapped functions."""
+
+    def __init__(self):
+        self.seconds = defaultdict(float)
+        self.calls = defaultdict(int)
+
+    def wrap(self, stage, func):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.seconds[stage] += time.perf_counter() - start
+                self.calls[stage] += 1
+
+        return timed
+
+
+def load_json(path, default):
+    if not os.path.exists(path):
+        print(f"File not found: {path}")
+        return default
+    with open(path) as f:
+        return json.load(f)
+
+
+def build_matcher(config_dir, region=None):
+    """AuctionMatcher from the mega_data.json flags and desired_*.json files in config_dir."""
+    raw_mega_data = load_json(os.path.join(config_dir, "mega_data.json"), {})
+    region = region or raw_mega_data.get("WOW_REGION", "NA")
+    # MegaData's own parsing (env vars, defaults), so the flags match what the scanner builds
+    show_bid_prices = read_mega_var("SHOW_BID_PRICES", raw_mega_data)
+    use_post_midnight_ilvl = read_mega_var("USE_POST_MIDNIGHT_ILVL", raw_mega_data)
+    vector_prefilter = read_mega_var("VECTOR_PREFILTER", raw_mega_data)
+
+    desired_items = normalize_desired_items(
+        load_json(os.path.join(config_dir, "desired_items.json"), {})
+    )
+    desired_pets = normalize_desired_items(
+        load_json(os.path.join(config_dir, "desired_pets.json"), {})
+    )
+    ilvl_info = load_json(os.path.join(config_dir, "desired_ilvl_list.json"), [])
+    desired_ilvl_list = (
+        build_desired_ilvl_list(ilvl_info, use_post_midnight_ilvl) if ilvl_info else []
+    )
+    pet_ilvl_info = load_json(
+        os.path.join(config_dir, "desired_pet_ilvl_list.json"), []
+    )
+    desired_pet_ilvl_list = normalize_desired_pet_ilvl_list(pet_ilvl_info)
+
+    # connected realm id -> sorted realm names, like MegaData.get_realm_names
+    realm_ids = load_json(
+        os.path.join(config_dir, f"{region.lower()}-wow-connected-realm-ids.json"), {}
+    )
+    realm_names = defaultdict(list)
+    for realm_name, realm_id in realm_ids.items():
+        realm_names[realm_id].append(realm_name)
+    realm_names = {k: sorted(v) for k, v in realm_names.items()}
+
+    bonus_catalog = get_bonus_catalog()
+    equippable_items, item_curves, item_squish_era = {}, {}, {}
+    if use_post_midnight_ilvl:
+        equippable_items = get_raidbots_equippable_items()
+        item_curves = compile_item_curves(get_raidbots_item_curves())
+        item_squish_era = get_raidbots_item_squish_era()
+
+    return AuctionMatcher(
+        region=region,
+        show_bid_prices=show_bid_prices,
+        desired_items=desired_items,
+        desired_pets=desired_pets,
+        desired_ilvl_items={},
+        min_ilvl=100000,
+        desired_ilvl_index=build_ilvl_index(desired_ilvl_list),
+        desired_pet_ilvl_index=build_pet_ilvl_index(desired_pet_ilvl_list),
+        socket_ids=bonus_catalog.socket_ids,
+        leech_ids=bonus_catalog.leech_ids,
+        avoidance_ids=bonus_catalog.avoidance_ids,
+        speed_ids=bonus_catalog.speed_ids,
+        ilvl_addition=bonus_catalog.ilvl_addition,
+        realm_names=realm_names,
+        use_post_midnight_ilvl=use_post_midnight_ilvl,
+        bonuses_by_id=bonus_catalog.bonuses_by_id if use_post_midnight_ilvl else {},
+        equippable_items=equippable_items,
+        item_curves=item_curves,
+        item_squish_era=item_squish_era,
+        vector_prefilter=vector_prefilter,
+    )
+
+
+def find_payload_files(paths):
+    payload_files = []
+    for path in paths:
+        if os.path.isdir(path):
+            payload_files += sorted(
+                os.path.join(path, name)
+                for name in os.listdir(path)
+                if name.endswith(".json")
+            )
+        else:
+            payload_files.append(path)
+    return payload_files
+
+
+def payload_realm_id(payload, region):
+    # ex: https://us.api.blizzard.com/data/wow/connected-realm/3678?namespace=dynamic-us
+    href = payload.get("connected_realm", {}).get("href", "")
+    found = re.search(r"connected-realm/(-?\d+)", href)
+    if found:
+        return int(found.group(1))
+    # commodities are the region wide -1 (NA) / -2 (EU) data sets
+    return -1 if region == "NA" else -2
+
+
+def load_payloads(payload_files, region, timer):
+    payloads = []
+    for path in payload_files:
+        start = time.perf_counter()
+        with open(path) as f:
+            payload = json.load(f)
+        timer.seconds["load"] += time.perf_counter() - start
+        timer.calls["load"] += 1
+        payloads.append(
+            (payload_realm_id(payload, region), payload.get("auctions", []))
+        )
+    return payloads
+
+
+def run_pass(matcher, payloads, timer):
+    """Match every payload once, returns (auctions matched, alerts, new alerts)."""
+    clear_ilvl_resolution_cache()
+    alert_store = AlertDedupStore()
+    add_if_new = timer.wrap("dedup", alert_store.add_if_new)
+    match = timer.wrap("match", matcher.clean_listing_data)
+    auction_count, alert_count, new_alert_count = 0, 0, 0
+    for connected_id, auctions in payloads:
+        auction_count += len(auctions)
+        clean_auctions = match(auctions, connected_id) or []
+        alert_count += len(clean_auctions)
+        for auction in clean_auctions:
+            if add_if_new(auction):
+                new_alert_count += 1
+    return auction_count, alert_count, new_alert_count
+
+
+def instrument(matcher, timer):
+    """Time the matcher's inner stages by wrapping them on the instance and module."""
+    matcher.check_tertiary_stats_generic = timer.wrap(
+        "ilvl_checks", matcher.check_tertiary_stats_generic
+    )
+    matcher.check_pet_ilvl_stats = timer.wrap(
+        "pet_checks", matcher.check_pet_ilvl_stats
+    )
+    if matcher.prefilter:
+        matcher.prefilter.filter = timer.wrap("prefilter", matcher.prefilter.filter)
+        matcher.prefilter.filter_commodities = timer.wrap(
+            "commodity_prefilter", matcher.prefilter.filter_commodities
+        )
+    utils.auction_matching.resolve_post_midnight_ilvl_cached = timer.wrap(
+        "ilvl_resolver", utils.auction_matching.resolve_post_midnight_ilvl_cached
+    )
+
+
+def uninstrument(matcher):
+    """Put the unwrapped functions back so the next pass starts from a clean timer."""
+    del matcher.check_tertiary_stats_generic, matcher.check_pet_ilvl_stats
+    if matcher.prefilter:
+        del matcher.prefilter.filter, matcher.prefilter.filter_commodities
+    utils.auction_matching.resolve_post_midnight_ilvl_cached = (
+        resolve_post_midnight_ilvl_cached
+    )
+
+
+def max_rss_mb():
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on linux, bytes on mac
+    if platform.system() == "Darwin":
+        return round(max_rss / 1024 / 1024, 1)
+    return round(max_rss / 1024, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark auction matching.")
+    parser.add_argument(
+        "payloads", nargs="+", help="auction json files or folders of them"
+    )
+    parser.add_argument(
+        "--config-dir",
+        default="AzerothAuctionAssassinData",
+        help="folder with mega_data.json and the desired_*.json lists",
+    )
+    parser.add_argument("--region", help="overrides WOW_REGION from mega_data.json")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default="benchmark-matching-results.json")
+    args = parser.parse_args()
+
+    matcher = build_matcher(args.config_dir, args.region)
+    load_timer = StageTimer()
+    payloads = load_payloads(
+        find_payload_files(args.payloads), matcher.REGION, load_timer
+    )
+
+    runs = []
+    for _ in range(max(args.repeat, 1)):
+        timer = StageTimer()
+        instrument(matcher, timer)
+        start = time.perf_counter()
+        auction_count, alert_count, new_alert_count = run_pass(matcher, payloads, timer)
+        elapsed = time.perf_counter() - start
+        runs.append(
+            {
+                "seconds": round(elapsed, 4),
+                "auctions_per_sec": round(auction_count / elapsed) if elapsed else None,
+                "stages": {
+                    stage: {"seconds": round(seconds, 4), "calls": timer.calls[stage]}
+                    for stage, seconds in sorted(timer.seconds.items())
+                },
+            }
+        )
+        uninstrument(matcher)
+
+    # separate pass for memory, tracemalloc slows everything down too much to time with it
+    tracemalloc.start()
+    run_pass(matcher, payloads, StageTimer())
+    peak_bytes = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    best = min(runs, key=lambda run: run["seconds"])
+    results = {
+        "aaa_version": AAA_VERSION,
+        "python": platform.python_version(),
+        "region": matcher.REGION,
+        "payload_files": len(payloads),
+        "auctions": auction_count,
+        "alerts": alert_count,
+        "new_alerts": new_alert_count,
+        "vector_prefilter": matcher.prefilter is not None,
+        "use_post_midnight_ilvl": matcher.USE_POST_MIDNIGHT_ILVL,
+        "load_seconds": round(load_timer.seconds["load"], 4),
+        "best_auctions_per_sec": best["auctions_per_sec"],
+        "peak_match_memory_mb": round(peak_bytes / 1024 / 1024, 1),
+        "max_rss_mb": max_rss_mb(),
+        "runs": runs,
+    }
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    print(
+        f"{auction_count} auctions from {len(payloads)} files, {alert_count} alerts "
+        f"({new_alert_count} new)"
+    )
+    print(f"load: {results['load_seconds']}s")
+    for i, run in enumerate(runs, 1):
+        stages = ", ".join(
+            f"{stage} {info['seconds']}s" for stage, info in run["stages"].items()
+        )
+        print(f"run {i}: {run['auctions_per_sec']} auctions/sec ({stages})")
+    print(
+        f"peak matching memory: {results['peak_match_memory_mb']} MB, "
+        f"max rss: {results['max_rss_mb']} MB"
+    )
+    print(f"results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
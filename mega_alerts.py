@@ -1,44 +1,25 @@
 #!/usr/bin/python3
 from __future__ import print_function
-import time, json, random, os, sys
+import functools, time, json, random, os, sys
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor
 from utils.helpers import (
-    create_oribos_exchange_pet_link,
-    create_oribos_exchange_item_link,
     get_wow_russian_realm_ids,
     create_embed,
     split_list,
 )
-from utils.ilvl_resolver import resolve_post_midnight_ilvl
+from utils.ilvl_resolver import ilvl_resolution_cache
+from utils.auction_matching import AuctionMatcher, create_match_pool, match_in_pool
+from utils.auction_prefilter import vector_prefilter_available
+from utils.async_scan import async_engine_available, run_async_scan
+from utils.alert_store import AlertDedupStore
+from utils.realm_scheduler import RealmPollScheduler
+from utils.log_writer import StreamToFile, configure_logging, log_debug
 from PyQt5.QtCore import QThread, pyqtSignal
 import utils.mega_data_setup
 
-
-# Add at the beginning of the file, after imports
-class StreamToFile:
-    def __init__(self, filepath):
-        self.filepath = filepath
-        self.terminal_out = sys.stdout
-        self.terminal_err = sys.stderr
-        # Ensure log directory exists
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        # Clear previous log file
-        with open(self.filepath, "w", encoding="utf-8") as f:
-            f.write(f"=== Log started at {datetime.now()} ===\n")
-
-        # Redirect both stdout and stderr
-        sys.stdout = self
-        sys.stderr = self
-
-    def write(self, text):
-        self.terminal_out.write(text)
-        with open(self.filepath, "a", encoding="utf-8") as f:
-            f.write(text)
-
-    def flush(self):
-        self.terminal_out.flush()
-        self.terminal_err.flush()
+# price steps shown per commodity alert, discord embed fields max out at 1024 characters
+COMMODITY_LADDER_STEPS = 8
 
 
 class Alerts(QThread):
@@ -60,7 +41,8 @@ class Alerts(QThread):
         self.path_to_desired_pets = path_to_desired_pets
         self.path_to_desired_ilvl_items = path_to_desired_ilvl_items
         self.path_to_desired_ilvl_list = path_to_desired_ilvl_list
-        self.alert_record = []
+        # set up in run() once the mega_data config is loaded
+        self.alert_store = None
 
         # Setup logging
         log_path = os.path.join(os.getcwd(), "AzerothAuctionAssassinData", "logs")
@@ -75,51 +57,60 @@ class Alerts(QThread):
 
     def run(self):
         #### FUNCTIONS ####
-        def pull_single_realm_data(connected_id):
+        # mega_data is passed in so every WOW_REGIONS region runs the same code
+        def pull_single_realm_data(mega_data, connected_id):
             auctions = mega_data.get_listings_single(connected_id)
+            process_realm_data(mega_data, connected_id, auctions)
+
+        def process_realm_data(mega_data, connected_id, auctions):
             if auctions is None:
                 return  # skipped (Last-Modified unchanged), already logged
-            clean_auctions = clean_listing_data(auctions, connected_id)
+            if match_pool:
+                # only desired ids are pickled over to the matching processes
+                auctions = [a for a in auctions if mega_data.is_desired_auction(a)]
+                clean_auctions = match_in_pool(
+                    match_pool, auctions, connected_id, mega_data.REGION
+                )
+            else:
+                clean_auctions = matchers[mega_data.REGION].clean_listing_data(
+                    auctions, connected_id
+                )
             if connected_id in [-1, -2]:
-                check_token_price()
+                check_token_price(mega_data)
             if not clean_auctions or len(clean_auctions) == 0:
                 return
 
             russian_realms = get_wow_russian_realm_ids()
             # construct message
             suffix = (
-                " **(RU)**\n"
-                if clean_auctions[0]["realmID"] in russian_realms
-                else "\n"
+                " **(RU)**\n" if clean_auctions[0].realmID in russian_realms else "\n"
             )
             is_russian_realm = (
                 "**(Russian Realm)**"
-                if clean_auctions[0]["realmID"] in russian_realms
+                if clean_auctions[0].realmID in russian_realms
                 else ""
             )
 
-            # add details on each snipe to the message
-            embed_fields = []
+            # add details on each snipe to the message, grouped by the webhook it routes to
+            embed_fields = {}
             for auction in clean_auctions:
                 if not self.running:
                     break
 
-                if "itemID" in auction:
-                    id_msg = f"`itemID:` {auction['itemID']}\n"
-                    saddlebag_link_id = auction["itemID"]
-                    if "tertiary_stats" in auction:
-                        item_name = mega_data.DESIRED_ILVL_NAMES[auction["itemID"]]
+                if auction.itemID is not None:
+                    id_msg = f"`itemID:` {auction.itemID}\n"
+                    saddlebag_link_id = auction.itemID
+                    if auction.is_ilvl_alert:
+                        item_name = mega_data.DESIRED_ILVL_NAMES[auction.itemID]
                         # old method
                         # id_msg += f"`Name:` {item_name}\n"
-                        id_msg += f"`ilvl:` {auction['ilvl']}\n"
-                        if auction["tertiary_stats"]:
-                            id_msg += f"`tertiary_stats:` {auction['tertiary_stats']}\n"
-                        if auction.get("secondary_stats"):
-                            id_msg += (
-                                f"`secondary_stats:` {auction['secondary_stats']}\n"
-                            )
-                    elif auction["itemID"] in mega_data.ITEM_NAMES:
-                        item_name = mega_data.ITEM_NAMES[auction["itemID"]]
+                        id_msg += f"`ilvl:` {auction.ilvl}\n"
+                        if auction.tertiary_stats:
+                            id_msg += f"`tertiary_stats:` {auction.tertiary_stats}\n"
+                        if auction.secondary_stats:
+                            id_msg += f"`secondary_stats:` {auction.secondary_stats}\n"
+                    elif auction.itemID in mega_data.ITEM_NAMES:
+                        item_name = mega_data.ITEM_NAMES[auction.itemID]
                         # old method
                         # id_msg += f"`Name:` {item_name}\n"
                     else:
@@ -127,31 +118,28 @@ class Alerts(QThread):
                         # old method
                         # id_msg += f"`Name:` {item_name}\n"
                     embed_name = item_name
-                    if (
-                        "required_lvl" in auction
-                        and auction["required_lvl"] is not None
-                    ):
-                        id_msg += f"`required_lvl:` {auction['required_lvl']}\n"
-                    if "tertiary_stats" in auction:
-                        id_msg += f"`bonus_ids:` {list(auction['bonus_ids'])}\n"
-                        id_msg += f"`modifiers:` {auction.get('modifiers', [])}\n"
+                    if auction.required_lvl is not None:
+                        id_msg += f"`required_lvl:` {auction.required_lvl}\n"
+                    if auction.is_ilvl_alert:
+                        id_msg += f"`bonus_ids:` {list(auction.bonus_ids)}\n"
+                        id_msg += f"`modifiers:` {auction.modifiers or []}\n"
                 else:
-                    id_msg = f"`petID:` {auction['petID']}\n"
-                    saddlebag_link_id = auction["petID"]
-                    if auction["petID"] in mega_data.PET_NAMES:
-                        pet_name = mega_data.PET_NAMES[auction["petID"]]
+                    id_msg = f"`petID:` {auction.petID}\n"
+                    saddlebag_link_id = auction.petID
+                    if auction.petID in mega_data.PET_NAMES:
+                        pet_name = mega_data.PET_NAMES[auction.petID]
                         # old method
                         # id_msg += f"`Name:` {pet_name}\n"
                     else:
                         pet_name = "Unknown Pet"
                         # old method
                         # id_msg += f"`Name:` {pet_name}\n"
-                    if "pet_level" in auction:
-                        id_msg += f"`pet_level:` {auction['pet_level']}\n"
-                    if "quality" in auction:
-                        id_msg += f"`quality:` {auction['quality']}\n"
-                    if "breed" in auction:
-                        id_msg += f"`breed:` {auction['breed']}\n"
+                    if auction.pet_level is not None:
+                        id_msg += f"`pet_level:` {auction.pet_level}\n"
+                    if auction.quality is not None:
+                        id_msg += f"`quality:` {auction.quality}\n"
+                    if auction.breed is not None:
+                        id_msg += f"`breed:` {auction.breed}\n"
 
                     embed_name = pet_name
 
@@ -164,13 +152,13 @@ class Alerts(QThread):
                 # Add item links, if available
                 link_label = (
                     "Wowhead link"
-                    if mega_data.WOWHEAD_LINK and "itemID" in auction
+                    if mega_data.WOWHEAD_LINK and auction.itemID is not None
                     else "Undermine link"
                 )
                 link_url = (
-                    f"https://www.wowhead.com/item={auction['itemID']}"
-                    if mega_data.WOWHEAD_LINK and "itemID" in auction
-                    else auction["itemlink"]
+                    f"https://www.wowhead.com/item={auction.itemID}"
+                    if mega_data.WOWHEAD_LINK and auction.itemID is not None
+                    else auction.itemlink
                 )
                 if not mega_data.NO_LINKS:
                     message += f"[{link_label}]({link_url})\n"
@@ -178,41 +166,51 @@ class Alerts(QThread):
                     message += f"[Where to Sell](https://saddlebagexchange.com/wow/export-search?itemId={saddlebag_link_id})\n"
                 # Add price info, if available
                 price_type = (
-                    "bid_prices" if "bid_prices" in auction else "buyout_prices"
+                    "bid_prices" if auction.bid_prices is not None else "buyout_prices"
                 )
-                message += f"`{price_type}`: {auction[price_type]}\n"
+                if auction.price_ladder:
+                    # commodities: cheapest steps of the ladder instead of every price
+                    message += f"`quantity:` {auction.quantity}\n"
+                    message += "`price_ladder:`\n"
+                    for price, quantity, total in auction.price_ladder[
+                        :COMMODITY_LADDER_STEPS
+                    ]:
+                        message += f"{price}g x{quantity} ({total} total)\n"
+                    if len(auction.price_ladder) > COMMODITY_LADDER_STEPS:
+                        message += f"... {len(auction.price_ladder) - COMMODITY_LADDER_STEPS} more prices up to {auction.price_ladder[-1][0]}g\n"
+                else:
+                    message += f"`{price_type}`: {getattr(auction, price_type)}\n"
 
                 # send alerts
-                if auction not in self.alert_record:
+                if self.alert_store.add_if_new(auction):
                     # # old method one message per item
                     # mega_data.send_discord_message(message)
-                    embed_fields.append(
+                    embed_fields.setdefault(
+                        mega_data.get_alert_webhook(auction), []
+                    ).append(
                         {
                             "name": embed_name,
                             "value": message,
                             "inline": True,
                         }
                     )
-                    self.alert_record.append(auction)
                 else:
-                    print(f"Already sent this alert {auction}")
+                    log_debug(f"Already sent this alert {auction.as_alert_dict()}")
 
-            if len(embed_fields) != 0:
-                # new embed method one message per realm
+            for webhook_url, webhook_fields in embed_fields.items():
+                # new embed method one message per realm and webhook
                 desc = f"**region:** {mega_data.REGION}\n"
-                desc += (
-                    f"**realmID:** {clean_auctions[0]['realmID']} {is_russian_realm}\n"
-                )
-                desc += f"**realmNames:** {clean_auctions[0]['realmNames']}{suffix}"
+                desc += f"**realmID:** {clean_auctions[0].realmID} {is_russian_realm}\n"
+                desc += f"**realmNames:** {clean_auctions[0].realmNames}{suffix}"
 
-                # split it up so message is not too long
-                for chunk in split_list(embed_fields, 10):
-                    item_embed = create_embed(
-                        f"{mega_data.REGION} SNIPE FOUND!", desc, chunk
-                    )
-                    mega_data.send_discord_embed(item_embed)
+                # split it up so message is not too long, then packed up to 10 embeds per post
+                item_embeds = [
+                    create_embed(f"{mega_data.REGION} SNIPE FOUND!", desc, chunk)
+                    for chunk in split_list(webhook_fields, 10)
+                ]
+                mega_data.send_discord_embeds(item_embeds, webhook_url)
 
-        def check_token_price():
+        def check_token_price(mega_data):
             try:
                 # check if token price is below threshold durring commodity run
                 if mega_data.TOKEN_PRICE:
@@ -223,571 +221,12 @@ class Alerts(QThread):
                             f"**Token Price:** {token_price:,} gold\n**Threshold:** {mega_data.TOKEN_PRICE:,} gold\n**Region:** {mega_data.REGION}",
                             [],
                         )
-                        mega_data.send_discord_embed(token_embed)
+                        mega_data.send_discord_embed(
+                            token_embed, mega_data.get_route_webhook("token")
+                        )
             except Exception as e:
                 print(f"Error checking token price: {e}")
 
-        def clean_listing_data(auctions, connected_id):
-            all_ah_buyouts = {}
-            all_ah_bids = {}
-            pet_ah_buyouts = {}
-            pet_ah_bids = {}
-            ilvl_ah_buyouts = []
-            pet_ilvl_ah_buyouts = []
-
-            if len(auctions) == 0:
-                print(f"no listings found on {connected_id} of {mega_data.REGION}")
-                return
-
-            def add_price_to_dict(price, item_id, price_dict, is_pet=False):
-                if is_pet:
-                    if price < mega_data.DESIRED_PETS[item_id] * 10000:
-                        if item_id not in price_dict:
-                            price_dict[item_id] = [price / 10000]
-                        elif price / 10000 not in price_dict[item_id]:
-                            price_dict[item_id].append(price / 10000)
-                elif price < mega_data.DESIRED_ITEMS[item_id] * 10000:
-                    if item_id not in price_dict:
-                        price_dict[item_id] = [price / 10000]
-                    elif price / 10000 not in price_dict[item_id]:
-                        price_dict[item_id].append(price / 10000)
-
-            for item in auctions:
-                item_id = item["item"]["id"]
-
-                # regular items
-                if item_id in mega_data.DESIRED_ITEMS and item_id != 82800:
-                    price = 10000000 * 10000
-
-                    if "bid" in item and mega_data.SHOW_BIDPRICES == "true":
-                        price = item["bid"]
-                        add_price_to_dict(price, item_id, all_ah_bids)
-
-                    if "buyout" in item:
-                        price = item["buyout"]
-                        add_price_to_dict(price, item_id, all_ah_buyouts)
-
-                    if "unit_price" in item:
-                        price = item["unit_price"]
-                        add_price_to_dict(price, item_id, all_ah_buyouts)
-
-                # all caged battle pets have item id 82800
-                elif item_id == 82800:
-                    # desired pets
-                    if item["item"]["pet_species_id"] in mega_data.DESIRED_PETS:
-                        pet_id = item["item"]["pet_species_id"]
-                        price = 10000000 * 10000
-
-                        if "bid" in item and mega_data.SHOW_BIDPRICES == "true":
-                            price = item["bid"]
-                            add_price_to_dict(price, pet_id, pet_ah_bids, is_pet=True)
-
-                        if "buyout" in item:
-                            price = item["buyout"]
-                            add_price_to_dict(
-                                price, pet_id, pet_ah_buyouts, is_pet=True
-                            )
-
-                    # desired pet ilvl items
-                    if item["item"]["pet_species_id"] in [
-                        pet["petID"] for pet in mega_data.DESIRED_PET_ILVL_LIST
-                    ]:
-                        pet_ilvl_item_info = check_pet_ilvl_stats(
-                            item,
-                            mega_data.DESIRED_PET_ILVL_LIST,
-                        )
-                        if pet_ilvl_item_info:
-                            pet_ilvl_ah_buyouts.append(pet_ilvl_item_info)
-
-                # ilvl snipe items
-                if (
-                    mega_data.DESIRED_ILVL_ITEMS
-                    and item_id in mega_data.DESIRED_ILVL_ITEMS["item_ids"]
-                ):
-                    ilvl_item_info = check_tertiary_stats_generic(
-                        item,
-                        mega_data.socket_ids,
-                        mega_data.leech_ids,
-                        mega_data.avoidance_ids,
-                        mega_data.speed_ids,
-                        mega_data.ilvl_addition,
-                        mega_data.DESIRED_ILVL_ITEMS,
-                        mega_data.min_ilvl,
-                    )
-                    if ilvl_item_info:
-                        ilvl_ah_buyouts.append(ilvl_item_info)
-
-                for desired_ilvl_item in mega_data.DESIRED_ILVL_LIST:
-                    if item_id in desired_ilvl_item["item_ids"]:
-                        ilvl_item_info = check_tertiary_stats_generic(
-                            item,
-                            mega_data.socket_ids,
-                            mega_data.leech_ids,
-                            mega_data.avoidance_ids,
-                            mega_data.speed_ids,
-                            mega_data.ilvl_addition,
-                            desired_ilvl_item,
-                            desired_ilvl_item["ilvl"],
-                        )
-                        if ilvl_item_info:
-                            ilvl_ah_buyouts.append(ilvl_item_info)
-
-            if not (
-                all_ah_buyouts
-                or all_ah_bids
-                or pet_ah_buyouts
-                or pet_ah_bids
-                or ilvl_ah_buyouts
-                or pet_ilvl_ah_buyouts
-            ):
-                print(
-                    f"no listings found matching desires on {connected_id} of {mega_data.REGION}"
-                )
-                return
-            else:
-                print(f"Found matches on {connected_id} of {mega_data.REGION}!!!")
-                return format_alert_messages(
-                    all_ah_buyouts,
-                    all_ah_bids,
-                    connected_id,
-                    pet_ah_buyouts,
-                    pet_ah_bids,
-                    list(ilvl_ah_buyouts),
-                    pet_ilvl_ah_buyouts,
-                )
-
-        def check_tertiary_stats_generic(
-            auction,
-            socket_ids,
-            leech_ids,
-            avoidance_ids,
-            speed_ids,
-            ilvl_addition,
-            DESIRED_ILVL_ITEMS,
-            min_ilvl,
-        ):
-            if "bonus_lists" not in auction["item"]:
-                return False
-
-            def secondary_name_from_modifier_value(value):
-                mapping = {
-                    32: "crit",
-                    36: "haste",
-                    40: "versatility",
-                    49: "mastery",
-                }
-                return mapping.get(int(value)) if isinstance(value, int) else None
-
-            # Check for a modifier with type 9 and get its value (modifier 9 value equals required playerLevel)
-            required_lvl = None
-            for modifier in auction["item"].get("modifiers", []):
-                if modifier["type"] == 9:
-                    required_lvl = modifier["value"]
-                    break
-
-            # if no modifier["type"] == 9 found, use the base required level for report
-            if not required_lvl:
-                required_lvl = DESIRED_ILVL_ITEMS["base_required_levels"][
-                    auction["item"]["id"]
-                ]
-
-            item_bonus_ids = set(auction["item"]["bonus_lists"])
-            item_modifiers = auction["item"].get("modifiers", [])
-            secondary_stats = []
-            for modifier in item_modifiers:
-                if modifier.get("type") in (29, 30):
-                    name = secondary_name_from_modifier_value(modifier.get("value"))
-                    if name and name not in secondary_stats:
-                        secondary_stats.append(name)
-            # look for intersection of bonus_ids and any other lists
-            tertiary_stats = {
-                "sockets": len(item_bonus_ids & socket_ids) != 0,
-                "leech": len(item_bonus_ids & leech_ids) != 0,
-                "avoidance": len(item_bonus_ids & avoidance_ids) != 0,
-                "speed": len(item_bonus_ids & speed_ids) != 0,
-            }
-
-            desired_tertiary_stats = {
-                "sockets": DESIRED_ILVL_ITEMS["sockets"],
-                "leech": DESIRED_ILVL_ITEMS["leech"],
-                "avoidance": DESIRED_ILVL_ITEMS["avoidance"],
-                "speed": DESIRED_ILVL_ITEMS["speed"],
-            }
-            desired_secondary_stats = {
-                "crit": DESIRED_ILVL_ITEMS.get("crit", False),
-                "haste": DESIRED_ILVL_ITEMS.get("haste", False),
-                "mastery": DESIRED_ILVL_ITEMS.get("mastery", False),
-                "versatility": DESIRED_ILVL_ITEMS.get("versatility", False),
-            }
-
-            # if we're looking for sockets, leech, avoidance, or speed, skip if none of those are present
-            # Check if any of the desired stats are True
-            if any(desired_tertiary_stats):
-                # Check if all the desired stats are present in the tertiary_stats
-                for stat, desired in desired_tertiary_stats.items():
-                    if desired and not tertiary_stats.get(stat, False):
-                        return False
-            if any(desired_secondary_stats.values()):
-                present_secondary = set(secondary_stats)
-                for stat, desired in desired_secondary_stats.items():
-                    if desired and stat not in present_secondary:
-                        return False
-
-            # get ilvl: legacy (Saddlebag base + ilvl_addition) or post-midnight (resolver)
-            if mega_data.USE_POST_MIDNIGHT_ILVL:
-                ilvl = resolve_post_midnight_ilvl(
-                    auction["item"]["id"],
-                    auction["item"]["bonus_lists"],
-                    required_lvl,
-                    mega_data.bonuses_by_id,
-                    mega_data.equippable_items,
-                    mega_data.item_curves,
-                    mega_data.item_squish_era,
-                )
-                if ilvl is None:
-                    return False
-            else:
-                base_ilvl = DESIRED_ILVL_ITEMS["base_ilvls"][auction["item"]["id"]]
-                ilvl_add = [
-                    ilvl_addition[bonus_id]
-                    for bonus_id in item_bonus_ids
-                    if bonus_id in ilvl_addition.keys()
-                ]
-                if len(ilvl_add) > 0:
-                    ilvl = base_ilvl + sum(ilvl_add)
-                else:
-                    ilvl = base_ilvl
-
-            # skip if ilvl is too low
-            if ilvl < min_ilvl:
-                return False
-
-            # skip if ilvl is too high
-            if ilvl > DESIRED_ILVL_ITEMS["max_ilvl"]:
-                return False
-
-            # skip if required_lvl is too low
-            if required_lvl < DESIRED_ILVL_ITEMS["required_min_lvl"]:
-                return False
-
-            # skip if required_lvl is too high
-            if required_lvl > DESIRED_ILVL_ITEMS["required_max_lvl"]:
-                return False
-
-            # # skip if all DESIRED_ILVL_ITEMS["bonus_ids"] are not in item_bonus_ids
-            # if DESIRED_ILVL_ITEMS["bonus_lists"] != [] and not all(
-            #     bonus_id in item_bonus_ids
-            #     for bonus_id in DESIRED_ILVL_ITEMS["bonus_lists"]
-            # ):
-            #     return False
-
-            # skip no exact match
-            if (
-                DESIRED_ILVL_ITEMS["bonus_lists"] != []
-                and DESIRED_ILVL_ITEMS["bonus_lists"] != [-1]
-                and set(DESIRED_ILVL_ITEMS["bonus_lists"]) != set(item_bonus_ids)
-            ):
-                return False
-
-            # if the bonus_lists is -1, then we need to check if the item has more than 3 bonus IDs
-            # this is when someone wants an item at base stats with no level modifiers
-            if DESIRED_ILVL_ITEMS["bonus_lists"] == [-1]:
-                temp_bonus_ids = set(item_bonus_ids)
-                # Remove all tertiary stat bonus IDs
-                temp_bonus_ids -= socket_ids
-                temp_bonus_ids -= leech_ids
-                temp_bonus_ids -= avoidance_ids
-                temp_bonus_ids -= speed_ids
-                # If more than 3 bonus IDs remain, skip this item
-                if len(temp_bonus_ids) > 3:
-                    return False
-
-                # some rare ids dont work like this, so we skip them
-                bad_ids = [224637]
-                if auction["item"]["id"] in bad_ids:
-                    return False
-
-            modifier_values = DESIRED_ILVL_ITEMS.get("modifier_values", [])
-            if modifier_values:
-                required_modifier_values = set(modifier_values)
-                auction_modifier_values = set()
-                for modifier in item_modifiers:
-                    if "value" in modifier and isinstance(modifier["value"], int):
-                        auction_modifier_values.add(modifier["value"])
-                if required_modifier_values != auction_modifier_values:
-                    return False
-
-            modifier_objects = DESIRED_ILVL_ITEMS.get("modifier_objects", [])
-            if modifier_objects:
-                required_modifier_pairs = {
-                    (int(mod["type"]), int(mod["value"]))
-                    for mod in modifier_objects
-                    if isinstance(mod, dict)
-                    and isinstance(mod.get("type"), int)
-                    and isinstance(mod.get("value"), int)
-                }
-                auction_modifier_pairs = {
-                    (int(mod["type"]), int(mod["value"]))
-                    for mod in item_modifiers
-                    if isinstance(mod, dict)
-                    and isinstance(mod.get("type"), int)
-                    and isinstance(mod.get("value"), int)
-                }
-                if required_modifier_pairs != auction_modifier_pairs:
-                    return False
-
-            # if no buyout, use bid
-            if "buyout" not in auction and "bid" in auction:
-                auction["buyout"] = auction["bid"]
-
-            # if we get through everything and still haven't skipped, add to matching
-            buyout = round(auction["buyout"] / 10000, 2)
-            if buyout > DESIRED_ILVL_ITEMS["buyout"]:
-                return False
-            else:
-                print(
-                    f"[MATCH MODIFIERS] item={auction['item']['id']} bonus_ids={sorted(list(item_bonus_ids))} "
-                    f"modifiers={item_modifiers} secondary_final={secondary_stats}"
-                )
-                return {
-                    "item_id": auction["item"]["id"],
-                    "buyout": buyout,
-                    "tertiary_stats": tertiary_stats,
-                    "secondary_stats": secondary_stats,
-                    "modifiers": item_modifiers,
-                    "bonus_ids": item_bonus_ids,
-                    "ilvl": ilvl,
-                    "required_lvl": required_lvl,
-                }
-
-        def format_alert_messages(
-            all_ah_buyouts,
-            all_ah_bids,
-            connected_id,
-            pet_ah_buyouts,
-            pet_ah_bids,
-            ilvl_ah_buyouts,
-            pet_ilvl_ah_buyouts,
-        ):
-            results = []
-            realm_names = mega_data.get_realm_names(connected_id)
-            for itemID, auction in all_ah_buyouts.items():
-                # use instead of item name
-                itemlink = create_oribos_exchange_item_link(
-                    realm_names[0], itemID, mega_data.REGION
-                )
-                results.append(
-                    results_dict(
-                        auction,
-                        itemlink,
-                        connected_id,
-                        realm_names,
-                        itemID,
-                        "itemID",
-                        "buyout",
-                    )
-                )
-
-            for petID, auction in pet_ah_buyouts.items():
-                # use instead of item name
-                itemlink = create_oribos_exchange_pet_link(
-                    realm_names[0], petID, mega_data.REGION
-                )
-                results.append(
-                    results_dict(
-                        auction,
-                        itemlink,
-                        connected_id,
-                        realm_names,
-                        petID,
-                        "petID",
-                        "buyout",
-                    )
-                )
-
-            for auction in ilvl_ah_buyouts:
-                itemID = auction["item_id"]
-                # use instead of item name
-                itemlink = create_oribos_exchange_item_link(
-                    realm_names[0], itemID, mega_data.REGION
-                )
-                results.append(
-                    ilvl_results_dict(
-                        auction,
-                        itemlink,
-                        connected_id,
-                        realm_names,
-                        itemID,
-                        "itemID",
-                        "buyout",
-                    )
-                )
-
-            if mega_data.SHOW_BIDPRICES == "true":
-                for itemID, auction in all_ah_bids.items():
-                    # use instead of item name
-                    itemlink = create_oribos_exchange_item_link(
-                        realm_names[0], itemID, mega_data.REGION
-                    )
-                    results.append(
-                        results_dict(
-                            auction,
-                            itemlink,
-                            connected_id,
-                            realm_names,
-                            itemID,
-                            "itemID",
-                            "bid",
-                        )
-                    )
-
-                for petID, auction in pet_ah_bids.items():
-                    # use instead of item name
-                    itemlink = create_oribos_exchange_pet_link(
-                        realm_names[0], petID, mega_data.REGION
-                    )
-                    results.append(
-                        results_dict(
-                            auction,
-                            itemlink,
-                            connected_id,
-                            realm_names,
-                            petID,
-                            "petID",
-                            "bid",
-                        )
-                    )
-
-            # Add new section for pet level snipes
-            for auction in pet_ilvl_ah_buyouts:
-                petID = auction["pet_species_id"]
-                # use instead of item name
-                itemlink = create_oribos_exchange_pet_link(
-                    realm_names[0], petID, mega_data.REGION
-                )
-                results.append(
-                    pet_ilvl_results_dict(
-                        auction,
-                        itemlink,
-                        connected_id,
-                        realm_names,
-                        petID,
-                        "petID",
-                        "buyout",
-                    )
-                )
-
-            # end of the line alerts go out from here
-            return results
-
-        def results_dict(
-            auction, itemlink, connected_id, realm_names, id, idType, priceType
-        ):
-            auction.sort()
-            minPrice = auction[0]
-            return {
-                "region": mega_data.REGION,
-                "realmID": connected_id,
-                "realmNames": realm_names,
-                f"{idType}": id,
-                "itemlink": itemlink,
-                "minPrice": minPrice,
-                f"{priceType}_prices": json.dumps(auction),
-            }
-
-        def ilvl_results_dict(
-            auction, itemlink, connected_id, realm_names, id, idType, priceType
-        ):
-            tertiary_stats = [
-                stat for stat, present in auction["tertiary_stats"].items() if present
-            ]
-            return {
-                "region": mega_data.REGION,
-                "realmID": connected_id,
-                "realmNames": realm_names,
-                f"{idType}": id,
-                "itemlink": itemlink,
-                "minPrice": auction[priceType],
-                f"{priceType}_prices": auction[priceType],
-                "tertiary_stats": tertiary_stats,
-                "secondary_stats": auction.get("secondary_stats", []),
-                "modifiers": auction.get("modifiers", []),
-                "bonus_ids": auction["bonus_ids"],
-                "ilvl": auction["ilvl"],
-                "required_lvl": auction["required_lvl"],
-            }
-
-        def pet_ilvl_results_dict(
-            auction, itemlink, connected_id, realm_names, id, idType, priceType
-        ):
-            """Format pet level snipe results for alerts"""
-            return {
-                "region": mega_data.REGION,
-                "realmID": connected_id,
-                "realmNames": realm_names,
-                f"{idType}": id,
-                "itemlink": itemlink,
-                "minPrice": auction["buyout"],
-                f"{priceType}_prices": auction["buyout"],
-                "pet_level": auction["current_level"],
-                "quality": auction["quality"],
-                "breed": auction["breed"],
-            }
-
-        def check_pet_ilvl_stats(item, desired_pet_list):
-            """
-            Check if a pet auction meets the desired level and price criteria
-
-            Args:
-                item (dict): Auction house item data from Blizzard API
-                desired_pet_list (list): List of dictionaries containing desired pet criteria
-
-            Returns:
-                dict: Pet info if it matches criteria, None if it doesn't match
-            """
-            # Get the pet species ID from the item data
-            pet_species_id = item["item"]["pet_species_id"]
-
-            # Find matching desired pet entry
-            desired_pet = next(
-                (pet for pet in desired_pet_list if pet["petID"] == pet_species_id),
-                None,
-            )
-
-            if not desired_pet:
-                return None
-
-            # Check if pet meets level requirement
-            pet_level = item["item"].get("pet_level")
-            if pet_level is None or pet_level < desired_pet["minLevel"]:
-                return None
-
-                # Check if quality meets requirement
-            if item["item"]["pet_quality_id"] < desired_pet["minQuality"]:
-                return None
-
-            # Check if breed is excluded
-            # https://www.warcraftpets.com/wow-pet-battles/breeds/
-            # 4        14 are the best power
-            # 5 15 are the best speed
-            # 6 16 are the best health
-            if item["item"]["pet_breed_id"] in desired_pet["excludeBreeds"]:
-                return None
-
-            # Check if price meets requirement (buyout price should be less than desired price)
-            buyout = item.get("buyout")
-            if buyout is None or buyout / 10000 > desired_pet["price"]:
-                return None
-
-            # If we get here, the pet matches all criteria
-            return {
-                "pet_species_id": pet_species_id,
-                "current_level": item["item"]["pet_level"],
-                "buyout": item["buyout"] / 10000,
-                "quality": item["item"]["pet_quality_id"],
-                "breed": item["item"]["pet_breed_id"],
-            }
-
         #### MAIN ####
         def is_in_scan_window(
             current_min, last_upload_min, scan_time_min, scan_time_max
@@ -816,49 +255,74 @@ class Alerts(QThread):
                 # Wraparound range: e.g., 59 to 2 means [59, 0, 1, 2]
                 return current_min >= start_min or current_min <= end_min
 
+        def prune_alert_record():
+            # sent alerts expire after ALERT_TTL_MINUTES so they can go out again next hour
+            expired_alerts = self.alert_store.prune()
+            if expired_alerts:
+                print(
+                    f"\n\nExpired {expired_alerts} alerts from the alert record, {len(self.alert_store)} left\n\n"
+                )
+
+        def get_window_realms(mega_data, current_min):
+            matching_realms = [
+                realm["dataSetID"]
+                for realm in mega_data.get_upload_time_list()
+                if is_in_scan_window(
+                    current_min,
+                    realm["lastUploadMinute"],
+                    mega_data.SCAN_TIME_MIN,
+                    mega_data.SCAN_TIME_MAX,
+                )
+            ]
+            # mega wants extra alerts
+            if mega_data.EXTRA_ALERTS:
+                extra_alert_mins = json.loads(mega_data.EXTRA_ALERTS)
+                if current_min in extra_alert_mins:
+                    matching_realms = [
+                        realm["dataSetID"] for realm in mega_data.get_upload_time_list()
+                    ]
+            return matching_realms
+
+        def format_upload_time_minutes():
+            if len(region_data_sets) == 1:
+                return mega_data.format_upload_time_minutes()
+            return ", ".join(
+                f"{region_data.format_upload_time_minutes()} ({region_data.REGION})"
+                for region_data in region_data_sets
+            )
+
         def main():
             while self.running:
                 current_min = int(datetime.now().minute)
+                prune_alert_record()
 
-                # refresh alerts 1 time per hour
-                if current_min == 1 and mega_data.REFRESH_ALERTS:
-                    print(self.alert_record)
-                    print("\n\nClearing Alert Record\n\n")
-                    self.alert_record = []
-
-                matching_realms = [
-                    realm["dataSetID"]
-                    for realm in mega_data.get_upload_time_list()
-                    if is_in_scan_window(
-                        current_min,
-                        realm["lastUploadMinute"],
-                        mega_data.SCAN_TIME_MIN,
-                        mega_data.SCAN_TIME_MAX,
-                    )
+                region_scans = [
+                    (region_data, get_window_realms(region_data, current_min))
+                    for region_data in region_data_sets
                 ]
-                # mega wants extra alerts
-                if mega_data.EXTRA_ALERTS:
-                    extra_alert_mins = json.loads(mega_data.EXTRA_ALERTS)
-                    if current_min in extra_alert_mins:
-                        matching_realms = [
-                            realm["dataSetID"]
-                            for realm in mega_data.get_upload_time_list()
-                        ]
-
-                if matching_realms != []:
+                region_scans = [
+                    (region_data, matching_realms)
+                    for region_data, matching_realms in region_scans
+                    if matching_realms != []
+                ]
+
+                if region_scans != []:
                     self.progress.emit("Sending alerts!")
-                    pool = ThreadPoolExecutor(max_workers=mega_data.THREADS)
-                    for connected_id in matching_realms:
-                        pool.submit(pull_single_realm_data, connected_id)
-                    pool.shutdown(wait=True)
+                    scan_regions(region_scans)
+                    self.alert_store.save()
+                    # with MATCH_PROCESSES the cache hits happen in the worker processes
+                    if mega_data.USE_POST_MIDNIGHT_ILVL and not match_pool:
+                        print(f"ilvl resolver cache: {ilvl_resolution_cache.stats()}")
                     # Short sleep between cycles; skipping processing speeds things up but may lead to more 429s
                     time.sleep(5)
 
                 else:
                     self.progress.emit(
-                        f"The updates will come\non min {mega_data.format_upload_time_minutes()}\nof each hour."
+                        f"The updates will come\non min {format_upload_time_minutes()}\nof each hour."
                     )
-                    up_mins = mega_data.get_upload_time_minutes()
+                    up_mins = set()
+                    for region_data in region_data_sets:
+                        up_mins.update(region_data.get_upload_time_minutes())
                     wrap_note = ""
                     if 0 in up_mins:
                         wrap_note = (
@@ -867,7 +331,7 @@ class Alerts(QThread):
                         )
                     print(
                         "Blizzard API data only updates 1 time per hour. "
-                        f"The updates will come on minute {mega_data.format_upload_time_minutes()} of each hour. "
+                        f"The updates will come on minute {format_upload_time_minutes()} of each hour. "
                         f"{datetime.now()} is outside those upload minutes (local clock).{wrap_note}"
                     )
                     time.sleep(20)
@@ -875,17 +339,110 @@ class Alerts(QThread):
             self.progress.emit("Stopped alerts!")
             self.completed.emit(1)
 
+        def main_adaptive():
+            # realm ids are only unique within a region, each region gets its own poller
+            pollers = {}
+            # seed from the startup scan so each realm is first probed just before its predicted upload
+            now = time.time()
+            for region_data in region_data_sets:
+                poller = pollers[region_data.REGION] = RealmPollScheduler()
+                for realm_id, realm_time in region_data.upload_timers.items():
+                    poller.record_probe(realm_id, realm_time, now)
+
+            def seconds_until_next_probe():
+                now = time.time()
+                return min(
+                    poller.seconds_until_next_probe(now) for poller in pollers.values()
+                )
+
+            while self.running:
+                prune_alert_record()
+                region_scans = []
+                for region_data in region_data_sets:
+                    due_realms = pollers[region_data.REGION].due_realms(
+                        region_data.upload_timers, time.time()
+                    )
+                    # mega wants extra alerts
+                    if region_data.EXTRA_ALERTS:
+                        extra_alert_mins = json.loads(region_data.EXTRA_ALERTS)
+                        if int(datetime.now().minute) in extra_alert_mins:
+                            due_realms = list(region_data.upload_timers)
+                    if due_realms:
+                        region_scans.append((region_data, due_realms))
+
+                if region_scans:
+                    self.progress.emit("Sending alerts!")
+                    scan_regions(region_scans)
+                    self.alert_store.save()
+                    # with MATCH_PROCESSES the cache hits happen in the worker processes
+                    if mega_data.USE_POST_MIDNIGHT_ILVL and not match_pool:
+                        print(f"ilvl resolver cache: {ilvl_resolution_cache.stats()}")
+                    probe_time = time.time()
+                    new_uploads = sum(
+                        pollers[region_data.REGION].record_probe(
+                            realm_id,
+                            region_data.upload_timers.get(realm_id),
+                            probe_time,
+                        )
+                        for region_data, due_realms in region_scans
+                        for realm_id in due_realms
+                    )
+                    probed = sum(len(due_realms) for _, due_realms in region_scans)
+                    print(
+                        f"Adaptive poll: {new_uploads} of {probed} probed realms had new data, "
+                        f"next probe in {seconds_until_next_probe():.0f} sec"
+                    )
+                    # Short sleep between cycles, same as the window mode
+                    time.sleep(5)
+                else:
+                    wait = seconds_until_next_probe()
+                    self.progress.emit(f"Next realm check\nin {wait:.0f} sec")
+                    time.sleep(min(max(wait, 1), 20))
+
+            self.progress.emit("Stopped alerts!")
+            self.completed.emit(1)
+
         def main_single():
             # run everything once slow
-            for connected_id in set(mega_data.WOW_SERVER_NAMES.values()):
-                pull_single_realm_data(connected_id)
+            for region_data in region_data_sets:
+                for connected_id in set(region_data.WOW_SERVER_NAMES.values()):
+                    pull_single_realm_data(region_data, connected_id)
 
         def main_fast():
             self.progress.emit("Sending alerts!")
             # run everything once fast
+            scan_regions(
+                [
+                    (region_data, set(region_data.WOW_SERVER_NAMES.values()))
+                    for region_data in region_data_sets
+                ]
+            )
+            self.alert_store.save()
+
+        def scan_regions(region_scans):
+            """Scan (region_data, connected_ids) pairs, each region on its own thread."""
+            if len(region_scans) == 1:
+                scan_realms(*region_scans[0])
+                return
+            # the shared request scheduler keeps all regions together under blizzard's quota
+            with ThreadPoolExecutor(max_workers=len(region_scans)) as region_pool:
+                for region_data, connected_ids in region_scans:
+                    region_pool.submit(scan_realms, region_data, connected_ids)
+
+        def scan_realms(mega_data, connected_ids):
+            # realms that just uploaded get the first request slots
+            connected_ids = mega_data.order_realms_by_upload(connected_ids)
+            if mega_data.SCAN_ENGINE == "asyncio" and async_engine_available():
+                run_async_scan(
+                    mega_data,
+                    connected_ids,
+                    functools.partial(process_realm_data, mega_data),
+                    lambda: self.running,
+                )
+                return
             pool = ThreadPoolExecutor(max_workers=mega_data.THREADS)
-            for connected_id in set(mega_data.WOW_SERVER_NAMES.values()):
-                pool.submit(pull_single_realm_data, connected_id)
+            for connected_id in connected_ids:
+                pool.submit(pull_single_realm_data, mega_data, connected_id)
             pool.shutdown(wait=True)
 
         self.progress.emit("Setting data and\nconfig variables!")
@@ -911,50 +468,110 @@ class Alerts(QThread):
             self.completed.emit(1)
             return
 
-        # show details on run
-        print(
-            f"Blizzard API data only updates 1 time per hour.\n"
-            + f"The updates for region '{mega_data.REGION}' for '{mega_data.FACTION}' faction AH will come on minute {mega_data.format_upload_time_minutes()} of each hour.\n"
-            + f"{datetime.now()} may not be an upload minute (local clock). "
-            + "But we will run once to get the current data so no one asks me about the waiting time.\n"
-            + "After the first run we will trigger once per hour when the new data updates.\n"
-            + f"Running {mega_data.THREADS} concurrent api calls\n"
-            + f"checking for items {mega_data.DESIRED_ITEMS}\n"
-            + f"or pets {mega_data.DESIRED_PETS}\n"
-            + f"or ilvl items from list {mega_data.DESIRED_ILVL_LIST}\n"
-            + f"or pet ilvl items from list {mega_data.DESIRED_PET_ILVL_LIST}\n"
+        # the log was opened before mega_data.json was read, apply its LOG_* settings now
+        configure_logging(
+            mega_data.LOG_LEVEL,
+            mega_data.LOG_MAX_MB,
+            mega_data.LOG_BACKUPS,
+            mega_data.LOG_ROTATE_HOURS,
         )
 
-        # start app here
-        if mega_data.DEBUG:
-            mega_data.send_discord_message(
-                "DEBUG MODE: starting mega alerts to run once and then exit operations"
+        self.alert_store = AlertDedupStore(
+            ttl_seconds=(
+                mega_data.ALERT_TTL_MINUTES * 60 if mega_data.REFRESH_ALERTS else None
+            ),
+            persist_path=mega_data.ALERT_RECORD_FILE,
+        )
+
+        # extra WOW_REGIONS share the static data loaded above, only realms and tokens are per region
+        region_data_sets = [mega_data] + [
+            mega_data.for_region(region) for region in mega_data.WOW_REGIONS[1:]
+        ]
+
+        # matching tables are snapshotted once, worker processes get their copy at startup
+        matchers = {
+            region_data.REGION: AuctionMatcher.from_mega_data(region_data)
+            for region_data in region_data_sets
+        }
+        match_pool = None
+        if mega_data.MATCH_PROCESSES:
+            match_pool = create_match_pool(matchers, mega_data.MATCH_PROCESSES)
+
+        if mega_data.VECTOR_PREFILTER and not vector_prefilter_available():
+            print(
+                "VECTOR_PREFILTER needs the numpy package (pip install numpy), "
+                "matching every auction without the prefilter"
             )
-            # for debugging one realm at a time
-            main_single()
-        else:
-            mega_data.send_discord_message(
-                "🟢Starting mega alerts and scan all AH data instantly.🟢\n"
-                + "🟢These first few messages might be old.🟢\n"
-                + "🟢All future messages will release seconds after the new data is available.🟢"
+
+        if mega_data.SCAN_ENGINE == "asyncio" and not async_engine_available():
+            print(
+                "SCAN_ENGINE asyncio needs the aiohttp package (pip install aiohttp), "
+                "falling back to the threaded scan engine"
             )
-            time.sleep(1)
 
-            if not self.running:
-                self.progress.emit("Stopped alerts!")
-                self.completed.emit(1)
-                return
+        try:
+            # show details on run
+            print(
+                f"Blizzard API data only updates 1 time per hour.\n"
+                + f"The updates for region '{mega_data.REGION}' for '{mega_data.FACTION}' faction AH will come on minute {mega_data.format_upload_time_minutes()} of each hour.\n"
+                + (
+                    f"Also scanning regions {mega_data.WOW_REGIONS[1:]} from this process.\n"
+                    if len(region_data_sets) > 1
+                    else ""
+                )
+                + f"{datetime.now()} may not be an upload minute (local clock). "
+                + "But we will run once to get the current data so no one asks me about the waiting time.\n"
+                + "After the first run we will trigger once per hour when the new data updates.\n"
+                + f"Running {mega_data.THREADS} concurrent api calls with the {mega_data.SCAN_ENGINE} scan engine "
+                + f"and {mega_data.POLL_MODE} polling, matching on "
+                + (
+                    f"{mega_data.MATCH_PROCESSES} processes\n"
+                    if match_pool
+                    else "the scan threads\n"
+                )
+                + f"checking for items {mega_data.DESIRED_ITEMS}\n"
+                + f"or pets {mega_data.DESIRED_PETS}\n"
+                + f"or ilvl items from list {mega_data.DESIRED_ILVL_LIST}\n"
+                + f"or pet ilvl items from list {mega_data.DESIRED_PET_ILVL_LIST}\n"
+            )
 
-            # im sick of idiots asking me about the waiting time just run once on startup
-            main_fast()
+            # start app here
+            if mega_data.DEBUG:
+                mega_data.send_discord_message(
+                    "DEBUG MODE: starting mega alerts to run once and then exit operations"
+                )
+                # for debugging one realm at a time
+                main_single()
+            else:
+                mega_data.send_discord_message(
+                    "🟢Starting mega alerts and scan all AH data instantly.🟢\n"
+                    + "🟢These first few messages might be old.🟢\n"
+                    + "🟢All future messages will release seconds after the new data is available.🟢"
+                )
+                time.sleep(1)
 
-            if not self.running:
-                self.progress.emit("Stopped alerts!")
-                self.completed.emit(1)
-                return
+                if not self.running:
+                    self.progress.emit("Stopped alerts!")
+                    self.completed.emit(1)
+                    return
+
+                # im sick of idiots asking me about the waiting time just run once on startup
+                main_fast()
 
-            # then run the main loop
-            main()
+                if not self.running:
+                    self.progress.emit("Stopped alerts!")
+                    self.completed.emit(1)
+                    return
+
+                # then run the main loop
+                if mega_data.POLL_MODE == "adaptive":
+                    main_adaptive()
+                else:
+                    main()
+        finally:
+            if match_pool:
+                match_pool.shutdown(wait=True)
+            mega_data.stop_discord_queue()
 
 
 if __name__ == "__main__":
@@ -1,5 +1,6 @@
 #!/usr/bin/python3
 import json, requests
+import utils.static_data_cache
 from utils.api_requests import (
     WOW_DISCORD_CONSENT,
     get_itemnames,
@@ -12,6 +13,9 @@ from utils.api_requests import (
     saddlebag_request_headers,
 )
 
+# always download fresh copies when regenerating StaticData/
+utils.static_data_cache.USE_STATIC_CACHE = False
+
 # get the upload timers
 upload_timers = requests.post(
     "https://api.saddlebagexchange.com/api/wow/uploadtimers",
@@ -0,0 +1,77 @@
+"""
+Compact records for matched auctions.
+
+Matching used to build a dict per match and another dict per alert. These
+NamedTuples keep one tuple per match instead (cheaper to hold and to pickle
+back from MATCH_PROCESSES workers), and AuctionAlert.as_alert_dict() gives the
+old dict shape only where something still needs it.
+"""
+
+from typing import NamedTuple, Optional
+
+
+class IlvlMatch(NamedTuple):
+    """An auction that passed check_tertiary_stats_generic."""
+
+    item_id: int
+    buyout: float
+    tertiary_stats: dict
+    secondary_stats: list
+    modifiers: list
+    bonus_ids: set
+    ilvl: int
+    required_lvl: Optional[int]
+    # webhook of the desired_ilvl_list rule that matched, if it has one
+    webhook: Optional[str] = None
+
+
+class PetLevelMatch(NamedTuple):
+    """A caged pet that passed check_pet_ilvl_stats."""
+
+    pet_species_id: int
+    current_level: int
+    buyout: float
+    quality: int
+    breed: int
+    # webhook of the desired_pet_ilvl_list rule that matched, if it has one
+    webhook: Optional[str] = None
+
+
+class AuctionAlert(NamedTuple):
+    """One alert line, fields that do not apply to the alert type stay None."""
+
+    region: str
+    realmID: int
+    realmNames: list
+    itemlink: str
+    minPrice: float
+    itemID: Optional[int] = None
+    petID: Optional[int] = None
+    buyout_prices: object = None
+    bid_prices: object = None
+    # ilvl alerts
+    tertiary_stats: Optional[list] = None
+    secondary_stats: Optional[list] = None
+    modifiers: Optional[list] = None
+    bonus_ids: Optional[set] = None
+    ilvl: Optional[int] = None
+    required_lvl: Optional[int] = None
+    # pet level alerts
+    pet_level: Optional[int] = None
+    quality: Optional[int] = None
+    breed: Optional[int] = None
+    # commodity alerts
+    quantity: Optional[int] = None
+    price_ladder: Optional[list] = None
+    # per rule discord webhook, routes the alert ahead of WEBHOOK_ROUTES
+    webhook: Optional[str] = None
+
+    @property
+    def is_ilvl_alert(self):
+        return self.tertiary_stats is not None
+
+    def as_alert_dict(self):
+        """The dict the matcher used to return, only the fields that are set."""
+        return {
+            field: value for field, value in self._asdict().items() if value is not None
+        }
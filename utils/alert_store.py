@@ -0,0 +1,130 @@
+"""
+Alert de-duplication store.
+
+Replaces the Alerts.alert_record list. Alerts are keyed on a fingerprint of the
+realm, id, prices and ilvl / pet signature so checking one is a hash lookup,
+entries expire after a TTL instead of the whole record being cleared at minute 1,
+and the store can be saved to disk so a restart does not resend old alerts.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+# everything that makes two alerts "the same snipe"
+FINGERPRINT_FIELDS = (
+    "region",
+    "realmID",
+    "itemID",
+    "petID",
+    "buyout_prices",
+    "bid_prices",
+    "ilvl",
+    "required_lvl",
+    "bonus_ids",
+    "modifiers",
+    "tertiary_stats",
+    "secondary_stats",
+    "pet_level",
+    "quality",
+    "breed",
+    # an alert routed to two channels is sent once to each
+    "webhook",
+)
+
+
+def alert_fingerprint(alert):
+    # AuctionAlert records hash the same as the alert dicts they replaced
+    if hasattr(alert, "as_alert_dict"):
+        alert = alert.as_alert_dict()
+    signature = [
+        [field, alert[field]] for field in FINGERPRINT_FIELDS if field in alert
+    ]
+    # sets (bonus_ids) are sorted so the same bonus ids always hash the same
+    raw = json.dumps(signature, sort_keys=True, default=sorted)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class AlertDedupStore:
+    """Thread safe record of sent alerts, ttl_seconds=None keeps them forever."""
+
+    def __init__(self, ttl_seconds=None, persist_path=None):
+        self.ttl_seconds = ttl_seconds
+        self.persist_path = persist_path
+        # fingerprint -> unix expiry time, None never expires
+        self._expires = {}
+        self._lock = threading.Lock()
+        if persist_path:
+            self.load()
+
+    def __len__(self):
+        return len(self._expires)
+
+    def add_if_new(self, alert):
+        """Record the alert and return True, or False if it was already sent and has not expired."""
+        fingerprint = alert_fingerprint(alert)
+        now = time.time()
+        with self._lock:
+            if fingerprint in self._expires:
+                expires = self._expires[fingerprint]
+                if expires is None or expires > now:
+                    return False
+            self._expires[fingerprint] = (
+                now + self.ttl_seconds if self.ttl_seconds else None
+            )
+            return True
+
+    def prune(self):
+        """Drop expired alerts, returns how many were removed."""
+        now = time.time()
+        with self._lock:
+            expired = [
+                fingerprint
+                for fingerprint, expires in self._expires.items()
+                if expires is not None and expires <= now
+            ]
+            for fingerprint in expired:
+                del self._expires[fingerprint]
+        return len(expired)
+
+    def load(self):
+        if not os.path.exists(self.persist_path):
+            return
+        try:
+            with open(self.persist_path, encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError) as ex:
+            print(f"Could not load alert record from {self.persist_path}: {ex}")
+            return
+        # valid json but not a record this store wrote, start empty like a corrupt file
+        if not isinstance(saved, dict):
+            print(
+                f"Could not load alert record from {self.persist_path}: expected a json object, got {type(saved).__name__}"
+            )
+            return
+        saved = {
+            fingerprint: expires
+            for fingerprint, expires in saved.items()
+            if expires is None
+            or (isinstance(expires, (int, float)) and not isinstance(expires, bool))
+        }
+        with self._lock:
+            self._expires.update(saved)
+        print(f"Loaded {len(saved)} sent alerts from {self.persist_path}")
+        self.prune()
+
+    def save(self):
+        if not self.persist_path:
+            return
+        with self._lock:
+            snapshot = dict(self._expires)
+        # write then rename so a crash never leaves a half written record
+        tmp_path = f"{self.persist_path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, self.persist_path)
+        except OSError as ex:
+            print(f"Could not save alert record to {self.persist_path}: {ex}")
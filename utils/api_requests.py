@@ -1,34 +1,48 @@
 import requests
+from requests.adapters import HTTPAdapter
 from tenacity import retry, stop_after_attempt
-from utils.helpers import get_wow_russian_realm_ids
+from utils.helpers import get_wow_russian_realm_ids, pack_embeds
 from utils.version import AAA_VERSION
+from utils.static_data_cache import fetch_static_json
 
 
 ## DISCORD API CALLS ##
 def send_embed_discord(embed, webhook_url):
+    """Send one embed to a Discord webhook, split into several messages if it is too big.
+    Returns:
+        - bool: True if every message was sent successfully; False otherwise."""
+    return send_embeds_discord([embed], webhook_url)
+
+
+def send_embeds_discord(embeds, webhook_url):
     # Send message
-    """Send an embed message to a specified Discord webhook URL.
+    """Send embeds to a specified Discord webhook URL in as few messages as possible.
     Parameters:
-        - embed (dict): A dictionary representing the embed content to be sent.
-        - webhook_url (str): The Discord webhook URL to which the embed will be sent.
+        - embeds (list): Embed dicts to send, in order.
+        - webhook_url (str): The Discord webhook URL to which the embeds will be sent.
     Returns:
-        - bool: True if the embed is sent successfully; False otherwise.
+        - bool: True if every message is sent successfully; False otherwise.
     Processing Logic:
-        - Checks the HTTP response status to determine success.
-        - Raises an exception for non-2xx status codes.
-        - Catches exceptions related to request errors."""
-    try:
-        print(f"sending embed to discord...")
-        req = requests.post(webhook_url, json={"embeds": [embed]})
-        if req.status_code != 204 and req.status_code != 200:
-            print(f"Failed to send embed to discord: {req.status_code} - {req.text}")
-            req.raise_for_status()  # Raise an exception for non-2xx status codes
-        else:
-            print(f"Embed sent successfully")
-        return True  # Message sent successfully
-    except requests.exceptions.RequestException as ex:
-        print("Error sending Discord message: %s", ex)
-        return False  # Failed to send the message
+        - pack_embeds groups up to 10 embeds per message within Discord's 6000 character limit.
+        - Embeds over the limit on their own are split by fields into extra embeds.
+        - Checks the HTTP response status of each message, a failed message does not stop the rest.
+    """
+    all_sent = True
+    for message_embeds in pack_embeds(embeds):
+        try:
+            print(f"sending {len(message_embeds)} embeds to discord...")
+            req = requests.post(webhook_url, json={"embeds": message_embeds})
+            if req.status_code != 204 and req.status_code != 200:
+                print(
+                    f"Failed to send embed to discord: {req.status_code} - {req.text}"
+                )
+                req.raise_for_status()  # Raise an exception for non-2xx status codes
+            else:
+                print(f"Embed sent successfully")
+        except requests.exceptions.RequestException as ex:
+            print("Error sending Discord message: %s", ex)
+            all_sent = False  # Failed to send the message
+    return all_sent
 
 
 @retry(stop=stop_after_attempt(3))
@@ -55,6 +69,31 @@ def send_discord_message(message, webhook_url):
 
 
 ## BLIZZARD API CALLS ##
+# us/eu api hosts plus oauth.battle.net, with room to spare
+BLIZZARD_POOL_HOSTS = 4
+
+
+def create_blizzard_session(pool_size):
+    """Create a shared keep-alive session for all Blizzard API calls.
+    Parameters:
+        - pool_size (int): Max open connections per host, normally MEGA_THREADS.
+    Returns:
+        - requests.Session: Session with a connection pool mounted for https.
+    Processing Logic:
+        - One pool per host (us/eu api, oauth) so TCP+TLS handshakes are reused across realm pulls.
+        - pool_block caps connections per host at pool_size instead of opening throwaway ones.
+        - urllib3 pools are thread safe so the session can be shared by all scan workers.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=BLIZZARD_POOL_HOSTS,
+        pool_maxsize=max(int(pool_size), 1),
+        pool_block=True,
+    )
+    session.mount("https://", adapter)
+    return session
+
+
 @retry(stop=stop_after_attempt(3))
 def get_wow_access_token(client_id, client_secret):
     access_token = requests.post(
@@ -65,10 +104,11 @@ def get_wow_access_token(client_id, client_secret):
     return access_token
 
 
-def get_petnames(access_token):
+def get_petnames(access_token, session=None):
     """Get a dictionary of pet IDs and names from the World of Warcraft API.
     Parameters:
         - access_token (str): An OAuth access token used for authentication in the API request.
+        - session (requests.Session, optional): Shared Blizzard session, falls back to plain requests.
     Returns:
         - dict: A dictionary where keys are pet IDs (int) and values are pet names (str).
     Processing Logic:
@@ -76,7 +116,8 @@ def get_petnames(access_token):
         - Parses the JSON response to extract a list of pets.
         - Constructs and returns a dictionary mapping each pet's ID to its name."""
     headers = {"Authorization": f"Bearer {access_token}"}
-    pet_info = requests.get(
+    http = session if session is not None else requests
+    pet_info = http.get(
         f"https://us.api.blizzard.com/data/wow/pet/index?namespace=static-us&locale=en_US",
         headers=headers,
     ).json()["pets"]
@@ -148,19 +189,18 @@ def get_itemnames():
     Returns:
         - list: A list of item names retrieved from the API or GitHub backup.
     Processing Logic:
-        - Sends a POST request to a specified API endpoint to fetch item names.
-        - If the request fails, it prints an error message and retrieves item names from a GitHub backup.
+        - Serves the on-disk cache when fresh, otherwise sends a conditional POST to the Saddlebag API.
+        - If the request fails, falls back to the cache, a GitHub backup, then StaticData/.
         - Returns the item names as a JSON object."""
-    try:
-        item_names = requests.post(
-            f"{SADDLEBAG_URL}/api/wow/itemnames",
-            json={"discord_consent": WOW_DISCORD_CONSENT, "return_all": True},
-            headers=saddlebag_request_headers(),
-            timeout=10,
-        ).json()
-    except Exception as e:
-        print(f"Failed to get item names getting backup from github: {e}")
-        item_names = requests.get(f"{RAW_GITHUB_BACKUP_PATH}/item_names.json").json()
+    item_names = fetch_static_json(
+        "item_names",
+        f"{SADDLEBAG_URL}/api/wow/itemnames",
+        method="POST",
+        json_body={"discord_consent": WOW_DISCORD_CONSENT, "return_all": True},
+        headers=saddlebag_request_headers(),
+        backup_url=f"{RAW_GITHUB_BACKUP_PATH}/item_names.json",
+        local_file="item_names.json",
+    )
     return item_names
 
 
@@ -169,19 +209,18 @@ def get_pet_names_backup():
     Returns:
         - dict: A dictionary mapping pet IDs to their names.
     Processing Logic:
-        - Attempts to retrieve pet names from the primary API endpoint.
-        - If the API request fails, fetches pet names from a GitHub backup source.
+        - Serves the on-disk cache when fresh, otherwise retrieves pet names from the primary API endpoint.
+        - If the API request fails, falls back to the cache, a GitHub backup, then StaticData/.
         - Converts the keys of the resulting dictionary to integers."""
-    try:
-        pet_info = requests.post(
-            f"{SADDLEBAG_URL}/api/wow/itemnames",
-            json={"discord_consent": WOW_DISCORD_CONSENT, "pets": True},
-            headers=saddlebag_request_headers(),
-            timeout=10,
-        ).json()
-    except Exception as e:
-        print(f"Failed to get pet names getting backup from github: {e}")
-        pet_info = requests.get(f"{RAW_GITHUB_BACKUP_PATH}/pet_names.json").json()
+    pet_info = fetch_static_json(
+        "pet_names",
+        f"{SADDLEBAG_URL}/api/wow/itemnames",
+        method="POST",
+        json_body={"discord_consent": WOW_DISCORD_CONSENT, "pets": True},
+        headers=saddlebag_request_headers(),
+        backup_url=f"{RAW_GITHUB_BACKUP_PATH}/pet_names.json",
+        local_file="pet_names.json",
+    )
     pet_info = {int(k): v for k, v in pet_info.items()}
     return pet_info
 
@@ -194,17 +233,16 @@ def get_raidbots_bonus_ids():
     Returns:
         - dict: A dictionary of bonus IDs keyed by the ID converted to an integer, with corresponding data as values.
     Processing Logic:
-        - Initial data is fetched from Raidbots API; if it fails, data is fetched from a GitHub backup.
-        - Exceptions are caught and logged to indicate the fallback to the backup source.
+        - Served from the on-disk cache when fresh, otherwise revalidated against Raidbots (ETag / Last-Modified).
+        - If Raidbots fails, falls back to the cache, a GitHub backup, then StaticData/.
         - The function ensures that keys in the returned dictionary are integers."""
-    try:
-        # thanks so much to Seriallos (Raidbots) and BinaryHabitat (GoblinStockAlerts) for organizing this data!
-        bonus_ids = requests.get(f"{RAIDBOTS_BASE}/bonuses.json", timeout=10).json()
-    except Exception as e:
-        print(f"Failed to get raidbots bonus ids getting backup from github: {e}")
-        bonus_ids = requests.get(
-            f"{RAW_GITHUB_BACKUP_PATH}/bonuses.json", timeout=10
-        ).json()
+    # thanks so much to Seriallos (Raidbots) and BinaryHabitat (GoblinStockAlerts) for organizing this data!
+    bonus_ids = fetch_static_json(
+        "bonuses",
+        f"{RAIDBOTS_BASE}/bonuses.json",
+        backup_url=f"{RAW_GITHUB_BACKUP_PATH}/bonuses.json",
+        local_file="bonuses.json",
+    )
     return {int(id): data for id, data in bonus_ids.items()}
 
 
@@ -224,50 +262,44 @@ def _normalize_equippable_items(data):
 def get_raidbots_equippable_items():
     """Fetch equippable items (DBC base item level) from Raidbots for post-midnight ilvl resolver."""
     try:
-        data = requests.get(f"{RAIDBOTS_BASE}/equippable-items.json", timeout=10).json()
+        data = fetch_static_json(
+            "equippable-items",
+            f"{RAIDBOTS_BASE}/equippable-items.json",
+            backup_url=f"{RAW_GITHUB_BACKUP_PATH}/equippable-items.json",
+            local_file="equippable-items.json",
+        )
         return _normalize_equippable_items(data)
     except Exception as e:
-        print(f"Failed to get raidbots equippable-items: {e}")
-        try:
-            raw = requests.get(
-                f"{RAW_GITHUB_BACKUP_PATH}/equippable-items.json", timeout=10
-            ).json()
-            return _normalize_equippable_items(raw)
-        except Exception as e2:
-            print(f"Fallback equippable-items not found: {e2}")
-            return {}
+        print(f"Fallback equippable-items not found: {e}")
+        return {}
 
 
 def get_raidbots_item_curves():
     """Fetch item curves from Raidbots for post-midnight ilvl resolver."""
     try:
-        data = requests.get(f"{RAIDBOTS_BASE}/item-curves.json", timeout=10).json()
-        return data
+        return fetch_static_json(
+            "item-curves",
+            f"{RAIDBOTS_BASE}/item-curves.json",
+            backup_url=f"{RAW_GITHUB_BACKUP_PATH}/item-curves.json",
+            local_file="item-curves.json",
+        )
     except Exception as e:
-        print(f"Failed to get raidbots item-curves: {e}")
-        try:
-            return requests.get(
-                f"{RAW_GITHUB_BACKUP_PATH}/item-curves.json", timeout=10
-            ).json()
-        except Exception as e2:
-            print(f"Fallback item-curves not found: {e2}")
-            return {}
+        print(f"Fallback item-curves not found: {e}")
+        return {}
 
 
 def get_raidbots_item_squish_era():
     """Fetch item squish era list from Raidbots for post-midnight ilvl resolver."""
     try:
-        data = requests.get(f"{RAIDBOTS_BASE}/item-squish-era.json", timeout=10).json()
-        return data
+        return fetch_static_json(
+            "item-squish-era",
+            f"{RAIDBOTS_BASE}/item-squish-era.json",
+            backup_url=f"{RAW_GITHUB_BACKUP_PATH}/item-squish-era.json",
+            local_file="item-squish-era.json",
+        )
     except Exception as e:
-        print(f"Failed to get raidbots item-squish-era: {e}")
-        try:
-            return requests.get(
-                f"{RAW_GITHUB_BACKUP_PATH}/item-squish-era.json", timeout=10
-            ).json()
-        except Exception as e2:
-            print(f"Fallback item-squish-era not found: {e2}")
-            return {}
+        print(f"Fallback item-squish-era not found: {e}")
+        return {}
 
 
 def get_ilvl_items(ilvl=196, item_ids=[]):
@@ -283,34 +315,33 @@ def get_ilvl_items(ilvl=196, item_ids=[]):
             - dict: Base required levels keyed by item ID.
     Processing Logic:
         - If item_ids is not provided or is empty, resets ilvl to 196.
-        - Fetches item data from the Saddlebag URL, using a backup source if the request fails.
+        - Fetches item data from the Saddlebag URL (cached on disk per request body), using a backup source if the request fails.
         - Filters results specifically for item IDs if given."""
-    try:
-        # if no item_ids are given, get all items at or above the given ilvl
-        # this gets weird when someone wants a high ilvl item as we have the base ilvl in the DB
-        # but not the max ilvl, so we just set it to 196
-        if item_ids is None:
-            item_ids = []
-        if not item_ids:
-            ilvl = 196
-        json_data = {
-            "discord_consent": WOW_DISCORD_CONSENT,
-            "ilvl": ilvl,
-            "itemQuality": -1,
-            "required_level": -1,
-            "item_class": [2, 4],
-            "item_subclass": [-1],
-            "item_ids": item_ids,
-        }
-        results = requests.post(
-            f"{SADDLEBAG_URL}/api/wow/itemdata",
-            json=json_data,
-            timeout=10,
-            headers=saddlebag_request_headers(),
-        ).json()
-    except Exception as e:
-        print(f"Failed to get ilvl items getting backup from github: {e}")
-        results = requests.get(f"{RAW_GITHUB_BACKUP_PATH}/ilvl_items.json").json()
+    # if no item_ids are given, get all items at or above the given ilvl
+    # this gets weird when someone wants a high ilvl item as we have the base ilvl in the DB
+    # but not the max ilvl, so we just set it to 196
+    if item_ids is None:
+        item_ids = []
+    if not item_ids:
+        ilvl = 196
+    json_data = {
+        "discord_consent": WOW_DISCORD_CONSENT,
+        "ilvl": ilvl,
+        "itemQuality": -1,
+        "required_level": -1,
+        "item_class": [2, 4],
+        "item_subclass": [-1],
+        "item_ids": item_ids,
+    }
+    results = fetch_static_json(
+        "ilvl_items",
+        f"{SADDLEBAG_URL}/api/wow/itemdata",
+        method="POST",
+        json_body=json_data,
+        headers=saddlebag_request_headers(),
+        backup_url=f"{RAW_GITHUB_BACKUP_PATH}/ilvl_items.json",
+        local_file="ilvl_items.json",
+    )
     # if len(results) == 0:
     #     raise Exception(
     #         f"No items found at or above a base ilvl of {ilvl}, contact us on discord"
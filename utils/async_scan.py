@@ -0,0 +1,189 @@
+"""
+Asyncio scan engine.
+
+Opt-in alternative to the ThreadPoolExecutor fan-out in mega_alerts.py, enabled
+with "SCAN_ENGINE": "asyncio" in mega_data.json. All matching connected realms are
+fetched concurrently on one event loop (bounded by MEGA_THREADS) and each payload
+is handed to the regular matching stage as soon as it arrives.
+
+Needs the optional aiohttp package, the threaded engine is used when it is missing.
+"""
+
+import asyncio, json
+from concurrent.futures import ThreadPoolExecutor
+from utils.auction_stream import AuctionStreamFilter, STREAM_CHUNK_SIZE
+from utils.log_writer import log_info
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+# same budget as the threaded path: 10 tries per request (its tenacity stop_after_attempt),
+# 20 sec connect / read timeout
+ASYNC_MAX_ATTEMPTS = 10
+ASYNC_REQUEST_TIMEOUT = 20
+
+
+def async_engine_available():
+    return aiohttp is not None
+
+
+async def head_shows_unchanged(mega_data, http, url, connected_id, headers):
+    """Async twin of MegaData.head_shows_unchanged."""
+    if (
+        mega_data.FRESHNESS_PROBE != "head"
+        or connected_id not in mega_data.upload_timers
+    ):
+        return False
+    delay = mega_data.request_scheduler.reserve()
+    if delay > 0:
+        await asyncio.sleep(delay)
+    try:
+        async with http.head(url, headers=headers) as resp:
+            if resp.status != 200:
+                return False
+            last_upload_time_raw = resp.headers.get("Last-Modified")
+    except (aiohttp.ClientError, asyncio.TimeoutError) as ex:
+        print(f"HEAD probe failed on {mega_data.get_data_set_name(connected_id)}: {ex}")
+        return False
+    if not mega_data.is_known_upload(connected_id, last_upload_time_raw):
+        return False
+    log_info(
+        f"Skip {mega_data.get_data_set_name(connected_id)}: data has not updated yet (HEAD Last-Modified unchanged: {last_upload_time_raw})"
+    )
+    return True
+
+
+async def fetch_ah_json(mega_data, http, url, connected_id):
+    """Fetch one AH endpoint, returns the auction json or {"auctions": [], "skipped": True}."""
+    for attempt in range(ASYNC_MAX_ATTEMPTS):
+        # refreshed before the loop started, see scan_realms_async
+        headers = {"Authorization": f"Bearer {mega_data.access_token}"}
+        if await head_shows_unchanged(mega_data, http, url, connected_id, headers):
+            return {"auctions": [], "skipped": True}
+        headers.update(mega_data.get_freshness_headers(connected_id))
+        delay = mega_data.request_scheduler.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        try:
+            async with http.get(url, headers=headers) as resp:
+                if resp.status == 304:
+                    mega_data.report_not_modified(connected_id)
+                    return {"auctions": [], "skipped": True}
+                if resp.status == 429:
+                    # the next reserve() waits out the shared pause
+                    pause = mega_data.request_scheduler.on_rate_limited(
+                        resp.headers.get("Retry-After")
+                    )
+                    print(
+                        f"{resp.status} BLIZZARD too many requests error on {mega_data.REGION} {str(connected_id)} realm data, pausing requests for {pause:.1f} sec"
+                    )
+                    continue
+                elif resp.status != 200:
+                    print(
+                        f"{resp.status} BLIZZARD error getting {mega_data.REGION} {str(connected_id)} realm data"
+                    )
+                    await asyncio.sleep(1)
+                    continue
+                mega_data.request_scheduler.on_success()
+
+                if mega_data.is_upload_unchanged(connected_id, resp.headers):
+                    return {"auctions": [], "skipped": True}
+                # decoding multi MB payloads on the loop would stall every other download
+                loop = asyncio.get_running_loop()
+                if not mega_data.STREAM_AUCTIONS:
+                    body = await resp.read()
+                    auction_info = await loop.run_in_executor(None, json.loads, body)
+                else:
+                    stream = AuctionStreamFilter(mega_data.is_desired_auction)
+                    async for chunk in resp.content.iter_chunked(STREAM_CHUNK_SIZE):
+                        await loop.run_in_executor(None, stream.feed, chunk)
+                    auction_info = await loop.run_in_executor(None, stream.close)
+                # only once the whole body is in, a failed read must not look unchanged on retry
+                mega_data.record_upload(connected_id, resp.headers)
+                return auction_info
+        except (aiohttp.ClientError, asyncio.TimeoutError) as ex:
+            print(
+                f"Error getting {mega_data.REGION} {str(connected_id)} realm data: {ex}"
+            )
+    return {"auctions": []}
+
+
+async def get_listings_single_async(mega_data, http, connected_id):
+    """Async twin of MegaData.get_listings_single, None means the data has not updated."""
+    if connected_id in [-1, -2]:
+        log_info(f"gather data from {mega_data.REGION} commodities")
+        url, connected_id = mega_data.construct_commodity_api_url()
+        auction_info = await fetch_ah_json(mega_data, http, url, connected_id)
+        if auction_info.get("skipped"):
+            return None
+        return auction_info.get("auctions", [])
+
+    log_info(
+        f"gather data from connectedRealmId {connected_id} of region {mega_data.REGION}"
+    )
+    all_auctions = []
+    for endpoint in mega_data.get_auction_endpoints():
+        url = mega_data.construct_api_url(connected_id, endpoint)
+        auction_info = await fetch_ah_json(mega_data, http, url, connected_id)
+        if "auctions" not in auction_info:
+            print(
+                f"{mega_data.REGION} {str(connected_id)} realm data, no auctions found"
+            )
+            continue
+        if auction_info.get("skipped"):
+            return None
+        all_auctions.extend(auction_info["auctions"])
+    return all_auctions
+
+
+async def scan_realms_async(mega_data, connected_ids, process_realm_data, is_running):
+    """Fetch all realms on one loop and pass every payload to process_realm_data."""
+    semaphore = asyncio.Semaphore(mega_data.THREADS)
+    loop = asyncio.get_running_loop()
+    # matching is cpu bound, one worker keeps the loop free to read sockets meanwhile,
+    # with MATCH_PROCESSES each worker just waits on its own matching process
+    match_pool = ThreadPoolExecutor(max_workers=max(mega_data.MATCH_PROCESSES, 1))
+    connector = aiohttp.TCPConnector(limit=mega_data.THREADS, limit_per_host=0)
+    # like requests' timeout=20, limit each connect / socket read and not the whole
+    # download, commodity payloads can take far longer than 20 sec to arrive
+    timeout = aiohttp.ClientTimeout(
+        total=None,
+        sock_connect=ASYNC_REQUEST_TIMEOUT,
+        sock_read=ASYNC_REQUEST_TIMEOUT,
+    )
+    # check_access_token is blocking, refresh the token once here instead of on the loop
+    await loop.run_in_executor(None, mega_data.check_access_token)
+
+    async def scan_one(http, connected_id):
+        if not is_running():
+            return
+        async with semaphore:
+            try:
+                auctions = await get_listings_single_async(
+                    mega_data, http, connected_id
+                )
+            except Exception as ex:
+                print(f"Error scanning {connected_id} of {mega_data.REGION}: {ex}")
+                return
+        try:
+            await loop.run_in_executor(
+                match_pool, process_realm_data, connected_id, auctions
+            )
+        except Exception as ex:
+            print(f"Error matching {connected_id} of {mega_data.REGION}: {ex}")
+
+    try:
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as http:
+            await asyncio.gather(
+                *(scan_one(http, connected_id) for connected_id in connected_ids)
+            )
+    finally:
+        match_pool.shutdown(wait=True)
+
+
+def run_async_scan(mega_data, connected_ids, process_realm_data, is_running):
+    asyncio.run(
+        scan_realms_async(mega_data, connected_ids, process_realm_data, is_running)
+    )
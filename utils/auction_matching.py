@@ -0,0 +1,805 @@
+"""
+Auction matching stage.
+
+The desired item / pet / ilvl checks that used to be closures inside
+Alerts.run. AuctionMatcher only holds the lookup tables it needs (desired
+indexes, bonus id sets, ilvl resolver data) so it can be pickled and sent to
+worker processes: with "MATCH_PROCESSES": N in mega_data.json the scan threads
+only download, and matching runs on N processes that each receive the matcher
+once when they start instead of with every realm.
+"""
+
+import contextlib, io, json, traceback
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from utils.helpers import (
+    create_oribos_exchange_pet_link,
+    create_oribos_exchange_item_link,
+)
+from utils.ilvl_resolver import resolve_post_midnight_ilvl_cached
+from utils.auction_prefilter import AuctionPrefilter, vector_prefilter_available
+from utils.alert_records import AuctionAlert, IlvlMatch, PetLevelMatch
+from utils.log_writer import configure_logging, log_debug, log_info, log_level
+
+
+class AuctionMatcher:
+    def __init__(
+        self,
+        region,
+        show_bid_prices,
+        desired_items,
+        desired_pets,
+        desired_ilvl_items,
+        min_ilvl,
+        desired_ilvl_index,
+        desired_pet_ilvl_index,
+        socket_ids,
+        leech_ids,
+        avoidance_ids,
+        speed_ids,
+        ilvl_addition,
+        realm_names,
+        use_post_midnight_ilvl=False,
+        bonuses_by_id=None,
+        equippable_items=None,
+        item_curves=None,
+        item_squish_era=None,
+        vector_prefilter=False,
+    ):
+        self.REGION = region
+        self.SHOW_BIDPRICES = show_bid_prices
+        self.DESIRED_ITEMS = desired_items
+        self.DESIRED_PETS = desired_pets
+        self.DESIRED_ILVL_ITEMS = desired_ilvl_items
+        self.min_ilvl = min_ilvl
+        self.DESIRED_ILVL_INDEX = desired_ilvl_index
+        self.DESIRED_PET_ILVL_INDEX = desired_pet_ilvl_index
+        self.socket_ids = socket_ids
+        self.leech_ids = leech_ids
+        self.avoidance_ids = avoidance_ids
+        self.speed_ids = speed_ids
+        self.ilvl_addition = ilvl_addition
+        # connected realm id -> sorted realm names
+        self.realm_names = realm_names
+        self.USE_POST_MIDNIGHT_ILVL = use_post_midnight_ilvl
+        self.bonuses_by_id = bonuses_by_id or {}
+        self.equippable_items = equippable_items or {}
+        self.item_curves = item_curves or {}
+        self.item_squish_era = item_squish_era or {}
+        # numpy thresholds built once here, so pool workers receive them with the matcher
+        self.prefilter = None
+        if vector_prefilter and vector_prefilter_available():
+            self.prefilter = AuctionPrefilter(self)
+
+    @classmethod
+    def from_mega_data(cls, mega_data):
+        """Snapshot the matching tables of a loaded MegaData."""
+        realm_ids = set(mega_data.WOW_SERVER_NAMES.values()) | {-1, -2}
+        return cls(
+            region=mega_data.REGION,
+            show_bid_prices=mega_data.SHOW_BIDPRICES,
+            desired_items=mega_data.DESIRED_ITEMS,
+            desired_pets=mega_data.DESIRED_PETS,
+            desired_ilvl_items=mega_data.DESIRED_ILVL_ITEMS,
+            min_ilvl=mega_data.min_ilvl,
+            desired_ilvl_index=mega_data.DESIRED_ILVL_INDEX,
+            desired_pet_ilvl_index=mega_data.DESIRED_PET_ILVL_INDEX,
+            socket_ids=mega_data.socket_ids,
+            leech_ids=mega_data.leech_ids,
+            avoidance_ids=mega_data.avoidance_ids,
+            speed_ids=mega_data.speed_ids,
+            ilvl_addition=mega_data.ilvl_addition,
+            realm_names={
+                realm_id: mega_data.get_realm_names(realm_id) for realm_id in realm_ids
+            },
+            use_post_midnight_ilvl=mega_data.USE_POST_MIDNIGHT_ILVL,
+            bonuses_by_id=getattr(mega_data, "bonuses_by_id", None),
+            equippable_items=mega_data.equippable_items,
+            item_curves=mega_data.item_curves,
+            item_squish_era=mega_data.item_squish_era,
+            vector_prefilter=mega_data.VECTOR_PREFILTER,
+        )
+
+    def get_realm_names(self, connected_id):
+        return self.realm_names.get(connected_id, [])
+
+    def clean_listing_data(self, auctions, connected_id):
+        if connected_id in [-1, -2]:
+            return self.clean_commodity_data(auctions, connected_id)
+
+        all_ah_buyouts = {}
+        all_ah_bids = {}
+        pet_ah_buyouts = {}
+        pet_ah_bids = {}
+        ilvl_ah_buyouts = []
+        pet_ilvl_ah_buyouts = []
+
+        if len(auctions) == 0:
+            log_info(f"no listings found on {connected_id} of {self.REGION}")
+            return
+
+        if self.prefilter:
+            auctions = self.prefilter.filter(auctions)
+
+        def add_price_to_dict(price, item_id, price_dict, is_pet=False):
+            # prices stay as copper in a set, results_dict converts them to gold once
+            desired = self.DESIRED_PETS if is_pet else self.DESIRED_ITEMS
+            if price < desired[item_id] * 10000:
+                if item_id not in price_dict:
+                    price_dict[item_id] = {price}
+                else:
+                    price_dict[item_id].add(price)
+
+        for item in auctions:
+            item_id = item["item"]["id"]
+
+            # regular items
+            if item_id in self.DESIRED_ITEMS and item_id != 82800:
+                price = 10000000 * 10000
+
+                if "bid" in item and self.SHOW_BIDPRICES == "true":
+                    price = item["bid"]
+                    add_price_to_dict(price, item_id, all_ah_bids)
+
+                if "buyout" in item:
+                    price = item["buyout"]
+                    add_price_to_dict(price, item_id, all_ah_buyouts)
+
+                if "unit_price" in item:
+                    price = item["unit_price"]
+                    add_price_to_dict(price, item_id, all_ah_buyouts)
+
+            # all caged battle pets have item id 82800
+            elif item_id == 82800:
+                # desired pets
+                if item["item"]["pet_species_id"] in self.DESIRED_PETS:
+                    pet_id = item["item"]["pet_species_id"]
+                    price = 10000000 * 10000
+
+                    if "bid" in item and self.SHOW_BIDPRICES == "true":
+                        price = item["bid"]
+                        add_price_to_dict(price, pet_id, pet_ah_bids, is_pet=True)
+
+                    if "buyout" in item:
+                        price = item["buyout"]
+                        add_price_to_dict(price, pet_id, pet_ah_buyouts, is_pet=True)
+
+                # desired pet ilvl items
+                desired_pet_rules = self.DESIRED_PET_ILVL_INDEX.get(
+                    item["item"]["pet_species_id"]
+                )
+                if desired_pet_rules:
+                    pet_ilvl_item_info = self.check_pet_ilvl_stats(
+                        item,
+                        desired_pet_rules,
+                    )
+                    if pet_ilvl_item_info:
+                        pet_ilvl_ah_buyouts.append(pet_ilvl_item_info)
+
+            # ilvl snipe items
+            if (
+                self.DESIRED_ILVL_ITEMS
+                and item_id in self.DESIRED_ILVL_ITEMS["item_ids"]
+            ):
+                ilvl_item_info = self.check_tertiary_stats_generic(
+                    item,
+                    self.socket_ids,
+                    self.leech_ids,
+                    self.avoidance_ids,
+                    self.speed_ids,
+                    self.ilvl_addition,
+                    self.DESIRED_ILVL_ITEMS,
+                    self.min_ilvl,
+                )
+                if ilvl_item_info:
+                    ilvl_ah_buyouts.append(ilvl_item_info)
+
+            for desired_ilvl_item in self.DESIRED_ILVL_INDEX.get(item_id, ()):
+                ilvl_item_info = self.check_tertiary_stats_generic(
+                    item,
+                    self.socket_ids,
+                    self.leech_ids,
+                    self.avoidance_ids,
+                    self.speed_ids,
+                    self.ilvl_addition,
+                    desired_ilvl_item,
+                    desired_ilvl_item["ilvl"],
+                )
+                if ilvl_item_info:
+                    ilvl_ah_buyouts.append(ilvl_item_info)
+
+        if not (
+            all_ah_buyouts
+            or all_ah_bids
+            or pet_ah_buyouts
+            or pet_ah_bids
+            or ilvl_ah_buyouts
+            or pet_ilvl_ah_buyouts
+        ):
+            log_info(
+                f"no listings found matching desires on {connected_id} of {self.REGION}"
+            )
+            return
+        else:
+            print(f"Found matches on {connected_id} of {self.REGION}!!!")
+            return self.format_alert_messages(
+                all_ah_buyouts,
+                all_ah_bids,
+                connected_id,
+                pet_ah_buyouts,
+                pet_ah_bids,
+                list(ilvl_ah_buyouts),
+                pet_ilvl_ah_buyouts,
+            )
+
+    def clean_commodity_data(self, auctions, connected_id):
+        """
+        Commodities only carry stackable items (no caged pets, no gear with bonus ids),
+        so one pass groups every listing under its threshold by item and unit price.
+
+        Returns:
+            list: One result per desired item with its price ladder, None if nothing matched
+        """
+        if len(auctions) == 0:
+            log_info(f"no listings found on {connected_id} of {self.REGION}")
+            return
+
+        if self.prefilter:
+            auctions = self.prefilter.filter_commodities(auctions)
+
+        # copper thresholds computed once instead of per listing
+        thresholds = {
+            item_id: price * 10000 for item_id, price in self.DESIRED_ITEMS.items()
+        }
+        # item_id -> unit price in copper -> quantity listed at that price
+        ladders = {}
+        for auction in auctions:
+            item_id = auction["item"]["id"]
+            threshold = thresholds.get(item_id)
+            if threshold is None or "unit_price" not in auction:
+                continue
+            unit_price = auction["unit_price"]
+            if unit_price < threshold:
+                ladder = ladders.setdefault(item_id, {})
+                ladder[unit_price] = ladder.get(unit_price, 0) + auction.get(
+                    "quantity", 1
+                )
+
+        if not ladders:
+            log_info(
+                f"no listings found matching desires on {connected_id} of {self.REGION}"
+            )
+            return
+        print(f"Found matches on {connected_id} of {self.REGION}!!!")
+        realm_names = self.get_realm_names(connected_id)
+        results = []
+        for item_id, ladder in ladders.items():
+            # use instead of item name
+            itemlink = create_oribos_exchange_item_link(
+                realm_names[0], item_id, self.REGION
+            )
+            results.append(
+                self.commodity_results_dict(
+                    ladder, itemlink, connected_id, realm_names, item_id
+                )
+            )
+        return results
+
+    def commodity_results_dict(self, ladder, itemlink, connected_id, realm_names, id):
+        price_ladder = []
+        total_quantity = 0
+        for unit_price in sorted(ladder):
+            total_quantity += ladder[unit_price]
+            # [gold per unit, quantity at that price, quantity at or below it]
+            price_ladder.append(
+                [unit_price / 10000, ladder[unit_price], total_quantity]
+            )
+        return AuctionAlert(
+            region=self.REGION,
+            realmID=connected_id,
+            realmNames=realm_names,
+            itemID=id,
+            itemlink=itemlink,
+            minPrice=price_ladder[0][0],
+            buyout_prices=json.dumps([step[0] for step in price_ladder]),
+            quantity=total_quantity,
+            price_ladder=price_ladder,
+        )
+
+    def check_tertiary_stats_generic(
+        self,
+        auction,
+        socket_ids,
+        leech_ids,
+        avoidance_ids,
+        speed_ids,
+        ilvl_addition,
+        DESIRED_ILVL_ITEMS,
+        min_ilvl,
+    ):
+        if "bonus_lists" not in auction["item"]:
+            return False
+
+        def secondary_name_from_modifier_value(value):
+            mapping = {
+                32: "crit",
+                36: "haste",
+                40: "versatility",
+                49: "mastery",
+            }
+            return mapping.get(int(value)) if isinstance(value, int) else None
+
+        # Check for a modifier with type 9 and get its value (modifier 9 value equals required playerLevel)
+        required_lvl = None
+        for modifier in auction["item"].get("modifiers", []):
+            if modifier["type"] == 9:
+                required_lvl = modifier["value"]
+                break
+
+        # if no modifier["type"] == 9 found, use the base required level for report
+        if not required_lvl:
+            required_lvl = DESIRED_ILVL_ITEMS["base_required_levels"][
+                auction["item"]["id"]
+            ]
+
+        item_bonus_ids = set(auction["item"]["bonus_lists"])
+        item_modifiers = auction["item"].get("modifiers", [])
+        secondary_stats = []
+        for modifier in item_modifiers:
+            if modifier.get("type") in (29, 30):
+                name = secondary_name_from_modifier_value(modifier.get("value"))
+                if name and name not in secondary_stats:
+                    secondary_stats.append(name)
+        # look for intersection of bonus_ids and any other lists
+        tertiary_stats = {
+            "sockets": len(item_bonus_ids & socket_ids) != 0,
+            "leech": len(item_bonus_ids & leech_ids) != 0,
+            "avoidance": len(item_bonus_ids & avoidance_ids) != 0,
+            "speed": len(item_bonus_ids & speed_ids) != 0,
+        }
+
+        desired_tertiary_stats = {
+            "sockets": DESIRED_ILVL_ITEMS["sockets"],
+            "leech": DESIRED_ILVL_ITEMS["leech"],
+            "avoidance": DESIRED_ILVL_ITEMS["avoidance"],
+            "speed": DESIRED_ILVL_ITEMS["speed"],
+        }
+        desired_secondary_stats = {
+            "crit": DESIRED_ILVL_ITEMS.get("crit", False),
+            "haste": DESIRED_ILVL_ITEMS.get("haste", False),
+            "mastery": DESIRED_ILVL_ITEMS.get("mastery", False),
+            "versatility": DESIRED_ILVL_ITEMS.get("versatility", False),
+        }
+
+        # if we're looking for sockets, leech, avoidance, or speed, skip if none of those are present
+        # Check if any of the desired stats are True
+        if any(desired_tertiary_stats):
+            # Check if all the desired stats are present in the tertiary_stats
+            for stat, desired in desired_tertiary_stats.items():
+                if desired and not tertiary_stats.get(stat, False):
+                    return False
+        if any(desired_secondary_stats.values()):
+            present_secondary = set(secondary_stats)
+            for stat, desired in desired_secondary_stats.items():
+                if desired and stat not in present_secondary:
+                    return False
+
+        # get ilvl: legacy (Saddlebag base + ilvl_addition) or post-midnight (resolver)
+        if self.USE_POST_MIDNIGHT_ILVL:
+            ilvl = resolve_post_midnight_ilvl_cached(
+                auction["item"]["id"],
+                auction["item"]["bonus_lists"],
+                required_lvl,
+                self.bonuses_by_id,
+                self.equippable_items,
+                self.item_curves,
+                self.item_squish_era,
+            )
+            if ilvl is None:
+                return False
+        else:
+            base_ilvl = DESIRED_ILVL_ITEMS["base_ilvls"][auction["item"]["id"]]
+            ilvl_add = [
+                ilvl_addition[bonus_id]
+                for bonus_id in item_bonus_ids
+                if bonus_id in ilvl_addition.keys()
+            ]
+            if len(ilvl_add) > 0:
+                ilvl = base_ilvl + sum(ilvl_add)
+            else:
+                ilvl = base_ilvl
+
+        # skip if ilvl is too low
+        if ilvl < min_ilvl:
+            return False
+
+        # skip if ilvl is too high
+        if ilvl > DESIRED_ILVL_ITEMS["max_ilvl"]:
+            return False
+
+        # skip if required_lvl is too low
+        if required_lvl < DESIRED_ILVL_ITEMS["required_min_lvl"]:
+            return False
+
+        # skip if required_lvl is too high
+        if required_lvl > DESIRED_ILVL_ITEMS["required_max_lvl"]:
+            return False
+
+        # # skip if all DESIRED_ILVL_ITEMS["bonus_ids"] are not in item_bonus_ids
+        # if DESIRED_ILVL_ITEMS["bonus_lists"] != [] and not all(
+        #     bonus_id in item_bonus_ids
+        #     for bonus_id in DESIRED_ILVL_ITEMS["bonus_lists"]
+        # ):
+        #     return False
+
+        # skip no exact match
+        if (
+            DESIRED_ILVL_ITEMS["bonus_lists"] != []
+            and DESIRED_ILVL_ITEMS["bonus_lists"] != [-1]
+            and set(DESIRED_ILVL_ITEMS["bonus_lists"]) != set(item_bonus_ids)
+        ):
+            return False
+
+        # if the bonus_lists is -1, then we need to check if the item has more than 3 bonus IDs
+        # this is when someone wants an item at base stats with no level modifiers
+        if DESIRED_ILVL_ITEMS["bonus_lists"] == [-1]:
+            temp_bonus_ids = set(item_bonus_ids)
+            # Remove all tertiary stat bonus IDs
+            temp_bonus_ids -= socket_ids
+            temp_bonus_ids -= leech_ids
+            temp_bonus_ids -= avoidance_ids
+            temp_bonus_ids -= speed_ids
+            # If more than 3 bonus IDs remain, skip this item
+            if len(temp_bonus_ids) > 3:
+                return False
+
+            # some rare ids dont work like this, so we skip them
+            bad_ids = [224637]
+            if auction["item"]["id"] in bad_ids:
+                return False
+
+        modifier_values = DESIRED_ILVL_ITEMS.get("modifier_values", [])
+        if modifier_values:
+            required_modifier_values = set(modifier_values)
+            auction_modifier_values = set()
+            for modifier in item_modifiers:
+                if "value" in modifier and isinstance(modifier["value"], int):
+                    auction_modifier_values.add(modifier["value"])
+            if required_modifier_values != auction_modifier_values:
+                return False
+
+        modifier_objects = DESIRED_ILVL_ITEMS.get("modifier_objects", [])
+        if modifier_objects:
+            required_modifier_pairs = {
+                (int(mod["type"]), int(mod["value"]))
+                for mod in modifier_objects
+                if isinstance(mod, dict)
+                and isinstance(mod.get("type"), int)
+                and isinstance(mod.get("value"), int)
+            }
+            auction_modifier_pairs = {
+                (int(mod["type"]), int(mod["value"]))
+                for mod in item_modifiers
+                if isinstance(mod, dict)
+                and isinstance(mod.get("type"), int)
+                and isinstance(mod.get("value"), int)
+            }
+            if required_modifier_pairs != auction_modifier_pairs:
+                return False
+
+        # if no buyout, use bid
+        if "buyout" not in auction and "bid" in auction:
+            auction["buyout"] = auction["bid"]
+
+        # if we get through everything and still haven't skipped, add to matching
+        buyout = round(auction["buyout"] / 10000, 2)
+        if buyout > DESIRED_ILVL_ITEMS["buyout"]:
+            return False
+        else:
+            log_debug(
+                f"[MATCH MODIFIERS] item={auction['item']['id']} bonus_ids={sorted(list(item_bonus_ids))} "
+                f"modifiers={item_modifiers} secondary_final={secondary_stats}"
+            )
+            return IlvlMatch(
+                item_id=auction["item"]["id"],
+                buyout=buyout,
+                tertiary_stats=tertiary_stats,
+                secondary_stats=secondary_stats,
+                modifiers=item_modifiers,
+                bonus_ids=item_bonus_ids,
+                ilvl=ilvl,
+                required_lvl=required_lvl,
+                webhook=DESIRED_ILVL_ITEMS.get("webhook"),
+            )
+
+    def format_alert_messages(
+        self,
+        all_ah_buyouts,
+        all_ah_bids,
+        connected_id,
+        pet_ah_buyouts,
+        pet_ah_bids,
+        ilvl_ah_buyouts,
+        pet_ilvl_ah_buyouts,
+    ):
+        results = []
+        realm_names = self.get_realm_names(connected_id)
+        for itemID, auction in all_ah_buyouts.items():
+            # use instead of item name
+            itemlink = create_oribos_exchange_item_link(
+                realm_names[0], itemID, self.REGION
+            )
+            results.append(
+                self.results_dict(
+                    auction,
+                    itemlink,
+                    connected_id,
+                    realm_names,
+                    itemID,
+                    "itemID",
+                    "buyout",
+                )
+            )
+
+        for petID, auction in pet_ah_buyouts.items():
+            # use instead of item name
+            itemlink = create_oribos_exchange_pet_link(
+                realm_names[0], petID, self.REGION
+            )
+            results.append(
+                self.results_dict(
+                    auction,
+                    itemlink,
+                    connected_id,
+                    realm_names,
+                    petID,
+                    "petID",
+                    "buyout",
+                )
+            )
+
+        for auction in ilvl_ah_buyouts:
+            itemID = auction.item_id
+            # use instead of item name
+            itemlink = create_oribos_exchange_item_link(
+                realm_names[0], itemID, self.REGION
+            )
+            results.append(
+                self.ilvl_results_dict(
+                    auction,
+                    itemlink,
+                    connected_id,
+                    realm_names,
+                    itemID,
+                    "itemID",
+                    "buyout",
+                )
+            )
+
+        if self.SHOW_BIDPRICES == "true":
+            for itemID, auction in all_ah_bids.items():
+                # use instead of item name
+                itemlink = create_oribos_exchange_item_link(
+                    realm_names[0], itemID, self.REGION
+                )
+                results.append(
+                    self.results_dict(
+                        auction,
+                        itemlink,
+                        connected_id,
+                        realm_names,
+                        itemID,
+                        "itemID",
+                        "bid",
+                    )
+                )
+
+            for petID, auction in pet_ah_bids.items():
+                # use instead of item name
+                itemlink = create_oribos_exchange_pet_link(
+                    realm_names[0], petID, self.REGION
+                )
+                results.append(
+                    self.results_dict(
+                        auction,
+                        itemlink,
+                        connected_id,
+                        realm_names,
+                        petID,
+                        "petID",
+                        "bid",
+                    )
+                )
+
+        # Add new section for pet level snipes
+        for auction in pet_ilvl_ah_buyouts:
+            petID = auction.pet_species_id
+            # use instead of item name
+            itemlink = create_oribos_exchange_pet_link(
+                realm_names[0], petID, self.REGION
+            )
+            results.append(
+                self.pet_ilvl_results_dict(
+                    auction,
+                    itemlink,
+                    connected_id,
+                    realm_names,
+                    petID,
+                    "petID",
+                    "buyout",
+                )
+            )
+
+        # end of the line alerts go out from here
+        return results
+
+    def results_dict(
+        self, auction, itemlink, connected_id, realm_names, id, idType, priceType
+    ):
+        # auction is the set of copper prices from add_price_to_dict
+        auction = sorted(price / 10000 for price in auction)
+        minPrice = auction[0]
+        return AuctionAlert(
+            region=self.REGION,
+            realmID=connected_id,
+            realmNames=realm_names,
+            itemlink=itemlink,
+            minPrice=minPrice,
+            **{idType: id, f"{priceType}_prices": json.dumps(auction)},
+        )
+
+    def ilvl_results_dict(
+        self, auction, itemlink, connected_id, realm_names, id, idType, priceType
+    ):
+        tertiary_stats = [
+            stat for stat, present in auction.tertiary_stats.items() if present
+        ]
+        price = getattr(auction, priceType)
+        return AuctionAlert(
+            region=self.REGION,
+            realmID=connected_id,
+            realmNames=realm_names,
+            itemlink=itemlink,
+            minPrice=price,
+            tertiary_stats=tertiary_stats,
+            secondary_stats=auction.secondary_stats,
+            modifiers=auction.modifiers,
+            bonus_ids=auction.bonus_ids,
+            ilvl=auction.ilvl,
+            required_lvl=auction.required_lvl,
+            webhook=auction.webhook,
+            **{idType: id, f"{priceType}_prices": price},
+        )
+
+    def pet_ilvl_results_dict(
+        self, auction, itemlink, connected_id, realm_names, id, idType, priceType
+    ):
+        """Format pet level snipe results for alerts"""
+        return AuctionAlert(
+            region=self.REGION,
+            realmID=connected_id,
+            realmNames=realm_names,
+            itemlink=itemlink,
+            minPrice=auction.buyout,
+            pet_level=auction.current_level,
+            quality=auction.quality,
+            breed=auction.breed,
+            webhook=auction.webhook,
+            **{idType: id, f"{priceType}_prices": auction.buyout},
+        )
+
+    def check_pet_ilvl_stats(self, item, desired_pet_rules):
+        """
+        Check if a pet auction meets the desired level and price criteria
+
+        Args:
+            item (dict): Auction house item data from Blizzard API
+            desired_pet_rules (list): Desired pet criteria for this pet species,
+                from mega_data.DESIRED_PET_ILVL_INDEX
+
+        Returns:
+            PetLevelMatch: Pet info if it matches any of the rules, None if it doesn't match
+        """
+        # Get the pet species ID from the item data
+        pet_species_id = item["item"]["pet_species_id"]
+
+        # rules are checked in order, the first match decides the alert's webhook
+        matched_rule = next(
+            (
+                desired_pet
+                for desired_pet in desired_pet_rules
+                if self.pet_matches_rule(item, desired_pet)
+            ),
+            None,
+        )
+        if matched_rule is None:
+            return None
+
+        # If we get here, the pet matches all criteria
+        return PetLevelMatch(
+            pet_species_id=pet_species_id,
+            current_level=item["item"]["pet_level"],
+            buyout=item["buyout"] / 10000,
+            quality=item["item"]["pet_quality_id"],
+            breed=item["item"]["pet_breed_id"],
+            webhook=matched_rule.get("webhook"),
+        )
+
+    @staticmethod
+    def pet_matches_rule(item, desired_pet):
+        # Check if pet meets level requirement
+        pet_level = item["item"].get("pet_level")
+        if pet_level is None or pet_level < desired_pet["minLevel"]:
+            return False
+
+        # Check if quality meets requirement
+        if item["item"]["pet_quality_id"] < desired_pet["minQuality"]:
+            return False
+
+        # Check if breed is excluded
+        # https://www.warcraftpets.com/wow-pet-battles/breeds/
+        # 4        14 are the best power
+        # 5 15 are the best speed
+        # 6 16 are the best health
+        if item["item"]["pet_breed_id"] in desired_pet["excludeBreeds"]:
+            return False
+
+        # Check if price meets requirement (buyout price should be less than desired price)
+        buyout = item.get("buyout")
+        if buyout is None or buyout / 10000 > desired_pet["price"]:
+            return False
+
+        return True
+
+
+#### PROCESS POOL ####
+# set once per worker process by the pool initializer
+_process_matchers = None
+
+
+def _init_match_process(matchers, level):
+    global _process_matchers
+    _process_matchers = matchers
+    # spawned workers start with the default LOG_LEVEL
+    configure_logging(level)
+
+
+def _match_in_process(auctions, connected_id, region):
+    """Returns (alerts, printed output, failed). Spawned workers have no StreamToFile,
+    so their prints and tracebacks are sent back for the parent to log."""
+    output = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+            alerts = _process_matchers[region].clean_listing_data(
+                auctions, connected_id
+            )
+    except Exception:
+        output.write(traceback.format_exc())
+        return None, output.getvalue(), True
+    return alerts, output.getvalue(), False
+
+
+def create_match_pool(matchers, processes):
+    """Process pool where every worker gets its own copy of the matchers at startup.
+    matchers is {region: AuctionMatcher}, the regions' shared desired tables are pickled once.
+    spawn is used everywhere so workers never fork the running Qt and scan threads."""
+    return ProcessPoolExecutor(
+        max_workers=processes,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_match_process,
+        initargs=(matchers, log_level()),
+    )
+
+
+def match_in_pool(match_pool, auctions, connected_id, region):
+    """Run clean_listing_data on the pool, blocks the calling download thread until done."""
+    alerts, output, failed = match_pool.submit(
+        _match_in_process, auctions, connected_id, region
+    ).result()
+    # printed here so the worker's output reaches the log file
+    print(output, end="")
+    if failed:
+        raise RuntimeError(
+            f"matching {connected_id} of {region} failed in a worker process"
+        )
+    return alerts
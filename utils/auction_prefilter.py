@@ -0,0 +1,166 @@
+"""
+Vectorized auction prefilter.
+
+Opt-in with "VECTOR_PREFILTER": true in mega_data.json. Before the per auction
+checks in AuctionMatcher.clean_listing_data, a realm's item ids are read into a
+NumPy column and desired id membership is applied as an array operation. Rows
+for ilvl and pet rules, whose python checks are the expensive ones, also get
+buyout / bid / pet species columns and are dropped when no rule's price allows
+them. Only the surviving auctions go through the regular checks, which still
+make every final decision, so the alerts are the same with or without it.
+
+Plain desired item rows are not priced here: reading a dict field into a column
+costs about as much as the python loop's own price check, so they pass through.
+Commodity payloads (clean_commodity_data) are the exception: only the rows of
+desired ids get a unit_price column, and listings at or above the item's
+threshold are dropped before the price ladders are built.
+
+Needs numpy (installed with pandas), matching runs unfiltered without it.
+"""
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# below this many auctions building the columns costs more than it saves
+VECTOR_PREFILTER_MIN_ROWS = 1000
+# stands in for a missing buyout / unit_price / bid so it never passes a threshold
+NO_PRICE = 2**62
+# ilvl buyouts are rounded to 2 decimals in gold before comparing, keep a copper margin
+ILVL_ROUNDING_MARGIN = 50
+PET_CAGE_ITEM_ID = 82800
+
+
+def vector_prefilter_available():
+    return np is not None
+
+
+def _lookup_table(thresholds):
+    """Sorted id array and matching threshold array for searchsorted lookups."""
+    ids = np.array(sorted(thresholds), dtype=np.int64)
+    values = np.array([thresholds[i] for i in ids.tolist()], dtype=np.float64)
+    return ids, values
+
+
+def _lookup(table, keys, missing):
+    """thresholds for keys, missing where the key is not in the table."""
+    ids, values = table
+    if len(ids) == 0:
+        return np.full(len(keys), missing, dtype=np.float64)
+    pos = np.searchsorted(ids, keys).clip(max=len(ids) - 1)
+    return np.where(ids[pos] == keys, values[pos], missing)
+
+
+class AuctionPrefilter:
+    """Per matcher copper thresholds, built once and reused for every realm."""
+
+    def __init__(self, matcher):
+        self.use_bids = matcher.SHOW_BIDPRICES == "true"
+        # clean_listing_data keeps prices strictly below desired * 10000
+        self.items = _lookup_table(
+            {
+                item_id: price * 10000
+                for item_id, price in matcher.DESIRED_ITEMS.items()
+                if item_id != PET_CAGE_ITEM_ID
+            }
+        )
+        self.pets = _lookup_table(
+            {pet_id: price * 10000 for pet_id, price in matcher.DESIRED_PETS.items()}
+        )
+        # pet level and ilvl rules reject prices above the rule, keep anything up to
+        # the most generous rule for that id and let the real checks decide
+        self.pet_rules = _lookup_table(
+            {
+                pet_id: max(rule["price"] for rule in rules) * 10000 + 1
+                for pet_id, rules in matcher.DESIRED_PET_ILVL_INDEX.items()
+            }
+        )
+        ilvl_buyouts = {
+            item_id: max(rule["buyout"] for rule in rules)
+            for item_id, rules in matcher.DESIRED_ILVL_INDEX.items()
+        }
+        if matcher.DESIRED_ILVL_ITEMS:
+            for item_id in matcher.DESIRED_ILVL_ITEMS["item_ids"]:
+                ilvl_buyouts[item_id] = max(
+                    ilvl_buyouts.get(item_id, 0),
+                    matcher.DESIRED_ILVL_ITEMS["buyout"],
+                )
+        self.ilvl_items = _lookup_table(
+            {
+                item_id: buyout * 10000 + ILVL_ROUNDING_MARGIN
+                for item_id, buyout in ilvl_buyouts.items()
+            }
+        )
+        # item ids with price checked rules, pets all share the cage id
+        self.rule_item_ids = self.ilvl_items[0]
+        if len(self.pets[0]) or len(self.pet_rules[0]):
+            self.rule_item_ids = np.union1d(self.rule_item_ids, [PET_CAGE_ITEM_ID])
+
+    def filter(self, auctions):
+        """Auctions that can still match a desired item, pet or ilvl rule."""
+        n = len(auctions)
+        if n < VECTOR_PREFILTER_MIN_ROWS or not len(self.rule_item_ids):
+            return auctions
+        # one pass over the dicts for the id column, most rows stop here
+        item_ids = np.fromiter(
+            (auction["item"]["id"] for auction in auctions), dtype=np.int64, count=n
+        )
+        # plain desired items cost the python loop less than reading their prices
+        # into columns would, they pass through and only the rule rows are priced here
+        plain_rows = np.flatnonzero(np.isin(item_ids, self.items[0]))
+        rule_rows = np.flatnonzero(np.isin(item_ids, self.rule_item_ids))
+        if len(rule_rows):
+            rule_rows = rule_rows[self._rule_row_mask(auctions, rule_rows, item_ids)]
+        rows = np.union1d(plain_rows, rule_rows).tolist()
+        return [auctions[i] for i in rows]
+
+    def filter_commodities(self, auctions):
+        """Commodity listings of a desired item priced under its threshold."""
+        n = len(auctions)
+        if n < VECTOR_PREFILTER_MIN_ROWS:
+            return auctions
+        item_ids = np.fromiter(
+            (auction["item"]["id"] for auction in auctions), dtype=np.int64, count=n
+        )
+        rows = np.flatnonzero(np.isin(item_ids, self.items[0]))
+        if not len(rows):
+            return []
+        candidates = [auctions[i] for i in rows.tolist()]
+        unit_prices = np.fromiter(
+            (auction.get("unit_price", NO_PRICE) for auction in candidates),
+            dtype=np.float64,
+            count=len(candidates),
+        )
+        keep = unit_prices < _lookup(self.items, item_ids[rows], -np.inf)
+        return [candidates[i] for i in np.flatnonzero(keep).tolist()]
+
+    def _rule_row_mask(self, auctions, rows, item_ids):
+        candidates = [auctions[i] for i in rows.tolist()]
+        item_ids = item_ids[rows]
+        m = len(candidates)
+        pet_ids = np.fromiter(
+            (auction["item"].get("pet_species_id", -1) for auction in candidates),
+            dtype=np.int64,
+            count=m,
+        )
+        buyouts = np.fromiter(
+            (auction.get("buyout", NO_PRICE) for auction in candidates),
+            dtype=np.float64,
+            count=m,
+        )
+        bids = np.fromiter(
+            (auction.get("bid", NO_PRICE) for auction in candidates),
+            dtype=np.float64,
+            count=m,
+        )
+
+        is_pet = item_ids == PET_CAGE_ITEM_ID
+        # cheapest price the desired pet check looks at, bids only count when they are shown
+        listed = np.minimum(buyouts, bids) if self.use_bids else buyouts
+        keep = is_pet & (listed < _lookup(self.pets, pet_ids, -np.inf))
+        keep |= is_pet & (buyouts <= _lookup(self.pet_rules, pet_ids, -np.inf))
+        # ilvl checks fall back to the bid when there is no buyout
+        ilvl_price = np.where(buyouts == NO_PRICE, bids, buyouts)
+        keep |= ilvl_price <= _lookup(self.ilvl_items, item_ids, -np.inf)
+        return keep
@@ -0,0 +1,81 @@
+"""
+Streaming reader for Blizzard auction payloads.
+
+Realm payloads are tens of MB and commodities hundreds of MB, but only a tiny
+share of the auctions match a desired list. Instead of req.json() building the
+whole list, the raw body is fed in chunks and the "auctions" array is decoded
+one auction at a time; only auctions the keep() check accepts are held on to.
+"""
+
+import codecs
+import json
+import re
+
+STREAM_CHUNK_SIZE = 256 * 1024
+
+AUCTIONS_ARRAY_START = re.compile(r'"auctions"\s*:\s*\[')
+# long enough to hold a '"auctions" : [' split across two chunks
+SEEK_TAIL_SIZE = 32
+ARRAY_SEPARATORS = " \t\n\r,"
+
+_decoder = json.JSONDecoder()
+
+
+class AuctionStreamFilter:
+    """Incrementally decode the auctions array, keeping only auctions where keep(auction) is true."""
+
+    def __init__(self, keep):
+        self.keep = keep
+        self.auctions = []
+        self.auctions_read = 0
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._state = "seek"  # seek -> array -> done
+
+    def feed(self, data):
+        if self._state == "done":
+            return
+        self._buffer += self._text.decode(data)
+        if self._state == "seek":
+            match = AUCTIONS_ARRAY_START.search(self._buffer)
+            if not match:
+                self._buffer = self._buffer[-SEEK_TAIL_SIZE:]
+                return
+            self._buffer = self._buffer[match.end() :]
+            self._state = "array"
+        self._read_array()
+
+    def _read_array(self):
+        buf = self._buffer
+        pos, size = 0, len(buf)
+        while True:
+            while pos < size and buf[pos] in ARRAY_SEPARATORS:
+                pos += 1
+            if pos >= size:
+                break
+            if buf[pos] == "]":
+                self._state = "done"
+                pos = size
+                break
+            try:
+                auction, end = _decoder.raw_decode(buf, pos)
+            except ValueError:
+                # the auction continues in the next chunk
+                break
+            self.auctions_read += 1
+            if self.keep(auction):
+                self.auctions.append(auction)
+            pos = end
+        # slice once per chunk, not per auction
+        self._buffer = buf[pos:]
+
+    def close(self):
+        """Finish the stream, returns {"auctions": [...]} or {} when the payload had no auctions."""
+        self._buffer += self._text.decode(b"", final=True)
+        if self._state == "seek":
+            return {}
+        if self._state != "done":
+            raise ValueError(
+                f"auction stream ended inside the auctions array after {self.auctions_read} auctions"
+            )
+        return {"auctions": self.auctions}
@@ -1,4 +1,102 @@
+import threading
 from utils.api_requests import get_raidbots_bonus_ids
+from utils.ilvl_resolver import clear_ilvl_resolution_cache
+
+
+class BonusCatalog:
+    """Raidbots bonuses.json downloaded once and categorized once.
+    Attributes:
+        - bonuses_by_id (dict): Raw bonus data keyed by int bonus ID, used by the post-midnight ilvl resolver.
+        - sockets, leech, avoidance, speed, haste, crit, mastery, versatility (dict): Bonus data per category.
+        - ilvl_addition (dict): Bonus ID to the ilvl added to the items base level.
+        - socket_ids, leech_ids, ... versatility_ids (set): Bonus IDs per category for fast intersections.
+    Processing Logic:
+        - Identify socket bonuses directly from the bonus_id_dict.
+        - Level bonuses are those with specific key sets indicating an item level addition.
+        - Use "rawStats" to determine other bonus categories such as Leech, Avoidance, Speed, and others.
+    """
+
+    def __init__(self, bonus_id_dict):
+        self.bonuses_by_id = bonus_id_dict
+        # sockets are simple
+        self.sockets = {k: v for k, v in bonus_id_dict.items() if "socket" in v.keys()}
+
+        # maybe do this in the future, we can rely on the saddlebag api for now
+        # base_level = {k: v["base_level"] for k, v in bonus_id_dict.items() if "base_level" in v.keys()}
+
+        # should be the ilvl added to the items base level
+        self.ilvl_addition = {
+            k: v["level"]
+            for k, v in bonus_id_dict.items()
+            if list(v.keys()) == ["id", "level"]
+        }
+
+        # the rest are buried in rawStats
+        self.leech, self.avoidance, self.speed = {}, {}, {}
+        self.haste, self.crit, self.mastery, self.versatility = {}, {}, {}, {}
+        for k, v in bonus_id_dict.items():
+            if "rawStats" in v.keys():
+                for stats in v["rawStats"]:
+                    if "Leech" in stats.values():
+                        self.leech[k] = v
+                    if "Avoidance" in stats.values():
+                        self.avoidance[k] = v
+                    if "RunSpeed" in stats.values():
+                        self.speed[k] = v
+                    if "Haste" in stats.values():
+                        self.haste[k] = v
+                    if "Crit" in stats.values():
+                        self.crit[k] = v
+                    if "Mastery" in stats.values():
+                        self.mastery[k] = v
+                    if "Versatility" in stats.values():
+                        self.versatility[k] = v
+
+        # get ids for each bonus type
+        self.socket_ids = set(self.sockets.keys())
+        self.leech_ids = set(self.leech.keys())
+        self.avoidance_ids = set(self.avoidance.keys())
+        self.speed_ids = set(self.speed.keys())
+        self.haste_ids = set(self.haste.keys())
+        self.crit_ids = set(self.crit.keys())
+        self.mastery_ids = set(self.mastery.keys())
+        self.versatility_ids = set(self.versatility.keys())
+
+    def as_dict(self):
+        return {
+            "sockets": self.sockets,
+            "leech": self.leech,
+            "avoidance": self.avoidance,
+            "speed": self.speed,
+            "ilvl_addition": self.ilvl_addition,
+            # post-midnight ilvl: raw bonus data for resolver (itemLevel, levelOffset, etc.)
+            "bonuses_by_id": self.bonuses_by_id,
+            "haste": self.haste,
+            "crit": self.crit,
+            "mastery": self.mastery,
+            "versatility": self.versatility,
+        }
+
+
+_bonus_catalog = None
+_bonus_catalog_lock = threading.Lock()
+
+
+def get_bonus_catalog(refresh=False):
+    """Return the shared BonusCatalog, downloading bonuses.json only on first use or refresh."""
+    global _bonus_catalog
+    with _bonus_catalog_lock:
+        if _bonus_catalog is None or refresh:
+            _bonus_catalog = BonusCatalog(get_raidbots_bonus_ids())
+        return _bonus_catalog
+
+
+def refresh_bonus_catalog():
+    """Download and categorize bonuses.json again, ex: after a game patch."""
+    bonus_catalog = get_bonus_catalog(refresh=True)
+    # cached ilvls were resolved from the old bonus data
+    clear_ilvl_resolution_cache()
+    return bonus_catalog
 
 
 def get_bonus_ids():
@@ -6,60 +104,9 @@ def get_bonus_ids():
     Returns:
         - dict: A dictionary with keys representing bonus categories and values containing bonus IDs matching category criteria.
     Processing Logic:
-        - Identify socket bonuses directly from the bonus_id_dict.
-        - Level bonuses are those with specific key sets indicating an item level addition.
-        - Use "rawStats" to determine other bonus categories such as Leech, Avoidance, Speed, and others.
-        - Aggregate categorized bonus IDs into a consolidated dictionary for easy access.
+        - Reads the shared BonusCatalog so bonuses.json is only downloaded and categorized once.
     """
-    bonus_id_dict = get_raidbots_bonus_ids()
-    # sockets are simple
-    sockets = {k: v for k, v in bonus_id_dict.items() if "socket" in v.keys()}
-
-    # maybe do this in the future, we can rely on the saddlebag api for now
-    # base_level = {k: v["base_level"] for k, v in bonus_id_dict.items() if "base_level" in v.keys()}
-
-    # should be the ilvl added to the items base level
-    ilvl_addition = {
-        k: v["level"]
-        for k, v in bonus_id_dict.items()
-        if list(v.keys()) == ["id", "level"]
-    }
-
-    # post-midnight ilvl: raw bonus data for resolver (itemLevel, levelOffset, etc.)
-    bonuses_by_id = bonus_id_dict
-
-    # the rest are buried in rawStats
-    leech, avoidance, speed = {}, {}, {}
-    haste, crit, mastery, versatility = {}, {}, {}, {}
-    for k, v in bonus_id_dict.items():
-        if "rawStats" in v.keys():
-            for stats in v["rawStats"]:
-                if "Leech" in stats.values():
-                    leech[k] = v
-                if "Avoidance" in stats.values():
-                    avoidance[k] = v
-                if "RunSpeed" in stats.values():
-                    speed[k] = v
-                if "Haste" in stats.values():
-                    haste[k] = v
-                if "Crit" in stats.values():
-                    crit[k] = v
-                if "Mastery" in stats.values():
-                    mastery[k] = v
-                if "Versatility" in stats.values():
-                    versatility[k] = v
-    return {
-        "sockets": sockets,
-        "leech": leech,
-        "avoidance": avoidance,
-        "speed": speed,
-        "ilvl_addition": ilvl_addition,
-        "bonuses_by_id": bonuses_by_id,
-        "haste": haste,
-        "crit": crit,
-        "mastery": mastery,
-        "versatility": versatility,
-    }
+    return get_bonus_catalog().as_dict()
 
 
 def get_bonus_id_sets():
@@ -68,21 +115,14 @@ def get_bonus_id_sets():
     Returns:
         - tuple: A tuple containing sets of IDs for sockets, leech, avoidance, speed, and a list of item level additions.
     Processing Logic:
-        - Extracts bonus IDs from a predefined data structure.
-        - Organizes the IDs into sets based on the bonus type.
-        - Retrieves additional item level bonuses separately."""
-    bonus_ids = get_bonus_ids()
-    # get ids for each bonus type
-    socket_ids = set(bonus_ids["sockets"].keys())
-    leech_ids = set(bonus_ids["leech"].keys())
-    avoidance_ids = set(bonus_ids["avoidance"].keys())
-    speed_ids = set(bonus_ids["speed"].keys())
+        - Reads the id sets prebuilt on the shared BonusCatalog."""
+    bonus_catalog = get_bonus_catalog()
     return (
-        socket_ids,
-        leech_ids,
-        avoidance_ids,
-        speed_ids,
-        bonus_ids["ilvl_addition"],
+        bonus_catalog.socket_ids,
+        bonus_catalog.leech_ids,
+        bonus_catalog.avoidance_ids,
+        bonus_catalog.speed_ids,
+        bonus_catalog.ilvl_addition,
     )  # , bonus_ids["ilvl_base"]
 
 
@@ -92,13 +132,12 @@ def get_secondary_stats():
     Returns:
         - tuple: A tuple containing four sets representing the bonus IDs for 'haste', 'crit', 'mastery', and 'versatility'.
     Processing Logic:
-        - Retrieves raw data for bonus IDs using the `get_bonus_ids()` function.
-        - Extracts bonus type IDs from the raw data and organizes them into sets for easy manipulation and access.
+        - Reads the id sets prebuilt on the shared BonusCatalog.
     """
-    bonus_ids = get_bonus_ids()
-    # get ids for each bonus type
-    haste_ids = set(bonus_ids["haste"].keys())
-    crit_ids = set(bonus_ids["crit"].keys())
-    mastery_ids = set(bonus_ids["mastery"].keys())
-    versatility_ids = set(bonus_ids["versatility"].keys())
-    return haste_ids, crit_ids, mastery_ids, versatility_ids
+    bonus_catalog = get_bonus_catalog()
+    return (
+        bonus_catalog.haste_ids,
+        bonus_catalog.crit_ids,
+        bonus_catalog.mastery_ids,
+        bonus_catalog.versatility_ids,
+    )
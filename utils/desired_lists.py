@@ -0,0 +1,285 @@
+"""
+Desired list normalization.
+
+Turns the raw desired_items / desired_pets / desired_ilvl_list /
+desired_pet_ilvl_list json into the structures the matcher uses. MegaData
+reads the files and env vars, these functions only validate and convert, so
+tools that build an AuctionMatcher without Blizzard credentials (ex: the
+matching benchmark) load the exact same rules.
+"""
+
+from collections import defaultdict
+from utils.api_requests import get_ilvl_items
+from utils.static_data_cache import prune_static_cache
+
+
+def normalize_desired_items(desired_items_raw):
+    # convert to int keys and float values
+    desired_items = {}
+    for k, v in desired_items_raw.items():
+        desired_items[int(k)] = float(v)
+    return desired_items
+
+
+def build_desired_ilvl_list(ilvl_info, use_post_midnight_ilvl=False):
+    """Look up base ilvls for every desired_ilvl_list entry and normalize them."""
+    # Group items by ilvl
+    ilvl_groups = defaultdict(list)
+    broad_groups = []
+    for item in ilvl_info:
+        if "item_ids" not in item or len(item["item_ids"]) == 0:
+            broad_groups.append(item)
+        else:
+            ilvl_groups[item["ilvl"]].append(item["item_ids"])
+
+    DESIRED_ILVL_LIST = []
+
+    # groups with user defined ilvls
+    for ilvl, item_id_groups in ilvl_groups.items():
+        # Flatten the list of item ids
+        all_item_ids = [item_id for group in item_id_groups for item_id in group]
+        item_names, item_ids, base_ilvls, base_required_levels = get_ilvl_items(
+            ilvl, all_item_ids
+        )
+
+        for item in ilvl_info:
+            if item["ilvl"] == ilvl:
+                snipe_info, min_ilvl = normalize_desired_ilvl(
+                    item,
+                    item_names,
+                    base_ilvls,
+                    base_required_levels,
+                    use_post_midnight_ilvl,
+                )
+                DESIRED_ILVL_LIST.append(snipe_info)
+
+    # broad groups
+    if broad_groups:
+        # with a broad group we dont care about ilvl or item_ids
+        # its the same generic info for all of them
+        item_names, item_ids, base_ilvls, base_required_levels = get_ilvl_items()
+        # add the item names an base ilvl to each broad group
+        for item in broad_groups:
+            snipe_info, min_ilvl = normalize_desired_ilvl(
+                item,
+                item_names,
+                base_ilvls,
+                base_required_levels,
+                use_post_midnight_ilvl,
+            )
+            DESIRED_ILVL_LIST.append(snipe_info)
+
+    # every group's request body was fetched above, cached bodies of old groups can go
+    prune_static_cache("ilvl_items")
+
+    return DESIRED_ILVL_LIST
+
+
+def normalize_desired_ilvl(
+    ilvl_info, item_names, base_ilvls, base_required_levels, use_post_midnight_ilvl
+):
+    """Fill defaults and validate one desired_ilvl_list entry.
+    Returns:
+        - tuple: (snipe_info dict used by the matcher, the entry's min ilvl)
+    """
+    # Set default values if not present
+    ilvl_info["item_ids"] = ilvl_info.get("item_ids", [])
+    ilvl_info["required_min_lvl"] = ilvl_info.get("required_min_lvl", 1)
+    ilvl_info["required_max_lvl"] = ilvl_info.get("required_max_lvl", 1000)
+    ilvl_info["max_ilvl"] = ilvl_info.get("max_ilvl", 10000)
+    ilvl_info["bonus_lists"] = ilvl_info.get("bonus_lists", [])
+    ilvl_info["modifier_values"] = ilvl_info.get("modifier_values", [])
+    ilvl_info["modifier_objects"] = ilvl_info.get("modifier_objects", [])
+    ilvl_info["sockets"] = ilvl_info.get("sockets", False)
+    ilvl_info["speed"] = ilvl_info.get("speed", False)
+    ilvl_info["leech"] = ilvl_info.get("leech", False)
+    ilvl_info["avoidance"] = ilvl_info.get("avoidance", False)
+    ilvl_info["crit"] = ilvl_info.get("crit", False)
+    ilvl_info["haste"] = ilvl_info.get("haste", False)
+    ilvl_info["mastery"] = ilvl_info.get("mastery", False)
+    ilvl_info["versatility"] = ilvl_info.get("versatility", False)
+
+    required_keys = {
+        "ilvl",
+        "max_ilvl",
+        "buyout",
+        "sockets",
+        "speed",
+        "leech",
+        "avoidance",
+        "crit",
+        "haste",
+        "mastery",
+        "versatility",
+        "item_ids",
+        "required_min_lvl",
+        "required_max_lvl",
+        "bonus_lists",
+        "modifier_values",
+        "modifier_objects",
+    }
+
+    # Check if all required keys are present
+    missing_keys = required_keys - set(ilvl_info.keys())
+    if missing_keys:
+        raise Exception(
+            f"Error: Missing required keys {missing_keys} in ilvl_info:\n{ilvl_info}"
+        )
+
+    snipe_info = {}
+    bool_vars = [
+        "sockets",
+        "speed",
+        "leech",
+        "avoidance",
+        "crit",
+        "haste",
+        "mastery",
+        "versatility",
+    ]
+    int_vars = [
+        "ilvl",
+        "max_ilvl",
+        "required_min_lvl",
+        "required_max_lvl",
+    ]
+    float_vars = ["buyout"]
+    for key, value in ilvl_info.items():
+        if key in bool_vars:
+            if isinstance(ilvl_info[key], bool):
+                snipe_info[key] = value
+            else:
+                raise Exception(f"error in ilvl info '{key}' must be true or false")
+        elif key in int_vars:
+            if isinstance(ilvl_info[key], int):
+                snipe_info[key] = value
+            else:
+                raise Exception(f"error in ilvl info '{key}' must be an int")
+        elif key in float_vars:
+            # buyout can be a float or an int
+            if isinstance(ilvl_info[key], float) or isinstance(ilvl_info[key], int):
+                snipe_info[key] = value
+            else:
+                raise Exception(f"error in ilvl info '{key}' must be a float")
+
+    # optional per rule discord webhook, overrides WEBHOOK_ROUTES
+    if "webhook" in ilvl_info:
+        if isinstance(ilvl_info["webhook"], str) and ilvl_info["webhook"]:
+            snipe_info["webhook"] = ilvl_info["webhook"]
+        else:
+            raise Exception("error in ilvl info 'webhook' must be a webhook url")
+
+    # Validate bonus lists are integers
+    if ilvl_info["bonus_lists"] != [] and not all(
+        isinstance(x, int) for x in ilvl_info["bonus_lists"]
+    ):
+        raise Exception("error in ilvl info 'bonus_lists' must contain only integers")
+    if ilvl_info["modifier_values"] != [] and not all(
+        isinstance(x, int) for x in ilvl_info["modifier_values"]
+    ):
+        raise Exception(
+            "error in ilvl info 'modifier_values' must contain only integers"
+        )
+    if ilvl_info["modifier_objects"] != []:
+        if not all(isinstance(x, dict) for x in ilvl_info["modifier_objects"]):
+            raise Exception(
+                "error in ilvl info 'modifier_objects' must contain only objects"
+            )
+        for obj in ilvl_info["modifier_objects"]:
+            if not isinstance(obj.get("type"), int) or not isinstance(
+                obj.get("value"), int
+            ):
+                raise Exception(
+                    "error in ilvl info 'modifier_objects' entries must include int 'type' and int 'value'"
+                )
+
+    if ilvl_info["item_ids"] == []:
+        snipe_info["item_names"] = item_names
+        snipe_info["item_ids"] = set(item_names.keys())
+        snipe_info["base_ilvls"] = {} if use_post_midnight_ilvl else base_ilvls
+        snipe_info["base_required_levels"] = base_required_levels
+        snipe_info["bonus_lists"] = ilvl_info["bonus_lists"]
+        snipe_info["modifier_values"] = ilvl_info["modifier_values"]
+        snipe_info["modifier_objects"] = ilvl_info["modifier_objects"]
+    else:
+        snipe_info["item_names"] = {
+            item_id: item_names.get(item_id, "foobar")
+            for item_id in ilvl_info["item_ids"]
+        }
+        snipe_info["item_ids"] = set(ilvl_info["item_ids"])
+        if use_post_midnight_ilvl:
+            snipe_info["base_ilvls"] = {}
+        else:
+            snipe_info["base_ilvls"] = {
+                item_id: base_ilvls.get(item_id, 1) for item_id in ilvl_info["item_ids"]
+            }
+        snipe_info["base_required_levels"] = {
+            item_id: base_required_levels.get(item_id, 1)
+            for item_id in ilvl_info["item_ids"]
+        }
+        snipe_info["bonus_lists"] = ilvl_info["bonus_lists"]
+        snipe_info["modifier_values"] = ilvl_info["modifier_values"]
+        snipe_info["modifier_objects"] = ilvl_info["modifier_objects"]
+
+    return snipe_info, ilvl_info["ilvl"]
+
+
+def build_ilvl_index(desired_ilvl_list):
+    """item_id -> ilvl rules that apply to it, one lookup per auction instead of scanning every rule."""
+    # rules keep their DESIRED_ILVL_LIST order so alerts come out the same as before
+    ilvl_index = defaultdict(list)
+    for desired_ilvl_item in desired_ilvl_list:
+        for item_id in desired_ilvl_item["item_ids"]:
+            ilvl_index[item_id].append(desired_ilvl_item)
+    return dict(ilvl_index)
+
+
+def build_pet_ilvl_index(desired_pet_ilvl_list):
+    """pet species id -> pet level rules for that species."""
+    # several rules per species are allowed, checked in DESIRED_PET_ILVL_LIST order
+    pet_ilvl_index = defaultdict(list)
+    for desired_pet in desired_pet_ilvl_list:
+        pet_ilvl_index[desired_pet["petID"]].append(desired_pet)
+    return dict(pet_ilvl_index)
+
+
+def normalize_desired_pet_ilvl_list(pet_ilvl_info):
+    """Validate desired_pet_ilvl_list entries and convert their types."""
+    # Validate and process each pet entry
+    processed_pet_list = []
+    for pet in pet_ilvl_info:
+        pet["minQuality"] = int(pet.get("minQuality", -1))
+        pet["excludeBreeds"] = list(pet.get("excludeBreeds", []))
+        if not all(
+            key in pet
+            for key in ["petID", "price", "minLevel", "minQuality", "excludeBreeds"]
+        ):
+            raise Exception(
+                f"Error: Each pet entry must contain 'petID', 'price', 'minLevel', 'minQuality', 'excludeBreeds'. Found: {pet}"
+            )
+
+        # Validate types and convert as needed
+        processed_pet = {
+            "petID": int(pet["petID"]),  # Match the API's
+            "price": int(pet["price"]),
+            "minLevel": int(pet["minLevel"]),  # Handle both string and int inputs
+            "minQuality": pet["minQuality"],
+            "excludeBreeds": [int(breed) for breed in pet["excludeBreeds"]],
+        }
+        # optional per rule discord webhook, overrides WEBHOOK_ROUTES
+        if pet.get("webhook"):
+            processed_pet["webhook"] = str(pet["webhook"])
+
+        # Validate value ranges
+        if not (1 <= processed_pet["minLevel"] <= 25):
+            raise Exception(
+                f"Error: minLevel must be between 1 and 25. Found: {processed_pet['minLevel']}"
+            )
+        if processed_pet["price"] <= 0:
+            raise Exception(
+                f"Error: price must be greater than 0. Found: {processed_pet['price']}"
+            )
+
+        processed_pet_list.append(processed_pet)
+
+    return processed_pet_list
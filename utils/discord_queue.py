@@ -0,0 +1,190 @@
+"""
+Discord delivery queue.
+
+Scan workers used to post every alert embed inline, so a slow or rate limited
+webhook held up the thread that should be downloading the next realm. With
+"DISCORD_WORKERS": N (default 1) scanners only put() embeds here and N worker
+threads deliver them. Embeds waiting for the same webhook are coalesced into
+one POST (up to 10 embeds and 6000 characters per message), each webhook keeps its own
+rate limit and retry state from Discord's X-RateLimit-* / Retry-After headers,
+and only one request per webhook is in flight at a time.
+"""
+
+import threading
+import time
+from collections import deque
+import requests
+from utils.helpers import (
+    DISCORD_MAX_EMBEDS,
+    DISCORD_MAX_MESSAGE_CHARS,
+    embed_length,
+    split_embed,
+)
+from utils.log_writer import log_info
+from utils.rate_limiter import parse_retry_after
+
+DISCORD_TIMEOUT = 10
+# failed posts (network errors, 5xx) are retried this many times with backoff, then dropped
+DISCORD_MAX_ATTEMPTS = 5
+DISCORD_RETRY_MAX_SECONDS = 60
+
+
+class _WebhookState:
+    def __init__(self):
+        self.pending = deque()
+        # monotonic time before which nothing is sent to this webhook
+        self.blocked_until = 0
+        # embeds in the request being sent right now, one request per webhook at a time
+        self.in_flight = 0
+        self.failures = 0
+
+
+class DiscordDeliveryQueue:
+    """Worker threads posting queued embeds to their webhooks."""
+
+    def __init__(self, workers=1, session=None):
+        self.session = session or requests.Session()
+        # webhook url -> _WebhookState
+        self._webhooks = {}
+        # a global 429 pauses every webhook
+        self._global_blocked_until = 0
+        self._running = True
+        self._cond = threading.Condition()
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"discord-{i}", daemon=True)
+            for i in range(max(workers, 1))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def put(self, webhook_url, embed):
+        with self._cond:
+            state = self._webhooks.setdefault(webhook_url, _WebhookState())
+            # oversized embeds are split here so every queued embed fits in a message
+            state.pending.extend(split_embed(embed))
+            self._cond.notify()
+
+    def pending(self):
+        with self._cond:
+            return sum(
+                len(state.pending) + state.in_flight
+                for state in self._webhooks.values()
+            )
+
+    def stop(self, timeout=30):
+        """Stop taking work once everything queued is delivered or timeout passes."""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(deadline - time.monotonic(), 0))
+        left = self.pending()
+        if left:
+            print(f"discord queue stopped with {left} embeds not delivered")
+
+    def _next_batch(self):
+        """Under the lock: (url, state, embeds) for a webhook that can send, or the seconds to wait."""
+        now = time.monotonic()
+        wait = None
+        for webhook_url, state in self._webhooks.items():
+            if state.in_flight or not state.pending:
+                continue
+            blocked_until = max(state.blocked_until, self._global_blocked_until)
+            if blocked_until > now:
+                if wait is None or blocked_until - now < wait:
+                    wait = blocked_until - now
+                continue
+            # coalesce whatever is waiting for this webhook into one message
+            embeds = [state.pending.popleft()]
+            length = embed_length(embeds[0])
+            while state.pending and len(embeds) < DISCORD_MAX_EMBEDS:
+                next_length = embed_length(state.pending[0])
+                if length + next_length > DISCORD_MAX_MESSAGE_CHARS:
+                    break
+                embeds.append(state.pending.popleft())
+                length += next_length
+            state.in_flight = len(embeds)
+            return (webhook_url, state, embeds), None
+        return None, wait
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while True:
+                    batch, wait = self._next_batch()
+                    if batch:
+                        break
+                    # only exit once nothing is left that this worker could send
+                    if not self._running and wait is None:
+                        return
+                    self._cond.wait(wait)
+            self._deliver(*batch)
+
+    def _deliver(self, webhook_url, state, embeds):
+        response = None
+        try:
+            log_info(f"sending {len(embeds)} embeds to discord...")
+            response = self.session.post(
+                webhook_url, json={"embeds": embeds}, timeout=DISCORD_TIMEOUT
+            )
+        except requests.RequestException as ex:
+            print(f"Error sending Discord message: {ex}")
+
+        with self._cond:
+            state.in_flight = 0
+            now = time.monotonic()
+            if response is not None:
+                self._apply_rate_limit_headers(state, response, now)
+
+            if response is not None and response.status_code in (200, 204):
+                log_info(f"Embed sent successfully")
+                state.failures = 0
+            elif response is not None and response.status_code == 429:
+                # rate limited, not a failure: send the same embeds again first
+                state.pending.extendleft(reversed(embeds))
+            elif response is not None and response.status_code < 500:
+                # bad request / bad webhook, sending it again would fail the same way
+                print(
+                    f"Failed to send embed to discord: {response.status_code} - {response.text}"
+                )
+            else:
+                state.failures += 1
+                if state.failures < DISCORD_MAX_ATTEMPTS:
+                    state.pending.extendleft(reversed(embeds))
+                    state.blocked_until = max(
+                        state.blocked_until,
+                        now + min(2**state.failures, DISCORD_RETRY_MAX_SECONDS),
+                    )
+                else:
+                    print(
+                        f"Dropping {len(embeds)} embeds after {state.failures} failed attempts"
+                    )
+                    state.failures = 0
+            self._cond.notify_all()
+
+    def _apply_rate_limit_headers(self, state, response, now):
+        headers = response.headers
+        if response.status_code == 429:
+            retry_after = parse_retry_after(headers.get("Retry-After"))
+            is_global = headers.get("X-RateLimit-Global", "").lower() == "true"
+            try:
+                body = response.json()
+                retry_after = float(body.get("retry_after", retry_after))
+                is_global = is_global or bool(body.get("global"))
+            except (ValueError, TypeError, AttributeError):
+                pass
+            retry_after = retry_after if retry_after is not None else 1
+            print(f"discord rate limited, retrying in {retry_after} seconds")
+            if is_global:
+                self._global_blocked_until = max(
+                    self._global_blocked_until, now + retry_after
+                )
+            else:
+                state.blocked_until = max(state.blocked_until, now + retry_after)
+            return
+        # out of requests in this bucket: hold the webhook until it resets
+        if headers.get("X-RateLimit-Remaining") == "0":
+            reset_after = parse_retry_after(headers.get("X-RateLimit-Reset-After"))
+            if reset_after:
+                state.blocked_until = max(state.blocked_until, now + reset_after)
@@ -57,3 +57,70 @@ def create_embed(title, description, fields):
 
 def split_list(lst, max_size):
     return [lst[i : i + max_size] for i in range(0, len(lst), max_size)]
+
+
+# discord webhook message limits
+DISCORD_MAX_EMBEDS = 10
+DISCORD_MAX_EMBED_FIELDS = 25
+# total characters across all embeds of one message
+DISCORD_MAX_MESSAGE_CHARS = 6000
+
+
+def embed_length(embed):
+    """Characters Discord counts toward the 6000 per message limit."""
+    length = len(embed.get("title", "")) + len(embed.get("description", ""))
+    length += len(embed.get("footer", {}).get("text", ""))
+    length += len(embed.get("author", {}).get("name", ""))
+    for field in embed.get("fields", []):
+        length += len(field.get("name", "")) + len(field.get("value", ""))
+    return length
+
+
+def split_embed(embed):
+    """Split an embed over Discord's field or character limits into embeds with the same header."""
+    fields = embed.get("fields", [])
+    if (
+        len(fields) <= DISCORD_MAX_EMBED_FIELDS
+        and embed_length(embed) <= DISCORD_MAX_MESSAGE_CHARS
+    ):
+        return [embed]
+    header_length = embed_length({**embed, "fields": []})
+    parts, part_fields, length = [], [], header_length
+    for field in fields:
+        field_length = len(field.get("name", "")) + len(field.get("value", ""))
+        if part_fields and (
+            len(part_fields) == DISCORD_MAX_EMBED_FIELDS
+            or length + field_length > DISCORD_MAX_MESSAGE_CHARS
+        ):
+            parts.append({**embed, "fields": part_fields})
+            part_fields, length = [], header_length
+        part_fields.append(field)
+        length += field_length
+    parts.append({**embed, "fields": part_fields})
+    return parts
+
+
+def pack_embeds(embeds):
+    """Group embeds into as few webhook messages as Discord's limits allow.
+    Parameters:
+        - embeds (list): Embed dicts in the order they should be sent.
+    Returns:
+        - list: Lists of embeds, each at most 10 embeds and 6000 characters.
+    Processing Logic:
+        - Embeds that are too big on their own are split by fields first.
+        - Order is kept, a message is closed as soon as the next embed does not fit."""
+    messages, message, length = [], [], 0
+    for embed in embeds:
+        for part in split_embed(embed):
+            part_length = embed_length(part)
+            if message and (
+                len(message) == DISCORD_MAX_EMBEDS
+                or length + part_length > DISCORD_MAX_MESSAGE_CHARS
+            ):
+                messages.append(message)
+                message, length = [], 0
+            message.append(part)
+            length += part_length
+    if message:
+        messages.append(message)
+    return messages
@@ -4,8 +4,17 @@ Post-midnight ilvl resolver.
 Computes item level from item_id, bonus_lists, and optional drop_level using
 Raidbots bonuses.json, equippable-items.json, item-curves.json, and item-squish-era.json.
 See plan §4.3 for pseudo-code.
+
+The same bonus combinations repeat across realms, so scans go through
+ilvl_resolution_cache which remembers results per (item_id, bonus_lists, drop_level).
 """
 
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+
+ILVL_CACHE_MAX_SIZE = 100000
+
 
 def _get_base_item_level(item_id, equippable_items):
     """Get DBC base item level from equippable-items. Returns None if missing."""
@@ -31,47 +40,84 @@ def _get_base_item_level(item_id, equippable_items):
     return None
 
 
+class ItemCurve:
+    """One item-curves.json curve pre-parsed into sorted x / y arrays."""
+
+    __slots__ = ("xs", "ys")
+
+    def __init__(self, xs, ys):
+        self.xs = xs
+        self.ys = ys
+
+    def apply(self, value):
+        """Interpolate value on the curve, values outside the curve come back unchanged."""
+        xs, ys = self.xs, self.ys
+        try:
+            if not xs[0] <= value <= xs[-1]:
+                return value
+            # first point at or above value
+            i = bisect_left(xs, value)
+            if i == 0:
+                return ys[0]
+            t = (value - xs[i - 1]) / (xs[i] - xs[i - 1]) if xs[i] != xs[i - 1] else 1
+            return int(ys[i - 1] + t * (ys[i] - ys[i - 1]))
+        except (TypeError, IndexError, ZeroDivisionError):
+            return value
+
+
+def _compile_curve(c):
+    """Parse one raw curve into an ItemCurve, None if it has fewer than 2 usable points."""
+    if not isinstance(c, dict):
+        return None
+    # Raidbots: points use playerLevel (input) / itemLevel (output); era curve maps ilvl -> scaled ilvl
+    points = c.get("points") or c.get("curve") or []
+    if not isinstance(points, list) or len(points) < 2:
+        return None
+    pairs = []
+    for p in points:
+        if isinstance(p, (list, tuple)):
+            pairs.append((p[0], p[1]))
+        elif isinstance(p, dict):
+            x = p.get("playerLevel") or p.get("x")
+            y = p.get("itemLevel") or p.get("y")
+            if x is not None and y is not None:
+                pairs.append((x, y))
+    if len(pairs) < 2:
+        return None
+    try:
+        # stable sort keeps the file order of equal x points
+        pairs.sort(key=lambda pair: pair[0])
+    except TypeError:
+        return None
+    return ItemCurve(tuple(x for x, _ in pairs), tuple(y for _, y in pairs))
+
+
+def compile_item_curves(item_curves):
+    """Pre-parse item-curves.json once at load: { str(curve_id): ItemCurve }."""
+    if not isinstance(item_curves, dict):
+        return {}
+    compiled = {}
+    for curve_id, c in item_curves.items():
+        curve = c if isinstance(c, ItemCurve) else _compile_curve(c)
+        if curve is not None:
+            compiled[str(curve_id)] = curve
+    return compiled
+
+
 def _apply_curve(value, curve_id, item_curves):
-    """Apply curve from item-curves.json to value. Returns value unchanged if missing."""
+    """Apply curve from item-curves.json to value. Returns value unchanged if missing.
+
+    item_curves should come from compile_item_curves, raw curves are parsed on the fly.
+    """
     if not item_curves or curve_id is None:
         return value
     c = item_curves.get(str(curve_id)) if isinstance(item_curves, dict) else None
     if not c:
         return value
-    # Raidbots: points use playerLevel (input) / itemLevel (output); era curve maps ilvl -> scaled ilvl
-    points = c.get("points") or c.get("curve") or []
-    if isinstance(points, list) and len(points) >= 2:
-        try:
-            xs = []
-            ys = []
-            for p in points:
-                if isinstance(p, (list, tuple)):
-                    xs.append(p[0])
-                    ys.append(p[1])
-                elif isinstance(p, dict):
-                    x = p.get("playerLevel") or p.get("x")
-                    y = p.get("itemLevel") or p.get("y")
-                    if x is not None and y is not None:
-                        xs.append(x)
-                        ys.append(y)
-            if len(xs) < 2 or len(ys) < 2:
-                return value
-            if min(xs) <= value <= max(xs):
-                # Nearest or interpolate; keep simple
-                for i, x in enumerate(xs):
-                    if value <= x:
-                        if i == 0:
-                            return ys[0]
-                        t = (
-                            (value - xs[i - 1]) / (x - xs[i - 1])
-                            if x != xs[i - 1]
-                            else 1
-                        )
-                        return int(ys[i - 1] + t * (ys[i] - ys[i - 1]))
-                return ys[-1]
-        except (TypeError, IndexError, ZeroDivisionError):
-            pass
-    return value
+    curve = c if isinstance(c, ItemCurve) else _compile_curve(c)
+    if curve is None:
+        return value
+    return curve.apply(value)
 
 
 def resolve_post_midnight_ilvl(
@@ -187,3 +233,93 @@ def resolve_post_midnight_ilvl(
         item_level += int(amt)
 
     return item_level
+
+
+class IlvlResolutionCache:
+    """Bounded LRU cache around resolve_post_midnight_ilvl with hit / miss counters.
+
+    Keyed on (item_id, tuple(bonus_lists), drop_level). Bonus order is kept in the key
+    because equal priority ops and duplicate ids can resolve differently. The Raidbots
+    data is assumed fixed, call clear() whenever it is refreshed.
+    """
+
+    def __init__(self, max_size=ILVL_CACHE_MAX_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def resolve(
+        self,
+        item_id,
+        bonus_lists,
+        drop_level,
+        bonuses_by_id,
+        equippable_items,
+        item_curves,
+        item_squish_era,
+    ):
+        key = (item_id, tuple(bonus_lists or ()), drop_level)
+        with self._lock:
+            if key in self._results:
+                self.hits += 1
+                self._results.move_to_end(key)
+                return self._results[key]
+        item_level = resolve_post_midnight_ilvl(
+            item_id,
+            bonus_lists,
+            drop_level,
+            bonuses_by_id,
+            equippable_items,
+            item_curves,
+            item_squish_era,
+        )
+        with self._lock:
+            self.misses += 1
+            self._results[key] = item_level
+            if len(self._results) > self.max_size:
+                self._results.popitem(last=False)
+        return item_level
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._results),
+            }
+
+
+ilvl_resolution_cache = IlvlResolutionCache()
+
+
+def resolve_post_midnight_ilvl_cached(
+    item_id,
+    bonus_lists,
+    drop_level,
+    bonuses_by_id,
+    equippable_items,
+    item_curves,
+    item_squish_era,
+):
+    """resolve_post_midnight_ilvl through the shared ilvl_resolution_cache."""
+    return ilvl_resolution_cache.resolve(
+        item_id,
+        bonus_lists,
+        drop_level,
+        bonuses_by_id,
+        equippable_items,
+        item_curves,
+        item_squish_era,
+    )
+
+
+def clear_ilvl_resolution_cache():
+    ilvl_resolution_cache.clear()
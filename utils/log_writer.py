@@ -0,0 +1,206 @@
+"""
+Buffered, rotating stdout / stderr log file.
+
+StreamToFile used to open the log in append mode, write and close it for every
+print, so every scan thread paid a file open and close per line. Now the file
+stays open, prints are collected in memory under a lock and a background thread
+writes them out every LOG_FLUSH_SECONDS (sooner once LOG_BUFFER_BYTES is
+waiting, right away on flush()). The log is rotated to .1, .2, ... once it
+passes "LOG_MAX_MB" or is older than "LOG_ROTATE_HOURS", keeping "LOG_BACKUPS"
+old files.
+
+"LOG_LEVEL" sets how much is printed:
+- "debug": everything, including per match details and the full Blizzard
+  response headers on every AH timer update
+- "info" (default): one line per realm pulled or skipped and per discord post
+- "warning": only alerts found, cycle summaries and errors
+Lines printed with log_info() / log_debug() are dropped below their level.
+"""
+
+import atexit, os, sys, threading, time
+from datetime import datetime
+
+LOG_LEVELS = ["debug", "info", "warning"]
+LOG_FLUSH_SECONDS = 2
+# write out early when this much is waiting, so a burst of alerts does not pile up in memory
+LOG_BUFFER_BYTES = 64 * 1024
+
+_log_level = "info"
+# every open log, configure_logging() applies mega_data.json settings to all of them
+_writers = []
+
+
+def configure_logging(level="info", max_mb=None, backups=None, rotate_hours=None):
+    """Apply the LOG_* settings, None leaves a setting as it was."""
+    global _log_level
+    _log_level = level if level in LOG_LEVELS else "info"
+    for writer in list(_writers):
+        writer.configure(max_mb, backups, rotate_hours)
+
+
+def log_level():
+    return _log_level
+
+
+def debug_logging():
+    return _log_level == "debug"
+
+
+def log_debug(message):
+    if _log_level == "debug":
+        print(message)
+
+
+def log_info(message):
+    """Per realm / per post status lines, hidden at LOG_LEVEL warning."""
+    if _log_level != "warning":
+        print(message)
+
+
+class StreamToFile:
+    """Echoes stdout / stderr to the terminal and buffers them into a log file."""
+
+    def __init__(self, filepath, max_mb=10, backups=5, rotate_hours=24):
+        self.filepath = filepath
+        self.terminal_out = sys.stdout
+        self.terminal_err = sys.stderr
+        self.max_bytes = max_mb * 1024 * 1024
+        self.backups = backups
+        self.rotate_seconds = rotate_hours * 60 * 60
+        self._buffer = []
+        self._buffer_size = 0
+        # _lock guards the buffer, _file_lock the file so prints never wait on disk writes
+        self._lock = threading.Lock()
+        self._file_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        # set when the log could not be reopened after a rotation, the next flush retries
+        self._reopen_failed = False
+        # Ensure log directory exists
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        # Clear previous log file
+        self._open("w")
+
+        self._flusher = threading.Thread(
+            target=self._flush_loop, name="log-flush", daemon=True
+        )
+        self._flusher.start()
+        _writers.append(self)
+        atexit.register(self.close)
+
+        # Redirect both stdout and stderr
+        sys.stdout = self
+        sys.stderr = self
+
+    def configure(self, max_mb=None, backups=None, rotate_hours=None):
+        if max_mb is not None:
+            self.max_bytes = max_mb * 1024 * 1024
+        if backups is not None:
+            self.backups = backups
+        if rotate_hours is not None:
+            self.rotate_seconds = rotate_hours * 60 * 60
+
+    def write(self, text):
+        self.terminal_out.write(text)
+        with self._lock:
+            if self._closed:
+                return
+            self._buffer.append(text)
+            self._buffer_size += len(text)
+            if self._buffer_size >= LOG_BUFFER_BYTES:
+                self._wake.set()
+
+    def flush(self):
+        # sys.stdout.flush() / print(flush=True) mean the text should be on disk now
+        self.terminal_out.flush()
+        self.terminal_err.flush()
+        self._try_flush_to_file()
+
+    def flush_to_file(self):
+        """Write everything buffered so far, rotating first if the log is due."""
+        with self._file_lock:
+            with self._lock:
+                text = "".join(self._buffer)
+                self._buffer = []
+                self._buffer_size = 0
+            if self._reopen_failed:
+                self._reopen("a")
+            if not text or self._file is None:
+                return
+            if self._should_rotate():
+                self._rotate()
+                if self._file is None:
+                    return
+            self._file.write(text)
+            self._file.flush()
+
+    def close(self):
+        """Flush what is left and stop writing, prints after this only reach the terminal."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._wake.set()
+        self._flusher.join(LOG_FLUSH_SECONDS)
+        self._try_flush_to_file()
+        with self._file_lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        if self in _writers:
+            _writers.remove(self)
+
+    def _flush_loop(self):
+        while not self._closed:
+            self._wake.wait(LOG_FLUSH_SECONDS)
+            self._wake.clear()
+            self._try_flush_to_file()
+
+    def _try_flush_to_file(self):
+        try:
+            self.flush_to_file()
+        except (OSError, ValueError) as ex:
+            # disk full or the file was removed, keep echoing to the terminal
+            self.terminal_err.write(f"error writing log file {self.filepath}: {ex}\n")
+
+    def _open(self, mode):
+        self._file = open(self.filepath, mode, encoding="utf-8")
+        self._opened_at = time.time()
+        if mode == "w":
+            self._file.write(f"=== Log started at {datetime.now()} ===\n")
+            self._file.flush()
+
+    def _should_rotate(self):
+        if self.max_bytes and self._file.tell() >= self.max_bytes:
+            return True
+        return bool(
+            self.rotate_seconds and time.time() - self._opened_at >= self.rotate_seconds
+        )
+
+    def _rotate(self):
+        # log.txt -> log.txt.1 -> log.txt.2 ..., the oldest past LOG_BACKUPS is deleted
+        self._file.close()
+        # never leave the closed file behind, writing to it would kill the flush thread
+        self._file = None
+        mode = "w"
+        try:
+            if self.backups > 0:
+                for i in range(self.backups - 1, 0, -1):
+                    older = f"{self.filepath}.{i}"
+                    if os.path.exists(older):
+                        os.replace(older, f"{self.filepath}.{i + 1}")
+                os.replace(self.filepath, f"{self.filepath}.1")
+        except OSError as ex:
+            # another program has the file open (windows), keep appending to it
+            self.terminal_err.write(f"error rotating log file {self.filepath}: {ex}\n")
+            mode = "a"
+        self._reopen(mode)
+
+    def _reopen(self, mode):
+        try:
+            self._open(mode)
+            self._reopen_failed = False
+        except OSError as ex:
+            self._file = None
+            self._reopen_failed = True
+            self.terminal_err.write(f"error reopening log file {self.filepath}: {ex}\n")
@@ -1,23 +1,41 @@
 #!/usr/bin/python3
 from __future__ import print_function
-import json, requests, os, time
+import copy, json, requests, os, time
 from datetime import datetime
+from email.utils import parsedate_to_datetime
 from tenacity import retry, stop_after_attempt, retry_if_exception_type
 from utils.api_requests import (
     send_discord_message,
     get_itemnames,
-    get_ilvl_items,
     send_embed_discord,
+    send_embeds_discord,
     get_pet_names_backup,
     get_petnames,
     get_update_timers_backup,
     get_raidbots_equippable_items,
     get_raidbots_item_curves,
     get_raidbots_item_squish_era,
+    create_blizzard_session,
 )
-from utils.bonus_ids import get_bonus_id_sets, get_bonus_ids
+from utils.bonus_ids import get_bonus_catalog
 from utils.helpers import get_wow_russian_realm_ids
-from collections import defaultdict
+from utils.ilvl_resolver import compile_item_curves
+from utils.realm_scheduler import UPLOAD_HISTORY_SIZE
+from utils.desired_lists import (
+    normalize_desired_items,
+    build_desired_ilvl_list,
+    normalize_desired_pet_ilvl_list,
+    build_ilvl_index,
+    build_pet_ilvl_index,
+)
+from utils.rate_limiter import BlizzardRequestScheduler, order_by_upload_minute
+from utils.discord_queue import DiscordDeliveryQueue
+from utils.auction_stream import AuctionStreamFilter, STREAM_CHUNK_SIZE
+from utils.log_writer import LOG_LEVELS, debug_logging, log_info
+
+WOW_REGIONS = ["EU", "NA", "NACLASSIC", "NASODCLASSIC", "EUCLASSIC", "EUSODCLASSIC"]
+# alert categories WEBHOOK_ROUTES can send to their own channel
+WEBHOOK_ROUTE_CATEGORIES = ["items", "pets", "ilvl", "pet_ilvl", "commodities", "token"]
 
 
 class MegaData:
@@ -52,6 +70,23 @@ class MegaData:
         self.DEBUG = self.__set_mega_vars("DEBUG", raw_mega_data)
         self.NO_LINKS = self.__set_mega_vars("NO_LINKS", raw_mega_data)
         self.TOKEN_PRICE = self.__set_mega_vars("TOKEN_PRICE", raw_mega_data)
+        self.SCAN_ENGINE = self.__set_mega_vars("SCAN_ENGINE", raw_mega_data)
+        self.POLL_MODE = self.__set_mega_vars("POLL_MODE", raw_mega_data)
+        self.FRESHNESS_PROBE = self.__set_mega_vars("FRESHNESS_PROBE", raw_mega_data)
+        self.MATCH_PROCESSES = self.__set_mega_vars("MATCH_PROCESSES", raw_mega_data)
+        self.STREAM_AUCTIONS = self.__set_mega_vars("STREAM_AUCTIONS", raw_mega_data)
+        self.VECTOR_PREFILTER = self.__set_mega_vars("VECTOR_PREFILTER", raw_mega_data)
+        self.ALERT_TTL_MINUTES = self.__set_mega_vars(
+            "ALERT_TTL_MINUTES", raw_mega_data
+        )
+        self.DISCORD_WORKERS = self.__set_mega_vars("DISCORD_WORKERS", raw_mega_data)
+        self.ALERT_RECORD_FILE = self.__set_mega_vars(
+            "ALERT_RECORD_FILE", raw_mega_data
+        )
+        self.LOG_LEVEL = self.__set_mega_vars("LOG_LEVEL", raw_mega_data)
+        self.LOG_MAX_MB = self.__set_mega_vars("LOG_MAX_MB", raw_mega_data)
+        self.LOG_BACKUPS = self.__set_mega_vars("LOG_BACKUPS", raw_mega_data)
+        self.LOG_ROTATE_HOURS = self.__set_mega_vars("LOG_ROTATE_HOURS", raw_mega_data)
 
         # set required env vars
         self.WOW_CLIENT_ID = self.__set_mega_vars("WOW_CLIENT_ID", raw_mega_data, True)
@@ -60,16 +95,31 @@ class MegaData:
         )
         self.WEBHOOK_URL = self.__set_mega_vars("MEGA_WEBHOOK_URL", raw_mega_data, True)
         self.REGION = self.__set_mega_vars("WOW_REGION", raw_mega_data, True)
+        # every region this process scans, WOW_REGION first
+        self.WOW_REGIONS = [self.REGION] + [
+            region
+            for region in self.__set_mega_vars("WOW_REGIONS", raw_mega_data)
+            if region != self.REGION
+        ]
+        # category -> webhook url, anything not routed goes to MEGA_WEBHOOK_URL
+        self.WEBHOOK_ROUTES = self.__set_mega_vars("WEBHOOK_ROUTES", raw_mega_data)
 
-        # classic regions dont have undermine exchange
-        if "CLASSIC" in self.REGION:
-            self.WOWHEAD_LINK = True
-            self.FACTION = self.__set_mega_vars("FACTION", raw_mega_data)
-        else:
-            self.WOWHEAD_LINK = self.__set_mega_vars("WOWHEAD_LINK", raw_mega_data)
-            self.FACTION = "all"
+        # kept for for_region(), classic and retail regions use them differently
+        self.__wowhead_link_setting = self.__set_mega_vars(
+            "WOWHEAD_LINK", raw_mega_data
+        )
+        self.__faction_setting = self.__set_mega_vars("FACTION", raw_mega_data)
+        self.__set_region_links()
 
         self.WOW_SERVER_NAMES = self.__set_realm_names()
+        # one keep-alive connection pool shared by every blizzard call and scan thread
+        self.session = create_blizzard_session(self.THREADS)
+        # shared token buckets sized to blizzard's per second and per hour quotas
+        self.request_scheduler = BlizzardRequestScheduler()
+        # alert embeds are delivered off the scan threads
+        self.discord_queue = None
+        if self.DISCORD_WORKERS:
+            self.discord_queue = DiscordDeliveryQueue(self.DISCORD_WORKERS)
         # set access token for wow api
         self.access_token_creation_unix_time = 0
         self.access_token = self.check_access_token()
@@ -92,11 +142,16 @@ class MegaData:
         )
         self.__validate_snipe_lists()
 
+        # item_id -> ilvl rules that apply to it, one lookup per auction instead of scanning every rule
+        self.DESIRED_ILVL_INDEX = build_ilvl_index(self.DESIRED_ILVL_LIST)
+        # pet species id -> pet level rules for that species
+        self.DESIRED_PET_ILVL_INDEX = build_pet_ilvl_index(self.DESIRED_PET_ILVL_LIST)
+
         ## should do this here and only get the names of desired items to limit data
         # get name dictionaries
         self.ITEM_NAMES = self.__set_item_names()
         try:
-            self.PET_NAMES = get_petnames(self.access_token)
+            self.PET_NAMES = get_petnames(self.access_token, self.session)
         except Exception as ex:
             # it's better to avoid using saddlebag apis if possible
             print(
@@ -105,24 +160,16 @@ class MegaData:
             self.PET_NAMES = get_pet_names_backup()
 
         # get static lists of ALL bonus id values from raidbots, note this is the index for all ilvl gear
-        (
-            self.socket_ids,
-            self.leech_ids,
-            self.avoidance_ids,
-            self.speed_ids,
-            self.ilvl_addition,
-            # self.ilvl_base,
-        ) = get_bonus_id_sets()
-
-        self.bonuses_by_id = {}
+        # bonuses.json is downloaded and categorized once and shared through the catalog
+        self.__set_bonus_data(get_bonus_catalog())
+
         self.equippable_items = {}
         self.item_curves = {}
         self.item_squish_era = {}
         if self.USE_POST_MIDNIGHT_ILVL:
-            bonus_data = get_bonus_ids()
-            self.bonuses_by_id = bonus_data.get("bonuses_by_id", {})
             self.equippable_items = get_raidbots_equippable_items()
-            self.item_curves = get_raidbots_item_curves()
+            # parsed once into sorted curve tables for the resolver
+            self.item_curves = compile_item_curves(get_raidbots_item_curves())
             self.item_squish_era = get_raidbots_item_squish_era()
 
         # get item names from desired ilvl entries
@@ -140,6 +187,40 @@ class MegaData:
         # # no longer need this it works better without using upload timers from the api
         # self.upload_timers = get_update_timers_backup(self.REGION, self.NO_RUSSIAN_REALMS)
 
+    def __set_region_links(self):
+        # classic regions dont have undermine exchange
+        if "CLASSIC" in self.REGION:
+            self.WOWHEAD_LINK = True
+            self.FACTION = self.__faction_setting
+        else:
+            self.WOWHEAD_LINK = self.__wowhead_link_setting
+            self.FACTION = "all"
+
+    def for_region(self, region):
+        """Shallow copy of this MegaData that scans another region.
+        The desired lists, item / pet names, bonus and ilvl data, blizzard session, request
+        scheduler and discord queue are shared, the realm map, upload timers and access
+        token belong to the region."""
+        region_data = copy.copy(self)
+        region_data.REGION = region
+        region_data.__set_region_links()
+        region_data.WOW_SERVER_NAMES = region_data.__set_realm_names()
+        region_data.upload_timers = {}
+        region_data.access_token_creation_unix_time = 0
+        region_data.access_token = region_data.check_access_token()
+        return region_data
+
+    def __set_bonus_data(self, bonus_catalog):
+        self.bonus_catalog = bonus_catalog
+        self.socket_ids = bonus_catalog.socket_ids
+        self.leech_ids = bonus_catalog.leech_ids
+        self.avoidance_ids = bonus_catalog.avoidance_ids
+        self.speed_ids = bonus_catalog.speed_ids
+        self.ilvl_addition = bonus_catalog.ilvl_addition
+        self.bonuses_by_id = (
+            bonus_catalog.bonuses_by_id if self.USE_POST_MIDNIGHT_ILVL else {}
+        )
+
     #### VARIABLE RELATED FUNCTIONS ####
     @staticmethod
     def __set_mega_vars(var_name, raw_mega_data, required=False):
@@ -159,14 +240,7 @@ class MegaData:
 
         # need to do this no matter where we get the region from
         if var_name == "WOW_REGION":
-            if var_value not in [
-                "EU",
-                "NA",
-                "NACLASSIC",
-                "NASODCLASSIC",
-                "EUCLASSIC",
-                "EUSODCLASSIC",
-            ]:
+            if var_value not in WOW_REGIONS:
                 raise Exception(f"error {var_value} not a valid region")
 
         # default to all but change for classic
@@ -212,6 +286,110 @@ class MegaData:
             else:
                 var_value = 1
 
+        # "threads" (default) or the opt-in "asyncio" engine
+        if var_name == "SCAN_ENGINE":
+            if str(var_value).lower() in ["threads", "asyncio"]:
+                var_value = str(var_value).lower()
+            else:
+                var_value = "threads"
+
+        # "window" (default) scans SCAN_TIME_MIN..SCAN_TIME_MAX around each upload minute,
+        # "adaptive" predicts each realm's next upload from its history
+        if var_name == "POLL_MODE":
+            if str(var_value).lower() in ["window", "adaptive"]:
+                var_value = str(var_value).lower()
+            else:
+                var_value = "window"
+
+        # check Last-Modified before the full AH download: "off" (default), "conditional"
+        # sends If-Modified-Since and treats 304 as skipped, "head" sends a HEAD first
+        if var_name == "FRESHNESS_PROBE":
+            if str(var_value).lower() in ["off", "conditional", "head"]:
+                var_value = str(var_value).lower()
+            else:
+                var_value = "off"
+
+        # 0 (default) matches on the scan threads, N > 0 matches on N worker processes
+        if var_name == "MATCH_PROCESSES":
+            if str(var_value).isdigit() or isinstance(var_value, int):
+                var_value = min(int(var_value), os.cpu_count() or 1)
+            else:
+                var_value = 0
+
+        # {"pets": url, "ilvl": url, ...} as an object in mega_data.json or a json string env var
+        if var_name == "WEBHOOK_ROUTES":
+            if isinstance(var_value, str):
+                try:
+                    var_value = json.loads(var_value)
+                except json.JSONDecodeError:
+                    print(f"error WEBHOOK_ROUTES is not valid json, ignoring it")
+                    var_value = {}
+            if not isinstance(var_value, dict):
+                var_value = {}
+            for category in list(var_value):
+                if category not in WEBHOOK_ROUTE_CATEGORIES or not var_value[category]:
+                    print(
+                        f"error {category} is not a WEBHOOK_ROUTES category {WEBHOOK_ROUTE_CATEGORIES}, ignoring it"
+                    )
+                    del var_value[category]
+
+        # extra regions scanned by the same process, ex: ["EU", "NACLASSIC"] or "EU,NACLASSIC"
+        if var_name == "WOW_REGIONS":
+            if isinstance(var_value, str):
+                var_value = var_value.split(",")
+            if not isinstance(var_value, list):
+                var_value = []
+            regions = []
+            for region in var_value:
+                region = str(region).strip().upper()
+                if region not in WOW_REGIONS:
+                    print(f"error {region} not a valid region, ignoring it")
+                elif region not in regions:
+                    regions.append(region)
+            var_value = regions
+
+        # threads delivering queued alert embeds, 0 sends them inline from the scan threads
+        if var_name == "DISCORD_WORKERS":
+            if str(var_value).isdigit() or isinstance(var_value, int):
+                var_value = min(int(var_value), 8)
+            else:
+                var_value = 1
+
+        # "info" (default), "debug" adds per match details and full response headers,
+        # "warning" drops the per realm status lines
+        if var_name == "LOG_LEVEL":
+            if str(var_value).lower() in LOG_LEVELS:
+                var_value = str(var_value).lower()
+            else:
+                var_value = "info"
+
+        # log rotation: size in MB (default 10), old files kept (default 5),
+        # hours before a new file is started (default 24, 0 only rotates on size)
+        log_defaults = {"LOG_MAX_MB": 10, "LOG_BACKUPS": 5, "LOG_ROTATE_HOURS": 24}
+        if var_name in log_defaults:
+            if str(var_value).isdigit() or isinstance(var_value, int):
+                var_value = min(int(var_value), 1000)
+            else:
+                var_value = log_defaults[var_name]
+            if var_name == "LOG_MAX_MB" and var_value < 1:
+                var_value = log_defaults[var_name]
+
+        # how long a sent alert is remembered when REFRESH_ALERTS is on, default just under an hour
+        # so the same listing alerts once per hourly update
+        if var_name == "ALERT_TTL_MINUTES":
+            if str(var_value).isdigit() or isinstance(var_value, int):
+                if 1 <= int(var_value) <= 24 * 60:
+                    var_value = int(var_value)
+                else:
+                    var_value = 55
+            else:
+                var_value = 55
+
+        # opt-in performance switches, only an explicit true turns them on
+        opt_in_flags = ["STREAM_AUCTIONS", "VECTOR_PREFILTER"]
+        if var_name in opt_in_flags:
+            var_value = str(var_value).lower() == "true"
+
         if var_name == "TOKEN_PRICE":
             if str(var_value).isnumeric() or isinstance(var_value, int):
                 if 1 <= int(var_value) <= 10000000:
@@ -252,7 +430,7 @@ class MegaData:
             return self.access_token
         # if over 20 hours make a new token and reset the creation time
         else:
-            response = requests.post(
+            response = self.session.post(
                 "https://oauth.battle.net/token",
                 data={"grant_type": "client_credentials"},
                 auth=(self.WOW_CLIENT_ID, self.WOW_CLIENT_SECRET),
@@ -311,11 +489,7 @@ class MegaData:
                 print(f"skipping {item_list_name} its not set in file or env var")
                 desired_items_raw = {}
 
-        # convert to int keys and float values
-        desired_items = {}
-        for k, v in desired_items_raw.items():
-            desired_items[int(k)] = float(v)
-        return desired_items
+        return normalize_desired_items(desired_items_raw)
 
     def __set_desired_ilvl_list(self, path_to_data=None):
         item_list_name = "desired_ilvl_list"
@@ -346,185 +520,7 @@ class MegaData:
                 print(f"skipping {item_list_name} its not set in file or env var")
                 return []
 
-        # Group items by ilvl
-        ilvl_groups = defaultdict(list)
-        broad_groups = []
-        for item in ilvl_info:
-            if "item_ids" not in item or len(item["item_ids"]) == 0:
-                broad_groups.append(item)
-            else:
-                ilvl_groups[item["ilvl"]].append(item["item_ids"])
-
-        DESIRED_ILVL_LIST = []
-
-        # groups with user defined ilvls
-        for ilvl, item_id_groups in ilvl_groups.items():
-            # Flatten the list of item ids
-            all_item_ids = [item_id for group in item_id_groups for item_id in group]
-            item_names, item_ids, base_ilvls, base_required_levels = get_ilvl_items(
-                ilvl, all_item_ids
-            )
-
-            for item in ilvl_info:
-                if item["ilvl"] == ilvl:
-                    snipe_info, min_ilvl = self.__set_desired_ilvl(
-                        item, item_names, base_ilvls, base_required_levels
-                    )
-                    DESIRED_ILVL_LIST.append(snipe_info)
-
-        # broad groups
-        if broad_groups:
-            # with a broad group we dont care about ilvl or item_ids
-            # its the same generic info for all of them
-            item_names, item_ids, base_ilvls, base_required_levels = get_ilvl_items()
-            # add the item names an base ilvl to each broad group
-            for item in broad_groups:
-                snipe_info, min_ilvl = self.__set_desired_ilvl(
-                    item, item_names, base_ilvls, base_required_levels
-                )
-                DESIRED_ILVL_LIST.append(snipe_info)
-
-        return DESIRED_ILVL_LIST
-
-    def __set_desired_ilvl(
-        self, ilvl_info, item_names, base_ilvls, base_required_levels
-    ):
-        # Set default values if not present
-        ilvl_info["item_ids"] = ilvl_info.get("item_ids", [])
-        ilvl_info["required_min_lvl"] = ilvl_info.get("required_min_lvl", 1)
-        ilvl_info["required_max_lvl"] = ilvl_info.get("required_max_lvl", 1000)
-        ilvl_info["max_ilvl"] = ilvl_info.get("max_ilvl", 10000)
-        ilvl_info["bonus_lists"] = ilvl_info.get("bonus_lists", [])
-        ilvl_info["modifier_values"] = ilvl_info.get("modifier_values", [])
-        ilvl_info["modifier_objects"] = ilvl_info.get("modifier_objects", [])
-        ilvl_info["sockets"] = ilvl_info.get("sockets", False)
-        ilvl_info["speed"] = ilvl_info.get("speed", False)
-        ilvl_info["leech"] = ilvl_info.get("leech", False)
-        ilvl_info["avoidance"] = ilvl_info.get("avoidance", False)
-        ilvl_info["crit"] = ilvl_info.get("crit", False)
-        ilvl_info["haste"] = ilvl_info.get("haste", False)
-        ilvl_info["mastery"] = ilvl_info.get("mastery", False)
-        ilvl_info["versatility"] = ilvl_info.get("versatility", False)
-
-        required_keys = {
-            "ilvl",
-            "max_ilvl",
-            "buyout",
-            "sockets",
-            "speed",
-            "leech",
-            "avoidance",
-            "crit",
-            "haste",
-            "mastery",
-            "versatility",
-            "item_ids",
-            "required_min_lvl",
-            "required_max_lvl",
-            "bonus_lists",
-            "modifier_values",
-            "modifier_objects",
-        }
-
-        # Check if all required keys are present
-        missing_keys = required_keys - set(ilvl_info.keys())
-        if missing_keys:
-            raise Exception(
-                f"Error: Missing required keys {missing_keys} in ilvl_info:\n{ilvl_info}"
-            )
-
-        snipe_info = {}
-        bool_vars = [
-            "sockets",
-            "speed",
-            "leech",
-            "avoidance",
-            "crit",
-            "haste",
-            "mastery",
-            "versatility",
-        ]
-        int_vars = [
-            "ilvl",
-            "max_ilvl",
-            "required_min_lvl",
-            "required_max_lvl",
-        ]
-        float_vars = ["buyout"]
-        for key, value in ilvl_info.items():
-            if key in bool_vars:
-                if isinstance(ilvl_info[key], bool):
-                    snipe_info[key] = value
-                else:
-                    raise Exception(f"error in ilvl info '{key}' must be true or false")
-            elif key in int_vars:
-                if isinstance(ilvl_info[key], int):
-                    snipe_info[key] = value
-                else:
-                    raise Exception(f"error in ilvl info '{key}' must be an int")
-            elif key in float_vars:
-                # buyout can be a float or an int
-                if isinstance(ilvl_info[key], float) or isinstance(ilvl_info[key], int):
-                    snipe_info[key] = value
-                else:
-                    raise Exception(f"error in ilvl info '{key}' must be a float")
-
-        # Validate bonus lists are integers
-        if ilvl_info["bonus_lists"] != [] and not all(
-            isinstance(x, int) for x in ilvl_info["bonus_lists"]
-        ):
-            raise Exception(
-                "error in ilvl info 'bonus_lists' must contain only integers"
-            )
-        if ilvl_info["modifier_values"] != [] and not all(
-            isinstance(x, int) for x in ilvl_info["modifier_values"]
-        ):
-            raise Exception(
-                "error in ilvl info 'modifier_values' must contain only integers"
-            )
-        if ilvl_info["modifier_objects"] != []:
-            if not all(isinstance(x, dict) for x in ilvl_info["modifier_objects"]):
-                raise Exception(
-                    "error in ilvl info 'modifier_objects' must contain only objects"
-                )
-            for obj in ilvl_info["modifier_objects"]:
-                if not isinstance(obj.get("type"), int) or not isinstance(
-                    obj.get("value"), int
-                ):
-                    raise Exception(
-                        "error in ilvl info 'modifier_objects' entries must include int 'type' and int 'value'"
-                    )
-
-        if ilvl_info["item_ids"] == []:
-            snipe_info["item_names"] = item_names
-            snipe_info["item_ids"] = set(item_names.keys())
-            snipe_info["base_ilvls"] = {} if self.USE_POST_MIDNIGHT_ILVL else base_ilvls
-            snipe_info["base_required_levels"] = base_required_levels
-            snipe_info["bonus_lists"] = ilvl_info["bonus_lists"]
-            snipe_info["modifier_values"] = ilvl_info["modifier_values"]
-            snipe_info["modifier_objects"] = ilvl_info["modifier_objects"]
-        else:
-            snipe_info["item_names"] = {
-                item_id: item_names.get(item_id, "foobar")
-                for item_id in ilvl_info["item_ids"]
-            }
-            snipe_info["item_ids"] = set(ilvl_info["item_ids"])
-            if self.USE_POST_MIDNIGHT_ILVL:
-                snipe_info["base_ilvls"] = {}
-            else:
-                snipe_info["base_ilvls"] = {
-                    item_id: base_ilvls.get(item_id, 1)
-                    for item_id in ilvl_info["item_ids"]
-                }
-            snipe_info["base_required_levels"] = {
-                item_id: base_required_levels.get(item_id, 1)
-                for item_id in ilvl_info["item_ids"]
-            }
-            snipe_info["bonus_lists"] = ilvl_info["bonus_lists"]
-            snipe_info["modifier_values"] = ilvl_info["modifier_values"]
-            snipe_info["modifier_objects"] = ilvl_info["modifier_objects"]
-
-        return snipe_info, ilvl_info["ilvl"]
+        return build_desired_ilvl_list(ilvl_info, self.USE_POST_MIDNIGHT_ILVL)
 
     def __set_desired_pet_ilvl_list(self, path_to_data=None):
         item_list_name = "desired_pet_ilvl_list"
@@ -555,41 +551,7 @@ class MegaData:
                 print(f"skipping {item_list_name} its not set in file or env var")
                 return []
 
-        # Validate and process each pet entry
-        processed_pet_list = []
-        for pet in pet_ilvl_info:
-            pet["minQuality"] = int(pet.get("minQuality", -1))
-            pet["excludeBreeds"] = list(pet.get("excludeBreeds", []))
-            if not all(
-                key in pet
-                for key in ["petID", "price", "minLevel", "minQuality", "excludeBreeds"]
-            ):
-                raise Exception(
-                    f"Error: Each pet entry must contain 'petID', 'price', 'minLevel', 'minQuality', 'excludeBreeds'. Found: {pet}"
-                )
-
-            # Validate types and convert as needed
-            processed_pet = {
-                "petID": int(pet["petID"]),  # Match the API's
-                "price": int(pet["price"]),
-                "minLevel": int(pet["minLevel"]),  # Handle both string and int inputs
-                "minQuality": pet["minQuality"],
-                "excludeBreeds": [int(breed) for breed in pet["excludeBreeds"]],
-            }
-
-            # Validate value ranges
-            if not (1 <= processed_pet["minLevel"] <= 25):
-                raise Exception(
-                    f"Error: minLevel must be between 1 and 25. Found: {processed_pet['minLevel']}"
-                )
-            if processed_pet["price"] <= 0:
-                raise Exception(
-                    f"Error: price must be greater than 0. Found: {processed_pet['price']}"
-                )
-
-            processed_pet_list.append(processed_pet)
-
-        return processed_pet_list
+        return normalize_desired_pet_ilvl_list(pet_ilvl_info)
 
     def __set_realm_names(self):
         realm_names = json.load(
@@ -625,6 +587,12 @@ class MegaData:
     def get_upload_time_list(self):
         return list(self.upload_timers.values())
 
+    def order_realms_by_upload(self, connected_ids):
+        """Realms whose upload minute just passed first, so fresh data is pulled before the rest."""
+        return order_by_upload_minute(
+            connected_ids, self.upload_timers, int(datetime.now().minute)
+        )
+
     def get_upload_time_minutes(self):
         """Sorted unique minutes parsed from Last-Modified (empty until at least one AH pull)."""
         seen = {
@@ -662,7 +630,7 @@ class MegaData:
     @retry(stop=stop_after_attempt(3), retry_error_callback=lambda state: {})
     def get_listings_single(self, connectedRealmId: int):
         if connectedRealmId in [-1, -2]:
-            print(f"gather data from {self.REGION} commodities")
+            log_info(f"gather data from {self.REGION} commodities")
             auction_info = self.make_commodity_ah_api_request()
             if auction_info is None:
                 return []
@@ -670,24 +638,12 @@ class MegaData:
                 return None
             return auction_info["auctions"]
         else:
-            print(
+            log_info(
                 f"gather data from connectedRealmId {connectedRealmId} of region {self.REGION}"
             )
 
         all_auctions = []
-        if "CLASSIC" in self.REGION:
-            if self.FACTION == "alliance":
-                endpoints = ["/2"]
-            elif self.FACTION == "horde":
-                endpoints = ["/6"]
-            elif self.FACTION == "booty bay":
-                endpoints = ["/7"]
-            else:
-                endpoints = ["/2", "/6", "/7"]
-        else:
-            endpoints = [""]
-
-        for endpoint in endpoints:
+        for endpoint in self.get_auction_endpoints():
             url = self.construct_api_url(connectedRealmId, endpoint)
 
             auction_info = self.make_ah_api_request(url, connectedRealmId)
@@ -703,6 +659,19 @@ class MegaData:
 
         return all_auctions
 
+    def get_auction_endpoints(self):
+        # classic AH is split by faction, retail has one house per realm
+        if "CLASSIC" in self.REGION:
+            if self.FACTION == "alliance":
+                return ["/2"]
+            elif self.FACTION == "horde":
+                return ["/6"]
+            elif self.FACTION == "booty bay":
+                return ["/7"]
+            else:
+                return ["/2", "/6", "/7"]
+        return [""]
+
     def construct_api_url(self, connectedRealmId, endpoint):
         base_url = (
             "https://us.api.blizzard.com"
@@ -728,49 +697,152 @@ class MegaData:
     )
     def make_ah_api_request(self, url, connectedRealmId):
         headers = {"Authorization": f"Bearer {self.check_access_token()}"}
-        req = requests.get(url, headers=headers, timeout=20)
+        if self.head_shows_unchanged(url, connectedRealmId, headers):
+            return {"auctions": [], "skipped": True}
+        headers.update(self.get_freshness_headers(connectedRealmId))
+        self.request_scheduler.wait()
+        with self.session.get(
+            url, headers=headers, timeout=20, stream=self.STREAM_AUCTIONS
+        ) as req:
+            # 304 only comes back for FRESHNESS_PROBE conditional requests
+            if req.status_code == 304:
+                self.report_not_modified(connectedRealmId)
+                return {"auctions": [], "skipped": True}
+            # check for api errors
+            if req.status_code == 429:
+                error_message = f"{req} BLIZZARD too many requests error on {self.REGION} {str(connectedRealmId)} realm data"
+                # pause every worker together instead of each thread retrying on its own
+                pause = self.request_scheduler.on_rate_limited(
+                    req.headers.get("Retry-After")
+                )
+                print(f"{error_message}, pausing requests for {pause:.1f} sec")
+                raise requests.HTTPError(error_message, response=req)
+            elif req.status_code != 200:
+                error_message = f"{req} BLIZZARD error getting {self.REGION} {str(connectedRealmId)} realm data"
+                print(error_message)
+                time.sleep(1)
+                raise Exception(error_message)
+            self.request_scheduler.on_success()
+
+            if self.is_upload_unchanged(connectedRealmId, req.headers):
+                return {"auctions": [], "skipped": True}
+
+            auction_info = self.read_auction_response(req)
+            self.record_upload(connectedRealmId, req.headers)
+            return auction_info
+
+    def read_auction_response(self, req):
+        if not self.STREAM_AUCTIONS:
+            return req.json()
+        # decode the auctions array incrementally and only keep desired auctions
+        stream = AuctionStreamFilter(self.is_desired_auction)
+        for chunk in req.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+            stream.feed(chunk)
+        auction_info = stream.close()
+        log_info(
+            f"streamed {stream.auctions_read} auctions, kept {len(stream.auctions)} matching desired ids"
+        )
+        return auction_info
 
-        # check for api errors
-        if req.status_code == 429:
-            error_message = f"{req} BLIZZARD too many requests error on {self.REGION} {str(connectedRealmId)} realm data, skipping"
-            print(error_message)
-            time.sleep(3)
-            raise Exception(error_message)
-        elif req.status_code != 200:
-            error_message = f"{req} BLIZZARD error getting {self.REGION} {str(connectedRealmId)} realm data"
-            print(error_message)
-            time.sleep(1)
-            raise Exception(error_message)
+    def is_desired_auction(self, auction):
+        """Cheap id check for streaming, clean_listing_data still does the real matching."""
+        item_id = auction["item"]["id"]
+        if (
+            item_id in self.DESIRED_ILVL_INDEX
+            or item_id in self.DESIRED_ILVL_ITEMS.get("item_ids", ())
+        ):
+            return True
+        # all caged battle pets have item id 82800
+        if item_id == 82800:
+            pet_id = auction["item"].get("pet_species_id")
+            return pet_id in self.DESIRED_PETS or pet_id in self.DESIRED_PET_ILVL_INDEX
+        return item_id in self.DESIRED_ITEMS
+
+    def get_data_set_name(self, connectedRealmId):
+        if connectedRealmId in [-1, -2]:
+            return f"{self.REGION} commodities"
+        return f"realm {connectedRealmId} ({self.REGION})"
+
+    def get_freshness_headers(self, connectedRealmId):
+        """If-Modified-Since for FRESHNESS_PROBE "conditional", empty until the realm has been pulled once."""
+        last_upload_time_raw = self.upload_timers.get(connectedRealmId, {}).get(
+            "lastUploadTimeRaw"
+        )
+        if self.FRESHNESS_PROBE != "conditional" or not last_upload_time_raw:
+            return {}
+        return {"If-Modified-Since": last_upload_time_raw}
 
-        # Use req.headers directly — CaseInsensitiveDict; dict(req.headers) keeps wire casing
-        # so "Last-Modified" in dict(...) misses Blizzard's "last-modified".
-        last_upload_time_raw = req.headers.get("Last-Modified")
+    def report_not_modified(self, connectedRealmId):
+        last_upload_time_raw = self.upload_timers.get(connectedRealmId, {}).get(
+            "lastUploadTimeRaw"
+        )
+        log_info(
+            f"Skip {self.get_data_set_name(connectedRealmId)}: data has not updated yet (304 Not Modified since {last_upload_time_raw})"
+        )
+
+    def is_known_upload(self, connectedRealmId, last_upload_time_raw):
+        """True when last_upload_time_raw is the Last-Modified already recorded for this realm."""
+        return bool(last_upload_time_raw) and (
+            self.upload_timers.get(connectedRealmId, {}).get("lastUploadTimeRaw")
+            == last_upload_time_raw
+        )
+
+    def head_shows_unchanged(self, url, connectedRealmId, headers):
+        """FRESHNESS_PROBE "head": compare Last-Modified from a HEAD request before the full download.
+        Any probe failure returns False so the regular GET decides."""
+        if self.FRESHNESS_PROBE != "head" or connectedRealmId not in self.upload_timers:
+            return False
+        self.request_scheduler.wait()
+        try:
+            resp = self.session.head(url, headers=headers, timeout=10)
+        except requests.RequestException as ex:
+            print(
+                f"HEAD probe failed on {self.get_data_set_name(connectedRealmId)}: {ex}"
+            )
+            return False
+        if resp.status_code != 200:
+            return False
+        last_upload_time_raw = resp.headers.get("Last-Modified")
+        if not self.is_known_upload(connectedRealmId, last_upload_time_raw):
+            return False
+        log_info(
+            f"Skip {self.get_data_set_name(connectedRealmId)}: data has not updated yet (HEAD Last-Modified unchanged: {last_upload_time_raw})"
+        )
+        return True
+
+    def is_upload_unchanged(self, connectedRealmId, response_headers):
+        """True when Last-Modified matches the last pull. Nothing is recorded here,
+        record_upload() stores the new upload time once the body has been read."""
+        data_name = self.get_data_set_name(connectedRealmId)
+        # Use the headers object directly — requests/aiohttp headers are case insensitive;
+        # dict(headers) keeps wire casing so "Last-Modified" in dict(...) misses Blizzard's "last-modified".
+        last_upload_time_raw = response_headers.get("Last-Modified")
         if last_upload_time_raw:
-            try:
-                # If unchanged, data has not updated yet; skip processing
-                if (
-                    self.upload_timers.get(connectedRealmId, {}).get(
-                        "lastUploadTimeRaw"
-                    )
-                    == last_upload_time_raw
-                ):
-                    print(
-                        f"Skip realm {connectedRealmId} ({self.REGION}): data has not updated yet (Last-Modified unchanged: {last_upload_time_raw})"
-                    )
-                    return {"auctions": [], "skipped": True}
-                self.update_local_timers(
-                    connectedRealmId, last_upload_time_raw, req.headers
+            # If unchanged, data has not updated yet; skip processing
+            if self.is_known_upload(connectedRealmId, last_upload_time_raw):
+                log_info(
+                    f"Skip {data_name}: data has not updated yet (Last-Modified unchanged: {last_upload_time_raw})"
                 )
-            except Exception as ex:
-                print(f"The exception was:", ex)
+                return True
         else:
             print(
-                "No Last-Modified header found in response. Headers received: "
-                f"{dict(req.headers)}"
+                f"No Last-Modified header found on {data_name} response. Headers received: "
+                f"{dict(response_headers)}"
             )
-
-        auction_info = req.json()
-        return auction_info
+        return False
+
+    def record_upload(self, connectedRealmId, response_headers):
+        """Store the Last-Modified of a response whose body was read in full.
+        Recording it earlier made a retry after a failed body read skip the new data."""
+        last_upload_time_raw = response_headers.get("Last-Modified")
+        if not last_upload_time_raw:
+            return
+        try:
+            self.update_local_timers(
+                connectedRealmId, last_upload_time_raw, response_headers
+            )
+        except Exception as ex:
+            print(f"The exception was:", ex)
 
     def update_local_timers(self, dataSetID, lastUploadTimeRaw, response_headers=None):
         if dataSetID == -1:
@@ -784,21 +856,26 @@ class MegaData:
             dataSetName = self.get_realm_names(dataSetID)
 
         lastUploadMinute = int(lastUploadTimeRaw.split(":")[1])
-        lastUploadUnix = int(
-            datetime.strptime(lastUploadTimeRaw, "%a, %d %b %Y %H:%M:%S %Z").timestamp()
-        )
+        # parsedate_to_datetime keeps the GMT offset, strptime %Z made a local naive time
+        lastUploadUnix = int(parsedate_to_datetime(lastUploadTimeRaw).timestamp())
+        # recent upload times, the adaptive poller learns each realm's cadence from these
+        uploadHistory = self.upload_timers.get(dataSetID, {}).get("uploadHistory", [])
+        uploadHistory = (uploadHistory + [lastUploadUnix])[-UPLOAD_HISTORY_SIZE:]
         new_realm_time = {
             "dataSetID": dataSetID,
             "dataSetName": dataSetName,
             "lastUploadMinute": lastUploadMinute,
             "lastUploadTimeRaw": lastUploadTimeRaw,
             "lastUploadUnix": lastUploadUnix,
+            "uploadHistory": uploadHistory,
             "region": self.REGION,
             "tableName": tableName,
         }
         if response_headers is not None:
             hdr_dump = dict(sorted((k, v) for k, v in response_headers.items()))
             new_realm_time["last_http_headers"] = hdr_dump
+        # the full header dump is several kB per realm per hour, only kept at LOG_LEVEL debug
+        if response_headers is not None and debug_logging():
             print(
                 f"AH timer update dataSetID={dataSetID} Last-Modified={lastUploadTimeRaw!r} "
                 f"parsed_minute={lastUploadMinute}\n"
@@ -807,12 +884,7 @@ class MegaData:
             )
         self.upload_timers[dataSetID] = new_realm_time
 
-    @retry(
-        stop=stop_after_attempt(10),
-        retry=retry_if_exception_type(requests.RequestException),
-        retry_error_callback=lambda retry_state: {"auctions": []},
-    )
-    def make_commodity_ah_api_request(self):
+    def construct_commodity_api_url(self):
         if self.REGION == "NA":
             url = f"https://us.api.blizzard.com/data/wow/auctions/commodities?namespace=dynamic-us&locale=en_US"
             connectedRealmId = -1
@@ -823,48 +895,49 @@ class MegaData:
             raise Exception(
                 f"invalid region {self.REGION} passed to get_raw_commodity_listings()"
             )
-        headers = {"Authorization": f"Bearer {self.check_access_token()}"}
-        req = requests.get(url, headers=headers, timeout=20)
-
-        # check for api errors
-        if req.status_code == 429:
-            error_message = f"{req} BLIZZARD too many requests error on {self.REGION} commodities data, skipping"
-            print(error_message)
-            time.sleep(3)
-            raise Exception(error_message)
-        elif req.status_code != 200:
-            error_message = f"{req} BLIZZARD error getting {self.REGION} {str(connectedRealmId)} realm data"
-            print(error_message)
-            time.sleep(1)
-            raise Exception(error_message)
+        return url, connectedRealmId
 
-        last_upload_time_raw = req.headers.get("Last-Modified")
-        if last_upload_time_raw:
-            try:
-                # If unchanged, data has not updated yet; skip processing
-                if (
-                    self.upload_timers.get(connectedRealmId, {}).get(
-                        "lastUploadTimeRaw"
-                    )
-                    == last_upload_time_raw
-                ):
-                    print(
-                        f"Skip {self.REGION} commodities: data has not updated yet (Last-Modified unchanged: {last_upload_time_raw})"
-                    )
-                    return {"auctions": [], "skipped": True}
-                self.update_local_timers(
-                    connectedRealmId, last_upload_time_raw, req.headers
+    @retry(
+        stop=stop_after_attempt(10),
+        retry=retry_if_exception_type(requests.RequestException),
+        retry_error_callback=lambda retry_state: {"auctions": []},
+    )
+    def make_commodity_ah_api_request(self):
+        url, connectedRealmId = self.construct_commodity_api_url()
+        headers = {"Authorization": f"Bearer {self.check_access_token()}"}
+        if self.head_shows_unchanged(url, connectedRealmId, headers):
+            return {"auctions": [], "skipped": True}
+        headers.update(self.get_freshness_headers(connectedRealmId))
+        self.request_scheduler.wait()
+        with self.session.get(
+            url, headers=headers, timeout=20, stream=self.STREAM_AUCTIONS
+        ) as req:
+            # 304 only comes back for FRESHNESS_PROBE conditional requests
+            if req.status_code == 304:
+                self.report_not_modified(connectedRealmId)
+                return {"auctions": [], "skipped": True}
+            # check for api errors
+            if req.status_code == 429:
+                error_message = f"{req} BLIZZARD too many requests error on {self.REGION} commodities data"
+                # pause every worker together instead of each thread retrying on its own
+                pause = self.request_scheduler.on_rate_limited(
+                    req.headers.get("Retry-After")
                 )
-            except Exception as ex:
-                print(f"The exception was:", ex)
-        else:
-            print(
-                "No Last-Modified header found on commodities response. Headers received: "
-                f"{dict(req.headers)}"
-            )
-
-        auction_info = req.json()
-        return auction_info
+                print(f"{error_message}, pausing requests for {pause:.1f} sec")
+                raise requests.HTTPError(error_message, response=req)
+            elif req.status_code != 200:
+                error_message = f"{req} BLIZZARD error getting {self.REGION} {str(connectedRealmId)} realm data"
+                print(error_message)
+                time.sleep(1)
+                raise Exception(error_message)
+            self.request_scheduler.on_success()
+
+            if self.is_upload_unchanged(connectedRealmId, req.headers):
+                return {"auctions": [], "skipped": True}
+
+            auction_info = self.read_auction_response(req)
+            self.record_upload(connectedRealmId, req.headers)
+            return auction_info
 
     @retry(
         stop=stop_after_attempt(10),
@@ -887,14 +960,18 @@ class MegaData:
             return None
 
         headers = {"Authorization": f"Bearer {self.check_access_token()}"}
-        req = requests.get(url, headers=headers, timeout=20)
+        self.request_scheduler.wait()
+        req = self.session.get(url, headers=headers, timeout=20)
 
         # check for api errors
         if req.status_code == 429:
             error_message = f"{req} BLIZZARD too many requests error getting WoW token price for {self.REGION}"
-            print(error_message)
-            time.sleep(3)
-            raise Exception(error_message)
+            # pause every worker together instead of each thread retrying on its own
+            pause = self.request_scheduler.on_rate_limited(
+                req.headers.get("Retry-After")
+            )
+            print(f"{error_message}, pausing requests for {pause:.1f} sec")
+            raise requests.HTTPError(error_message, response=req)
         elif req.status_code != 200:
             error_message = (
                 f"{req} BLIZZARD error getting WoW token price for {self.REGION}"
@@ -902,6 +979,7 @@ class MegaData:
             print(error_message)
             time.sleep(1)
             raise Exception(error_message)
+        self.request_scheduler.on_success()
 
         token_data = req.json()
 
@@ -916,5 +994,46 @@ class MegaData:
     def send_discord_message(self, message):
         send_discord_message(message, self.WEBHOOK_URL)
 
-    def send_discord_embed(self, embed):
-        send_embed_discord(embed, self.WEBHOOK_URL)
+    def send_discord_embed(self, embed, webhook_url=None):
+        webhook_url = webhook_url or self.WEBHOOK_URL
+        if self.discord_queue:
+            self.discord_queue.put(webhook_url, embed)
+        else:
+            send_embed_discord(embed, webhook_url)
+
+    def send_discord_embeds(self, embeds, webhook_url=None):
+        webhook_url = webhook_url or self.WEBHOOK_URL
+        if self.discord_queue:
+            for embed in embeds:
+                self.discord_queue.put(webhook_url, embed)
+        else:
+            send_embeds_discord(embeds, webhook_url)
+
+    def get_route_webhook(self, category):
+        """Webhook for an alert category, commodities fall back to the items route."""
+        if category in self.WEBHOOK_ROUTES:
+            return self.WEBHOOK_ROUTES[category]
+        if category == "commodities" and "items" in self.WEBHOOK_ROUTES:
+            return self.WEBHOOK_ROUTES["items"]
+        return self.WEBHOOK_URL
+
+    def get_alert_webhook(self, auction):
+        """Where an AuctionAlert goes: its rule's webhook, then its category route."""
+        if auction.webhook:
+            return auction.webhook
+        if auction.is_ilvl_alert:
+            category = "ilvl"
+        elif auction.pet_level is not None:
+            category = "pet_ilvl"
+        elif auction.petID is not None:
+            category = "pets"
+        elif auction.realmID in [-1, -2]:
+            category = "commodities"
+        else:
+            category = "items"
+        return self.get_route_webhook(category)
+
+    def stop_discord_queue(self):
+        """Deliver what is still queued before the scanner exits."""
+        if self.discord_queue:
+            self.discord_queue.stop()
@@ -0,0 +1,126 @@
+"""
+Shared request scheduler for the Blizzard API.
+
+Blizzard allows 100 requests per second and 36,000 per hour per client. Every
+scan worker reserves a slot from the same two token buckets before it calls the
+API, and a 429 pauses all workers together (Retry-After when sent, otherwise
+exponential backoff with jitter) instead of each thread sleeping 3 seconds and
+retrying in lockstep.
+"""
+
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+BLIZZARD_REQUESTS_PER_SECOND = 100
+BLIZZARD_REQUESTS_PER_HOUR = 36000
+BACKOFF_BASE_SECONDS = 1
+BACKOFF_MAX_SECONDS = 60
+
+
+class TokenBucket:
+    """Token bucket where reserve() may go into debt, the debt is the wait time."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def reserve(self, now):
+        """Take one token, returns seconds until it is usable (0 if available now)."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0
+        return -self.tokens / self.rate
+
+
+def parse_retry_after(retry_after):
+    """Seconds to wait from a Retry-After header (delta seconds or HTTP date), None if unusable."""
+    if not retry_after:
+        return None
+    try:
+        return max(float(retry_after), 0)
+    except (TypeError, ValueError):
+        pass
+    try:
+        retry_at = parsedate_to_datetime(retry_after)
+        return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0)
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+class BlizzardRequestScheduler:
+    """Thread safe gate every Blizzard request goes through."""
+
+    def __init__(
+        self,
+        per_second=BLIZZARD_REQUESTS_PER_SECOND,
+        per_hour=BLIZZARD_REQUESTS_PER_HOUR,
+    ):
+        self._per_second = TokenBucket(per_second, per_second)
+        self._per_hour = TokenBucket(per_hour / 3600, per_hour)
+        self._paused_until = 0
+        self._backoff_level = 0
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Reserve the next request slot, returns how long to wait before sending it.
+        Used directly by the asyncio engine, threads call wait()."""
+        with self._lock:
+            now = time.monotonic()
+            return max(
+                self._per_second.reserve(now),
+                self._per_hour.reserve(now),
+                self._paused_until - now,
+                0,
+            )
+
+    def wait(self):
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    def on_rate_limited(self, retry_after=None):
+        """Pause every worker after a 429, returns the pause in seconds."""
+        with self._lock:
+            now = time.monotonic()
+            delay = parse_retry_after(retry_after)
+            # 429s from requests already in flight when the pause started belong to the
+            # same burst, they must not escalate the backoff again
+            if now < self._paused_until:
+                if delay is not None:
+                    self._paused_until = max(self._paused_until, now + delay)
+                return self._paused_until - now
+            if delay is None:
+                delay = min(
+                    BACKOFF_BASE_SECONDS * 2**self._backoff_level, BACKOFF_MAX_SECONDS
+                )
+                # jitter the length of the shared pause so repeated 429s do not retry on a
+                # fixed schedule, every worker still resumes when the pause ends
+                delay = random.uniform(delay / 2, delay)
+            self._backoff_level += 1
+            self._paused_until = now + delay
+            return delay
+
+    def on_success(self):
+        with self._lock:
+            self._backoff_level = 0
+
+
+def order_by_upload_minute(connected_ids, upload_timers, current_min):
+    """Sort realms by how long ago their upload minute passed this hour.
+    Realms without a known upload time go first, realms whose upload is still ahead go last.
+    """
+
+    def minutes_since_upload(connected_id):
+        realm_time = upload_timers.get(connected_id)
+        if not realm_time or realm_time.get("lastUploadMinute") is None:
+            return -1
+        return (current_min - realm_time["lastUploadMinute"]) % 60
+
+    return sorted(connected_ids, key=minutes_since_upload)
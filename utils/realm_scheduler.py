@@ -0,0 +1,97 @@
+"""
+Adaptive per-realm polling.
+
+Opt-in alternative to the SCAN_TIME_MIN / SCAN_TIME_MAX minute window, enabled
+with "POLL_MODE": "adaptive" in mega_data.json. Each realm's upload cadence is
+learned from the lastUploadUnix history MegaData keeps in upload_timers, the
+first probe is scheduled just before the predicted next Last-Modified, and
+probes that find unchanged data back off exponentially so stale realms are not
+downloaded over and over.
+"""
+
+import statistics
+
+# blizzard publishes about once an hour, intervals outside this are treated as gaps
+DEFAULT_UPLOAD_INTERVAL = 60 * 60
+MIN_UPLOAD_INTERVAL = 20 * 60
+MAX_UPLOAD_INTERVAL = 3 * 60 * 60
+# start probing a little before the predicted upload
+PROBE_LEAD_SECONDS = 30
+# retry delays after an unchanged probe: 5, 10, 20, 40, 60, 60...
+PROBE_RETRY_BASE = 5
+PROBE_RETRY_MAX = 60
+# once the prediction is this late, stop hammering the realm and check slowly
+LATE_AFTER_SECONDS = 15 * 60
+LATE_RETRY_SECONDS = 5 * 60
+UPLOAD_HISTORY_SIZE = 8
+
+
+def predict_upload_interval(upload_history):
+    """Median seconds between uploads, DEFAULT_UPLOAD_INTERVAL until there is history."""
+    gaps = [
+        later - earlier
+        for earlier, later in zip(upload_history, upload_history[1:])
+        if MIN_UPLOAD_INTERVAL <= later - earlier <= MAX_UPLOAD_INTERVAL
+    ]
+    if not gaps:
+        return DEFAULT_UPLOAD_INTERVAL
+    return statistics.median(gaps)
+
+
+def predict_next_upload(realm_time):
+    """Unix time the next Last-Modified is expected for an upload_timers entry."""
+    history = realm_time.get("uploadHistory") or [realm_time["lastUploadUnix"]]
+    return history[-1] + predict_upload_interval(history)
+
+
+class RealmPollScheduler:
+    """Tracks when each realm should be probed next."""
+
+    def __init__(self):
+        # dataSetID -> unix time of the next probe
+        self.next_probe = {}
+        # dataSetID -> lastUploadUnix seen on the previous probe
+        self._last_seen = {}
+        self._misses = {}
+
+    def due_realms(self, upload_timers, now):
+        """dataSetIDs whose next probe time has passed, unknown realms are due right away."""
+        return [
+            realm_id
+            for realm_id in upload_timers
+            if self.next_probe.get(realm_id, 0) <= now
+        ]
+
+    def record_probe(self, realm_id, realm_time, now):
+        """Schedule the next probe from the result of the one just made.
+        Parameters:
+            - realm_id (int): The dataSetID that was probed.
+            - realm_time (dict): Its upload_timers entry after the probe, None if it never loaded.
+            - now (float): Unix time of the probe.
+        Returns:
+            - True if the realm had a new upload since the previous probe.
+        """
+        last_upload = realm_time.get("lastUploadUnix") if realm_time else None
+        updated = last_upload is not None and last_upload != self._last_seen.get(
+            realm_id
+        )
+        if updated:
+            self._last_seen[realm_id] = last_upload
+            self._misses[realm_id] = 0
+            next_upload = predict_next_upload(realm_time)
+            self.next_probe[realm_id] = max(next_upload - PROBE_LEAD_SECONDS, now)
+            return True
+
+        misses = self._misses.get(realm_id, 0)
+        self._misses[realm_id] = misses + 1
+        if realm_time and now - predict_next_upload(realm_time) > LATE_AFTER_SECONDS:
+            delay = LATE_RETRY_SECONDS
+        else:
+            delay = min(PROBE_RETRY_BASE * 2**misses, PROBE_RETRY_MAX)
+        self.next_probe[realm_id] = now + delay
+        return False
+
+    def seconds_until_next_probe(self, now):
+        if not self.next_probe:
+            return 0
+        return max(min(self.next_probe.values()) - now, 0)
@@ -0,0 +1,203 @@
+"""
+On-disk cache for the Saddlebag and Raidbots static datasets.
+
+Each dataset is stored as <name>.json plus <name>.meta.json (ETag, Last-Modified,
+fetch time) under AzerothAuctionAssassinData/cache, POST datasets get one pair
+per request body (<name>_<body hash>.json) and prune_static_cache() removes the
+bodies that are no longer requested. A copy younger than its
+max-age is served from disk, an older one is revalidated with If-None-Match /
+If-Modified-Since so an unchanged dataset costs a 304 instead of a multi-MB
+download. When upstream fails: stale cache, then the GitHub backup, then the
+copy shipped in StaticData/.
+"""
+
+import hashlib
+import json
+import os
+import re
+import time
+import requests
+
+STATIC_CACHE_DIR = os.path.join("AzerothAuctionAssassinData", "cache")
+LOCAL_STATIC_DIR = "StaticData"
+# set False to always download, ex: when regenerating StaticData/
+USE_STATIC_CACHE = True
+
+HOUR = 60 * 60
+STATIC_DATA_MAX_AGE = {
+    "item_names": 12 * HOUR,
+    "pet_names": 12 * HOUR,
+    "ilvl_items": 12 * HOUR,
+    "bonuses": 24 * HOUR,
+    "equippable-items": 24 * HOUR,
+    "item-curves": 24 * HOUR,
+    "item-squish-era": 24 * HOUR,
+}
+
+
+# cache keys read or written by this process, prune_static_cache keeps these
+_requested_cache_keys = set()
+
+
+def _cache_paths(cache_key):
+    return (
+        os.path.join(STATIC_CACHE_DIR, f"{cache_key}.json"),
+        os.path.join(STATIC_CACHE_DIR, f"{cache_key}.meta.json"),
+    )
+
+
+def _read_cache(cache_key):
+    data_path, meta_path = _cache_paths(cache_key)
+    if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+        return None, None
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(data_path, encoding="utf-8") as f:
+            data = json.load(f)
+        return data, meta
+    except (OSError, ValueError) as ex:
+        print(f"Ignoring unreadable static data cache {data_path}: {ex}")
+        return None, None
+
+
+def _request_hash(json_body):
+    if json_body is None:
+        return None
+    return hashlib.sha1(
+        json.dumps(json_body, sort_keys=True).encode("utf-8")
+    ).hexdigest()[:16]
+
+
+def _cache_key(dataset, request_hash):
+    return f"{dataset}_{request_hash}" if request_hash else dataset
+
+
+def prune_static_cache(dataset):
+    """Delete the cached request bodies of dataset this process has not asked for,
+    ex: the groups of an edited desired ilvl list. Returns how many were removed."""
+    if not os.path.isdir(STATIC_CACHE_DIR):
+        return 0
+    key_pattern = re.compile(rf"{re.escape(dataset)}(_[0-9a-f]{{16}})?")
+    removed = 0
+    for file_name in os.listdir(STATIC_CACHE_DIR):
+        if file_name.endswith(".meta.json"):
+            cache_key = file_name[: -len(".meta.json")]
+        elif file_name.endswith(".json"):
+            cache_key = file_name[: -len(".json")]
+        else:
+            continue
+        if not key_pattern.fullmatch(cache_key) or cache_key in _requested_cache_keys:
+            continue
+        try:
+            os.remove(os.path.join(STATIC_CACHE_DIR, file_name))
+        except OSError as ex:
+            print(f"Could not remove static data cache {file_name}: {ex}")
+            continue
+        if not file_name.endswith(".meta.json"):
+            removed += 1
+    return removed
+
+
+def _write_json(path, data):
+    # write then rename so a crash never leaves a half written cache file
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _write_cache(cache_key, data, meta):
+    data_path, meta_path = _cache_paths(cache_key)
+    try:
+        os.makedirs(STATIC_CACHE_DIR, exist_ok=True)
+        _write_json(data_path, data)
+        _write_json(meta_path, meta)
+    except OSError as ex:
+        print(f"Could not write static data cache {data_path}: {ex}")
+
+
+def fetch_static_json(
+    dataset,
+    url,
+    method="GET",
+    json_body=None,
+    headers=None,
+    backup_url=None,
+    local_file=None,
+    timeout=10,
+):
+    """Get a static dataset from disk or upstream.
+    Parameters:
+        - dataset (str): Dataset name, picks the max-age from STATIC_DATA_MAX_AGE.
+        - url (str): Upstream Saddlebag or Raidbots url.
+        - method (str): "GET" or "POST", json_body is sent with POST.
+        - headers (dict, optional): Extra request headers, ex: Saddlebag User-Agent.
+        - backup_url (str, optional): GitHub raw backup used when upstream fails.
+        - local_file (str, optional): File name in StaticData/ used as the last offline fallback.
+    Returns:
+        - The decoded json.
+    Processing Logic:
+        - POST bodies are cached separately, keyed on a hash of the body.
+        - Fresh cache is returned without any request.
+        - Stale cache is revalidated with a conditional request, a 304 refreshes its age.
+        - On upstream failure fall back to stale cache, backup_url, then StaticData/local_file.
+        - Re-raises the upstream error when every fallback is missing.
+    """
+    cache_key = _cache_key(dataset, _request_hash(json_body))
+    _requested_cache_keys.add(cache_key)
+    max_age = STATIC_DATA_MAX_AGE.get(dataset, 12 * HOUR)
+    cached, meta = _read_cache(cache_key) if USE_STATIC_CACHE else (None, None)
+
+    if cached is not None and time.time() - meta.get("fetched_at", 0) < max_age:
+        return cached
+
+    request_headers = dict(headers or {})
+    if cached is not None:
+        if meta.get("etag"):
+            request_headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            request_headers["If-Modified-Since"] = meta["last_modified"]
+
+    try:
+        resp = requests.request(
+            method, url, json=json_body, headers=request_headers, timeout=timeout
+        )
+        if resp.status_code == 304 and cached is not None:
+            meta["fetched_at"] = time.time()
+            _write_cache(cache_key, cached, meta)
+            return cached
+        resp.raise_for_status()
+        data = resp.json()
+        if USE_STATIC_CACHE:
+            _write_cache(
+                cache_key,
+                data,
+                {
+                    "url": url,
+                    "etag": resp.headers.get("ETag"),
+                    "last_modified": resp.headers.get("Last-Modified"),
+                    "fetched_at": time.time(),
+                },
+            )
+        return data
+    except Exception as ex:
+        upstream_error = ex
+        print(f"Failed to get {dataset} from {url}: {ex}")
+
+    if cached is not None:
+        print(f"Using cached {dataset} from {_cache_paths(cache_key)[0]}")
+        return cached
+    if backup_url:
+        try:
+            print(f"Getting {dataset} backup from github")
+            return requests.get(backup_url, timeout=timeout).json()
+        except Exception as ex:
+            print(f"Failed to get {dataset} backup from github: {ex}")
+    if local_file:
+        local_path = os.path.join(LOCAL_STATIC_DIR, local_file)
+        if os.path.exists(local_path):
+            print(f"Using offline {dataset} from {local_path}")
+            with open(local_path, encoding="utf-8") as f:
+                return json.load(f)
+    raise upstream_error
@@ -0,0 +1,359 @@
+"""
+Synthetic auction house payloads for load testing.
+
+Builds Blizzard shaped connected realm and commodity auction responses from the
+StaticData/ snapshots (item_names, ilvl_items, bonuses, pet_names) so the
+scanner, matcher and benchmark can be pushed with realistic data at any size
+without an API client. Payloads are plain dicts (use them from memory) or can
+be written to disk as one json file per realm:
+
+    python3 -m utils.synthetic_auctions --realms 10 --auctions 50000 --output synthetic/
+    python3 benchmark-matching.py synthetic/
+
+The same seed always produces the same payloads. Every written payload is run
+through AuctionMatcher.clean_listing_data first, so a payload the scanner could
+not read fails here instead of in the benchmark.
+"""
+
+import argparse, contextlib, io, json, os, random
+from utils.auction_matching import AuctionMatcher
+from utils.bonus_ids import BonusCatalog
+
+TIME_LEFT = ["SHORT", "MEDIUM", "LONG", "VERY_LONG"]
+TIME_LEFT_WEIGHTS = [5, 15, 35, 45]
+# share of a realm's listings that are gear with bonus ids and caged pets, the rest are plain items
+GEAR_SHARE = 0.25
+PET_SHARE = 0.05
+# chance a piece of gear rolled a socket / a tertiary stat
+SOCKET_CHANCE = 0.04
+TERTIARY_CHANCE = 0.08
+# modifier type 29 / 30 values the matcher reads as secondary stats (crit, haste, vers, mastery)
+SECONDARY_STAT_VALUES = [32, 36, 40, 49]
+# most caged pets are level 1 or 25, rare quality, breeds 3-12 and their 13-22 variants
+PET_LEVEL_1_SHARE = 0.55
+PET_LEVEL_25_SHARE = 0.3
+PET_QUALITY_WEIGHTS = [5, 10, 25, 60]
+PET_BREEDS = list(range(3, 13)) + list(range(13, 23))
+PET_CAGE_ITEM_ID = 82800
+COPPER_PER_GOLD = 10000
+
+
+class SyntheticAuctionGenerator:
+    """Random auction listings drawn from the static item, bonus and pet data."""
+
+    def __init__(self, static_dir="StaticData", seed=None):
+        self.random = random.Random(seed)
+        self._next_auction_id = 1
+
+        item_names = self._load(static_dir, "item_names.json")
+        ilvl_items = self._load(static_dir, "ilvl_items.json")
+        pet_names = self._load(static_dir, "pet_names.json")
+        bonus_catalog = BonusCatalog(
+            {int(k): v for k, v in self._load(static_dir, "bonuses.json").items()}
+        )
+
+        # gear: item id -> (required level, vendor sell price in copper)
+        self.gear = {
+            int(item_id): (item["required_level"], item.get("sell_price") or 10000)
+            for item_id, item in ilvl_items.items()
+        }
+        self.gear_ids = list(self.gear)
+        # caged pets only come from pet_auction(), a cage without pet_species_id is not a real listing
+        self.item_ids = [
+            int(k)
+            for k in item_names
+            if int(k) not in self.gear and int(k) != PET_CAGE_ITEM_ID
+        ]
+        self.pet_ids = [int(k) for k in pet_names]
+        # one bonus from each of these pools makes a plausible bonus_lists
+        bonuses = bonus_catalog.bonuses_by_id
+        self.level_bonus_ids = sorted(bonus_catalog.ilvl_addition)
+        self.track_bonus_ids = sorted(k for k, v in bonuses.items() if "curveId" in v)
+        self.quality_bonus_ids = sorted(
+            k
+            for k, v in bonuses.items()
+            if list(v.keys()) in (["id", "quality"], ["id", "tag"])
+        )
+        self.socket_ids = sorted(bonus_catalog.socket_ids)
+        self.tertiary_ids = sorted(
+            bonus_catalog.leech_ids
+            | bonus_catalog.avoidance_ids
+            | bonus_catalog.speed_ids
+        )
+        # every item keeps the same typical price across payloads, like a real market
+        self._market_prices = {}
+
+    @staticmethod
+    def _load(static_dir, file_name):
+        with open(os.path.join(static_dir, file_name)) as f:
+            return json.load(f)
+
+    def _auction_id(self):
+        self._next_auction_id += 1
+        return self._next_auction_id
+
+    def _market_price(self, key, median_gold):
+        """Typical copper price for an item, log normal so a few items are very expensive."""
+        if key not in self._market_prices:
+            gold = self.random.lognormvariate(0, 1.5) * median_gold
+            self._market_prices[key] = max(int(gold * COPPER_PER_GOLD), 100)
+        return self._market_prices[key]
+
+    def _listing_price(self, market_price):
+        # most listings sit near the market price, some are deals and some are way overpriced
+        price = int(market_price * self.random.lognormvariate(0, 0.6))
+        # prices are listed in whole silver
+        return max(price - price % 100, 100)
+
+    def _with_prices(self, auction, market_price, bid_chance=0.2):
+        auction["buyout"] = self._listing_price(market_price)
+        if self.random.random() < bid_chance:
+            auction["bid"] = max(
+                int(auction["buyout"] * self.random.uniform(0.5, 1)), 1
+            )
+        auction["time_left"] = self.random.choices(TIME_LEFT, TIME_LEFT_WEIGHTS)[0]
+        return auction
+
+    def gear_auction(self):
+        item_id = self.random.choice(self.gear_ids)
+        required_level, sell_price = self.gear[item_id]
+        bonus_lists = []
+        for pool in (
+            self.quality_bonus_ids,
+            self.track_bonus_ids,
+            self.level_bonus_ids,
+        ):
+            if pool:
+                bonus_lists.append(self.random.choice(pool))
+        if self.socket_ids and self.random.random() < SOCKET_CHANCE:
+            bonus_lists.append(self.random.choice(self.socket_ids))
+        if self.tertiary_ids and self.random.random() < TERTIARY_CHANCE:
+            bonus_lists.append(self.random.choice(self.tertiary_ids))
+
+        # type 9 is the player level the item dropped at, 29 / 30 the secondary stats
+        modifiers = [
+            {"type": 9, "value": required_level or 80},
+            {"type": 28, "value": self.random.randint(1000, 3000)},
+        ]
+        for modifier_type, value in zip(
+            (29, 30), self.random.sample(SECONDARY_STAT_VALUES, 2)
+        ):
+            modifiers.append({"type": modifier_type, "value": value})
+
+        auction = {
+            "id": self._auction_id(),
+            "item": {
+                "id": item_id,
+                "context": self.random.choice([3, 4, 5, 6, 13, 16, 23]),
+                "bonus_lists": bonus_lists,
+                "modifiers": modifiers,
+            },
+            "quantity": 1,
+        }
+        # gear trades at a multiple of its vendor price
+        market_price = self._market_price(item_id, sell_price * 20 / COPPER_PER_GOLD)
+        return self._with_prices(auction, market_price)
+
+    def pet_auction(self):
+        pet_id = self.random.choice(self.pet_ids)
+        roll = self.random.random()
+        if roll < PET_LEVEL_1_SHARE:
+            pet_level = 1
+        elif roll < PET_LEVEL_1_SHARE + PET_LEVEL_25_SHARE:
+            pet_level = 25
+        else:
+            pet_level = self.random.randint(2, 24)
+        auction = {
+            "id": self._auction_id(),
+            "item": {
+                "id": PET_CAGE_ITEM_ID,
+                "modifiers": [{"type": 6, "value": pet_id}],
+                "pet_breed_id": self.random.choice(PET_BREEDS),
+                "pet_level": pet_level,
+                "pet_quality_id": self.random.choices(range(4), PET_QUALITY_WEIGHTS)[0],
+                "pet_species_id": pet_id,
+            },
+            "quantity": 1,
+        }
+        market_price = self._market_price(("pet", pet_id), 200)
+        # leveled pets sell for more than level 1 cages
+        return self._with_prices(auction, market_price * (1 + pet_level / 25))
+
+    def item_auction(self):
+        item_id = self.random.choice(self.item_ids)
+        auction = {
+            "id": self._auction_id(),
+            "item": {"id": item_id},
+            "quantity": self.random.choice([1, 1, 1, 5, 20, 200]),
+        }
+        return self._with_prices(auction, self._market_price(item_id, 50))
+
+    def realm_auctions(self, count, connected_realm_id, region="NA"):
+        """Blizzard /connected-realm/{id}/auctions response with count listings."""
+        auctions = []
+        for _ in range(count):
+            roll = self.random.random()
+            if roll < GEAR_SHARE:
+                auctions.append(self.gear_auction())
+            elif roll < GEAR_SHARE + PET_SHARE:
+                auctions.append(self.pet_auction())
+            else:
+                auctions.append(self.item_auction())
+        namespace = f"dynamic-{region.lower()}"
+        return {
+            "_links": {
+                "self": {
+                    "href": f"https://{region.lower()}.api.blizzard.com/data/wow/connected-realm/{connected_realm_id}/auctions?namespace={namespace}"
+                }
+            },
+            "connected_realm": {
+                "href": f"https://{region.lower()}.api.blizzard.com/data/wow/connected-realm/{connected_realm_id}?namespace={namespace}"
+            },
+            "auctions": auctions,
+        }
+
+    def commodity_auctions(self, count, region="NA", item_count=2000):
+        """Blizzard /auctions/commodities response, listings form a price ladder per item."""
+        item_ids = self.random.sample(
+            self.item_ids, min(item_count, len(self.item_ids))
+        )
+        auctions = []
+        for _ in range(count):
+            item_id = self.random.choice(item_ids)
+            market_price = self._market_price(("commodity", item_id), 5)
+            # undercut ladders: most listings within a few percent of the cheapest one
+            unit_price = int(market_price * (1 + self.random.expovariate(20)))
+            auctions.append(
+                {
+                    "id": self._auction_id(),
+                    "item": {"id": item_id},
+                    "quantity": self.random.choice([1, 5, 20, 100, 200, 1000]),
+                    "unit_price": max(unit_price - unit_price % 100, 100),
+                    "time_left": self.random.choices(TIME_LEFT, TIME_LEFT_WEIGHTS)[0],
+                }
+            )
+        return {
+            "_links": {
+                "self": {
+                    "href": f"https://{region.lower()}.api.blizzard.com/data/wow/auctions/commodities?namespace=dynamic-{region.lower()}"
+                }
+            },
+            "auctions": auctions,
+        }
+
+
+def connected_realm_ids(region, count, data_dir="AzerothAuctionAssassinData"):
+    """The first count connected realm ids of a region, commodities excluded."""
+    with open(
+        os.path.join(data_dir, f"{region.lower()}-wow-connected-realm-ids.json")
+    ) as f:
+        realm_ids = sorted(
+            {realm_id for realm_id in json.load(f).values() if realm_id > 0}
+        )
+    return realm_ids[:count]
+
+
+def check_payload(payload, connected_id, region="NA"):
+    """Run a payload through clean_listing_data desiring every listed item and pet at any price.
+    Raises whatever the matcher raises on a listing it cannot read, returns the alert count.
+    """
+    item_ids, pet_ids = set(), set()
+    for auction in payload["auctions"]:
+        if auction["item"]["id"] == PET_CAGE_ITEM_ID:
+            pet_ids.add(auction["item"]["pet_species_id"])
+        else:
+            item_ids.add(auction["item"]["id"])
+    matcher = AuctionMatcher(
+        region=region,
+        show_bid_prices="true",
+        desired_items={item_id: 10**9 for item_id in item_ids},
+        desired_pets={pet_id: 10**9 for pet_id in pet_ids},
+        desired_ilvl_items={},
+        min_ilvl=100000,
+        desired_ilvl_index={},
+        desired_pet_ilvl_index={},
+        socket_ids=set(),
+        leech_ids=set(),
+        avoidance_ids=set(),
+        speed_ids=set(),
+        ilvl_addition={},
+        realm_names={connected_id: [f"synthetic-{connected_id}"]},
+    )
+    # the matcher prints a line per match, only the outcome matters here
+    with contextlib.redirect_stdout(io.StringIO()):
+        alerts = matcher.clean_listing_data(payload["auctions"], connected_id)
+    return len(alerts or [])
+
+
+def write_payloads(
+    output_dir,
+    realm_count=5,
+    auctions_per_realm=50000,
+    commodity_count=0,
+    region="NA",
+    seed=None,
+    static_dir="StaticData",
+    check=True,
+):
+    """Write one {connected_realm_id}.json per realm (and commodities.json), returns the paths."""
+    generator = SyntheticAuctionGenerator(static_dir, seed)
+    os.makedirs(output_dir, exist_ok=True)
+    payloads = [
+        (
+            f"{realm_id}.json",
+            realm_id,
+            generator.realm_auctions(auctions_per_realm, realm_id, region),
+        )
+        for realm_id in connected_realm_ids(region, realm_count)
+    ]
+    if commodity_count:
+        commodity_id = -1 if region == "NA" else -2
+        payloads.append(
+            (
+                "commodities.json",
+                commodity_id,
+                generator.commodity_auctions(commodity_count, region),
+            )
+        )
+    paths = []
+    for file_name, connected_id, payload in payloads:
+        if check:
+            check_payload(payload, connected_id, region)
+        path = os.path.join(output_dir, file_name)
+        with open(path, "w") as f:
+            json.dump(payload, f)
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Write synthetic auction house payloads for load testing."
+    )
+    parser.add_argument("--output", default="synthetic-auctions")
+    parser.add_argument("--region", default="NA")
+    parser.add_argument("--realms", type=int, default=5)
+    parser.add_argument("--auctions", type=int, default=50000, help="per realm")
+    parser.add_argument("--commodities", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--no-check",
+        action="store_true",
+        help="skip running each payload through clean_listing_data",
+    )
+    args = parser.parse_args()
+
+    paths = write_payloads(
+        args.output,
+        realm_count=args.realms,
+        auctions_per_realm=args.auctions,
+        commodity_count=args.commodities,
+        region=args.region,
+        seed=args.seed,
+        check=not args.no_check,
+    )
+    print(f"wrote {len(paths)} payloads to {args.output}")
+
+
+if __name__ == "__main__":
+    main()